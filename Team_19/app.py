@@ -1,14 +1,11 @@
 import os
 import sqlite3
 import numpy as np
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
 
-# TensorFlow / Keras imports
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.image import load_img, img_to_array
-from tensorflow.keras.applications.resnet50 import preprocess_input as res_preprocess
-from tensorflow.keras.applications.vgg16 import preprocess_input as vgg_preprocess
+# Shared-backbone inference engine (TensorFlow / Keras)
+from inference_engine import InferenceEngine, load_image_batch, apply_preprocess
 
 # ---------------------------
 # FLASK APP INITIALIZATION
@@ -89,39 +86,33 @@ MODEL_CONFIG = {
     }
 }
 
-LOADED_MODELS = {}
-
-
-def get_model(model_key):
-    """Load model lazily."""
-    if model_key not in MODEL_CONFIG:
-        raise ValueError("Invalid model choice")
-
-    if model_key not in LOADED_MODELS:
-        path = MODEL_CONFIG[model_key]["path"]
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"Model file missing: {path}")
-        LOADED_MODELS[model_key] = load_model(path)
-
-    return LOADED_MODELS[model_key], MODEL_CONFIG[model_key]["preprocess"]
+# Models are preloaded in the background; ResNet50/VGG16 backbones are
+# held once and shared by the resnet, vgg and hybrid heads.
+ENGINE = InferenceEngine(MODEL_CONFIG)
+ENGINE.start_preload()
 
 
 # ---------------------------
 # IMAGE PREPROCESSING
 # ---------------------------
 def preprocess_image(img_path, preprocess_type, img_size=224):
-    img = load_img(img_path, target_size=(img_size, img_size))
-    img = img_to_array(img)
-    img = np.expand_dims(img, axis=0)
+    img = load_image_batch([img_path], img_size)
+    return apply_preprocess(img, preprocess_type)
 
-    if preprocess_type == "resnet":
-        img = res_preprocess(img)
-    elif preprocess_type == "vgg":
-        img = vgg_preprocess(img)
-    else:
-        img = img / 255.0
 
-    return img
+def summarize_prediction(preds):
+    class_index = int(np.argmax(preds))
+    return CLASS_NAMES[class_index], round(float(preds[class_index] * 100), 2)
+
+
+def save_uploads(files, upload_folder="uploads"):
+    os.makedirs(upload_folder, exist_ok=True)
+    paths = []
+    for f in files:
+        img_path = os.path.join(upload_folder, f.filename)
+        f.save(img_path)
+        paths.append(img_path)
+    return paths
 
 
 # ---------------------------
@@ -254,19 +245,36 @@ def predict():
             flash("Upload an image", "danger")
             return redirect(url_for('predict'))
 
-        upload_folder = "uploads"
-        os.makedirs(upload_folder, exist_ok=True)
-        img_path = os.path.join(upload_folder, image_file.filename)
-        image_file.save(img_path)
+        img_path = save_uploads([image_file])[0]
 
         try:
-            model, preprocess_type = get_model(model_choice)
-            img = preprocess_image(img_path, preprocess_type)
-            preds = model.predict(img)[0]
-
-            class_index = int(np.argmax(preds))
-            confidence = round(float(preds[class_index] * 100), 2)
-            predicted_class = CLASS_NAMES[class_index]
+            raw = load_image_batch([img_path])
+
+            if model_choice == "all":
+                # One pass through each backbone feeds every model head
+                all_preds = ENGINE.compare_all(raw)
+                comparisons = []
+                for key, preds in all_preds.items():
+                    label, conf = summarize_prediction(preds[0])
+                    comparisons.append({
+                        "model_name": MODEL_CONFIG[key]["name"],
+                        "predicted_class": label,
+                        "confidence": conf
+                    })
+                if not comparisons:
+                    raise RuntimeError("No models available")
+                best = max(comparisons, key=lambda c: c["confidence"])
+                return render_template(
+                    "result.html",
+                    predicted_class=best["predicted_class"],
+                    confidence=best["confidence"],
+                    steps=REMEDY_STEPS[best["predicted_class"]],
+                    model_name="All Models (highest confidence: %s)" % best["model_name"],
+                    comparisons=comparisons
+                )
+
+            preds = ENGINE.predict(model_choice, raw)[0]
+            predicted_class, confidence = summarize_prediction(preds)
             steps = REMEDY_STEPS[predicted_class]
 
             return render_template(
@@ -285,6 +293,47 @@ def predict():
     return render_template("predict.html", models=MODEL_CONFIG)
 
 
+# ---------------------------
+# BATCH PREDICTION API
+# ---------------------------
+@app.route('/api/predict', methods=['POST'])
+def api_predict():
+    """
+    Predict a batch of uploaded images ("images" field).
+    model_choice may be a model key or "all" to compare every model.
+    """
+    if "email" not in session:
+        return jsonify({"error": "Login required"}), 401
+
+    model_choice = request.form.get("model_choice", "all")
+    files = request.files.getlist("images") or request.files.getlist("image")
+    if not files:
+        return jsonify({"error": "No images uploaded"}), 400
+    if model_choice != "all" and model_choice not in MODEL_CONFIG:
+        return jsonify({"error": "Invalid model choice"}), 400
+
+    paths = save_uploads(files)
+    try:
+        raw = load_image_batch(paths)
+        if model_choice == "all":
+            all_preds = ENGINE.compare_all(raw)
+        else:
+            all_preds = {model_choice: ENGINE.predict(model_choice, raw)}
+    except Exception as e:
+        print("Error:", e)
+        return jsonify({"error": "Prediction failed"}), 500
+
+    results = []
+    for i, f in enumerate(files):
+        per_model = {}
+        for key, preds in all_preds.items():
+            label, conf = summarize_prediction(preds[i])
+            per_model[key] = {"predicted_class": label, "confidence": conf}
+        results.append({"image": f.filename, "predictions": per_model})
+
+    return jsonify({"results": results, "errors": ENGINE.errors})
+
+
 @app.route('/graphs')
 def graphs():
     if not login_required():
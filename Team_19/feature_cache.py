@@ -0,0 +1,224 @@
+import hashlib
+import math
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+from tensorflow.keras.preprocessing.image import ImageDataGenerator, load_img, img_to_array
+from tensorflow.keras.callbacks import ModelCheckpoint
+from tensorflow.keras.layers import GlobalAveragePooling2D, Concatenate, BatchNormalization
+from tensorflow.keras.models import Model
+from tensorflow.keras.optimizers import Adam
+from tensorflow.keras.utils import Sequence, to_categorical
+
+# ---------------------------
+# FROZEN-BACKBONE FEATURE CACHE
+# ---------------------------
+# While the backbones are frozen, every epoch pushes the same images through
+# the same ResNet50 / VGG16 weights. Here the pooled backbone features are
+# computed once (plus K fixed augmentations), stored as memory-mapped .npy
+# files and the dense heads are trained from them. Fine-tuning the backbone
+# remains a separate, optional phase on real images.
+
+CACHE_DIR = "./feature_cache/"
+
+
+def list_split(train_dir, validation_split, img_size=224):
+    """
+    File paths and labels of the training/validation subsets, using the
+    same split rule as ImageDataGenerator.flow_from_directory.
+    """
+    gen = ImageDataGenerator(validation_split=validation_split)
+    split = {}
+    for subset in ("training", "validation"):
+        it = gen.flow_from_directory(
+            train_dir,
+            target_size=(img_size, img_size),
+            batch_size=1,
+            class_mode="categorical",
+            shuffle=False,
+            subset=subset
+        )
+        split[subset] = (list(it.filepaths), np.array(it.classes), it.num_classes)
+    return split
+
+
+def pooled_extractor(inputs, backbone_outputs):
+    """Model returning globally pooled (and concatenated) backbone features."""
+    feats = [GlobalAveragePooling2D()(o) for o in backbone_outputs]
+    out = feats[0] if len(feats) == 1 else Concatenate()(feats)
+    return Model(inputs=inputs, outputs=out)
+
+
+def _cache_name(tag, paths, augment_index, img_size):
+    digest = hashlib.sha1("\n".join(paths).encode("utf-8")).hexdigest()[:12]
+    return f"{tag}_{img_size}_{digest}_aug{augment_index}.npy"
+
+
+def _load_batch(paths, img_size, augmenter=None, seeds=None):
+    batch = []
+    for i, p in enumerate(paths):
+        x = img_to_array(load_img(p, target_size=(img_size, img_size)))
+        if augmenter is not None:
+            x = augmenter.random_transform(x, seed=seeds[i])
+        batch.append(x)
+    return np.stack(batch).astype("float32")
+
+
+def extract_features(extractor, preprocess, paths, cache_file, img_size=224,
+                     batch_size=32, augmenter=None, augment_index=0):
+    """
+    Run `extractor` once over `paths` and store the features in a .npy
+    memmap. Augmented copies use fixed per-image seeds, so copy k is the
+    same every time it is (re)built. Returns the memmap opened read-only.
+    """
+    if os.path.exists(cache_file):
+        cached = np.load(cache_file, mmap_mode="r")
+        if cached.shape[0] == len(paths):
+            return cached
+
+    dim = int(extractor.output.shape[-1])
+    tmp_file = cache_file + ".tmp.npy"
+    out = open_memmap(tmp_file, mode="w+", dtype="float32", shape=(len(paths), dim))
+
+    for start in range(0, len(paths), batch_size):
+        chunk = paths[start:start + batch_size]
+        seeds = [augment_index * 1000003 + start + i for i in range(len(chunk))]
+        raw = _load_batch(chunk, img_size, augmenter if augment_index else None, seeds)
+        out[start:start + len(chunk)] = extractor.predict_on_batch(preprocess(raw))
+
+    out.flush()
+    del out
+    os.replace(tmp_file, cache_file)
+    return np.load(cache_file, mmap_mode="r")
+
+
+def build_feature_cache(tag, extractor, preprocess, train_dir, validation_split=0.3,
+                        augmenter=None, augment_copies=0, img_size=224,
+                        batch_size=32, cache_dir=CACHE_DIR):
+    """
+    Precompute features for the training subset (clean + `augment_copies`
+    augmented versions) and the clean validation subset.
+
+    Returns a dict with memmapped x_train (list, one per copy), y_train,
+    x_val, y_val and the validation class indices.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    split = list_split(train_dir, validation_split, img_size)
+    train_paths, train_classes, num_classes = split["training"]
+    val_paths, val_classes, _ = split["validation"]
+
+    x_train = []
+    for k in range(augment_copies + 1):
+        name = _cache_name(tag + "_train", train_paths, k, img_size)
+        print(f"Feature cache [{tag}] train copy {k}: {name}")
+        x_train.append(extract_features(
+            extractor, preprocess, train_paths, os.path.join(cache_dir, name),
+            img_size, batch_size, augmenter, k
+        ))
+
+    name = _cache_name(tag + "_val", val_paths, 0, img_size)
+    x_val = extract_features(
+        extractor, preprocess, val_paths, os.path.join(cache_dir, name),
+        img_size, batch_size
+    )
+
+    return {
+        "x_train": x_train,
+        "y_train": to_categorical(train_classes, num_classes),
+        "x_val": x_val,
+        "y_val": to_categorical(val_classes, num_classes),
+        "val_classes": val_classes,
+    }
+
+
+class FeatureSequence(Sequence):
+    """
+    Batches from memory-mapped feature copies. Every epoch draws each
+    image once, from a randomly chosen augmentation copy.
+    """
+
+    def __init__(self, copies, labels, batch_size=64, shuffle=True, seed=42):
+        super().__init__()
+        self.copies = copies
+        self.labels = labels
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self.on_epoch_end()
+
+    def __len__(self):
+        return math.ceil(len(self.labels) / self.batch_size)
+
+    def on_epoch_end(self):
+        n = len(self.labels)
+        self.order = self.rng.permutation(n) if self.shuffle else np.arange(n)
+        self.copy_of = self.rng.integers(0, len(self.copies), size=n)
+
+    def __getitem__(self, idx):
+        rows = self.order[idx * self.batch_size:(idx + 1) * self.batch_size]
+        x = np.empty((len(rows), self.copies[0].shape[1]), dtype="float32")
+        for k, copy in enumerate(self.copies):
+            pos = np.flatnonzero(self.copy_of[rows] == k)
+            if len(pos):
+                # read the memmap in ascending row order for locality
+                pos = pos[np.argsort(rows[pos])]
+                x[pos] = copy[rows[pos]]
+        return x, self.labels[rows]
+
+
+def train_head(head, cache, epochs=30, batch_size=64, callbacks=None):
+    """Fit a dense head on cached features."""
+    train_seq = FeatureSequence(cache["x_train"], cache["y_train"], batch_size)
+    return head.fit(
+        train_seq,
+        validation_data=(np.asarray(cache["x_val"]), cache["y_val"]),
+        epochs=epochs,
+        callbacks=callbacks,
+        verbose=1
+    )
+
+
+def attach_head(inputs, backbone_outputs, head):
+    """
+    Full image->class model: frozen backbones, pooling, then the layers of
+    the trained `head` (reused, not copied). Layer layout matches the
+    end-to-end scripts so app.py can load the saved .h5 unchanged.
+    """
+    feats = [GlobalAveragePooling2D()(o) for o in backbone_outputs]
+    x = feats[0] if len(feats) == 1 else Concatenate()(feats)
+    for layer in head.layers[1:]:
+        x = layer(x)
+    return Model(inputs=inputs, outputs=x)
+
+
+def fine_tune(model, bases, train_data, val_data, epochs, save_path, unfreeze_last=20,
+              learning_rate=1e-5, callbacks=None):
+    """
+    Optional second phase: unfreeze the last `unfreeze_last` layers of each
+    backbone (BatchNorm stays frozen) and train end to end on real images.
+
+    The best model is saved to `save_path`, which must not be one of the
+    frozen-backbone *_best.h5 files: those share identical ResNet50/VGG16
+    weights, which the inference engine relies on to run each backbone once.
+    """
+    callbacks = list(callbacks or []) + [
+        ModelCheckpoint(save_path, monitor="val_accuracy", save_best_only=True)
+    ]
+    for base in bases:
+        for layer in base.layers[-unfreeze_last:]:
+            if not isinstance(layer, BatchNormalization):
+                layer.trainable = True
+
+    model.compile(
+        optimizer=Adam(learning_rate),
+        loss="categorical_crossentropy",
+        metrics=["accuracy"]
+    )
+    return model.fit(
+        train_data,
+        validation_data=val_data,
+        epochs=epochs,
+        callbacks=callbacks,
+        verbose=1
+    )
@@ -1,3 +1,4 @@
+import argparse
 import numpy as np
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.applications.resnet50 import preprocess_input, ResNet50
@@ -8,6 +9,20 @@ from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import matplotlib.pyplot as plt
+from feature_cache import build_feature_cache, pooled_extractor, train_head, attach_head, fine_tune
+
+# ----------------------------------------------------
+# TRAINING MODE
+# ----------------------------------------------------
+parser = argparse.ArgumentParser(description="Train hybrid ResNet50 + VGG16 model")
+parser.add_argument("--cache-features", action="store_true",
+                    help="train the head on precomputed frozen-backbone features")
+parser.add_argument("--augment-copies", type=int, default=0,
+                    help="number of fixed augmented copies to cache")
+parser.add_argument("--fine-tune-epochs", type=int, default=0,
+                    help="end-to-end fine-tuning epochs after head training "
+                         "(saved separately as *_finetuned.h5)")
+args = parser.parse_args()
 
 # ----------------------------------------------------
 # DATASET
@@ -61,8 +76,6 @@ resnet_base.load_weights("resnet50_weights_tf_dim_ordering_tf_kernels_notop.h5")
 for layer in resnet_base.layers:
     layer.trainable = False
 
-res_features = GlobalAveragePooling2D()(resnet_base.output)
-
 # ----------------------------------------------------
 # LOAD VGG16 BASE
 # ----------------------------------------------------
@@ -77,40 +90,66 @@ vgg_base.load_weights("vgg16_weights_tf_dim_ordering_tf_kernels_notop.h5")
 for layer in vgg_base.layers:
     layer.trainable = False
 
-vgg_features = GlobalAveragePooling2D()(vgg_base.output)
-
 # ----------------------------------------------------
-# MERGE FEATURES (HYBRID)
+# CLASSIFIER HEAD (on concatenated pooled features)
 # ----------------------------------------------------
-merged = Concatenate()([res_features, vgg_features])
-
-x = Dense(512, activation='relu')(merged)
-x = Dropout(0.5)(x)
-x = Dense(256, activation='relu')(x)
-x = Dropout(0.4)(x)
-output = Dense(num_classes, activation='softmax')(x)
-
-hybrid_model = Model(inputs=input_tensor, outputs=output)
+def build_head(x):
+    x = Dense(512, activation='relu')(x)
+    x = Dropout(0.5)(x)
+    x = Dense(256, activation='relu')(x)
+    x = Dropout(0.4)(x)
+    return Dense(num_classes, activation='softmax')(x)
 
-hybrid_model.compile(
-    optimizer=Adam(1e-4),
-    loss='categorical_crossentropy',
-    metrics=['accuracy']
-)
+early = EarlyStopping(monitor='val_accuracy', patience=6, restore_best_weights=True)
+check = ModelCheckpoint("hybrid_best.h5", monitor='val_accuracy', save_best_only=True)
 
 # ----------------------------------------------------
 # TRAIN MODEL
 # ----------------------------------------------------
-early = EarlyStopping(monitor='val_accuracy', patience=6, restore_best_weights=True)
-check = ModelCheckpoint("hybrid_best.h5", monitor='val_accuracy', save_best_only=True)
-
-history_hybrid = hybrid_model.fit(
-    train_data,
-    validation_data=val_data,
-    epochs=30,
-    callbacks=[early, check],
-    verbose=1
-)
+if args.cache_features:
+    # Both backbones run once per image (and augmented copy), not once per epoch
+    extractor = pooled_extractor(input_tensor, [resnet_base.output, vgg_base.output])
+    cache = build_feature_cache(
+        "hybrid", extractor, preprocess_input, train_dir,
+        validation_split=0.3, augmenter=datagen,
+        augment_copies=args.augment_copies, img_size=img_size
+    )
+
+    head_in = Input(shape=(extractor.output.shape[-1],))
+    head = Model(inputs=head_in, outputs=build_head(head_in))
+    head.compile(optimizer=Adam(1e-4), loss='categorical_crossentropy', metrics=['accuracy'])
+    history_hybrid = train_head(head, cache, epochs=30, callbacks=[early])
+
+    hybrid_model = attach_head(input_tensor, [resnet_base.output, vgg_base.output], head)
+    hybrid_model.compile(optimizer=Adam(1e-4), loss='categorical_crossentropy', metrics=['accuracy'])
+    hybrid_model.save("hybrid_best.h5")
+else:
+    # ----------------------------------------------------
+    # MERGE FEATURES (HYBRID)
+    # ----------------------------------------------------
+    res_features = GlobalAveragePooling2D()(resnet_base.output)
+    vgg_features = GlobalAveragePooling2D()(vgg_base.output)
+    merged = Concatenate()([res_features, vgg_features])
+
+    hybrid_model = Model(inputs=input_tensor, outputs=build_head(merged))
+
+    hybrid_model.compile(
+        optimizer=Adam(1e-4),
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+
+    history_hybrid = hybrid_model.fit(
+        train_data,
+        validation_data=val_data,
+        epochs=30,
+        callbacks=[early, check],
+        verbose=1
+    )
+
+if args.fine_tune_epochs:
+    fine_tune(hybrid_model, [resnet_base, vgg_base], train_data, val_data,
+              args.fine_tune_epochs, "hybrid_finetuned.h5", callbacks=[early])
 
 # ----------------------------------------------------
 # FINAL ACCURACY
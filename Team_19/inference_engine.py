@@ -0,0 +1,274 @@
+import gc
+import hashlib
+import os
+import threading
+
+import numpy as np
+from tensorflow.keras.models import load_model, Model
+from tensorflow.keras.layers import Input
+from tensorflow.keras.preprocessing.image import load_img, img_to_array
+from tensorflow.keras.applications.resnet50 import preprocess_input as res_preprocess
+from tensorflow.keras.applications.vgg16 import preprocess_input as vgg_preprocess
+
+# ---------------------------
+# BACKBONE CONFIGURATION
+# ---------------------------
+# Last layer of each frozen backbone inside the saved .h5 models.
+# Everything after these layers is the trainable classifier head.
+BACKBONE_CUTS = {
+    "resnet": "conv5_block3_out",
+    "vgg": "block5_pool",
+}
+
+# Which backbones each model key depends on.
+MODEL_BACKBONES = {
+    "resnet": ["resnet"],
+    "vgg": ["vgg"],
+    "hybrid": ["resnet", "vgg"],
+    "cnn": [],
+}
+
+# Preprocessing used to feed each backbone.
+BACKBONE_PREPROCESS = {
+    "resnet": "resnet",
+    "vgg": "vgg",
+}
+
+
+# ---------------------------
+# IMAGE HELPERS
+# ---------------------------
+def load_image_batch(img_paths, img_size=224):
+    """Load images as a raw (N, H, W, 3) float32 batch, without preprocessing."""
+    batch = [
+        img_to_array(load_img(p, target_size=(img_size, img_size)))
+        for p in img_paths
+    ]
+    return np.stack(batch).astype("float32")
+
+
+def apply_preprocess(batch, preprocess_type):
+    """Apply model-specific preprocessing to a raw image batch."""
+    # preprocess_input works in place on float arrays, so copy first
+    batch = np.array(batch, dtype="float32", copy=True)
+    if preprocess_type == "resnet":
+        return res_preprocess(batch)
+    if preprocess_type == "vgg":
+        return vgg_preprocess(batch)
+    return batch / 255.0
+
+
+# ---------------------------
+# MODEL SPLITTING
+# ---------------------------
+def _inbound_layer_names(layer):
+    inbound = layer.inbound_nodes[0].inbound_layers
+    if not isinstance(inbound, (list, tuple)):
+        inbound = [inbound]
+    return [l.name for l in inbound]
+
+
+def _clone_layer(layer):
+    return layer.__class__.from_config(layer.get_config())
+
+
+def split_head(model, backbone_keys):
+    """
+    Rebuild the classifier head of `model` as a standalone Model whose
+    inputs are the feature maps of the given backbones.
+
+    Head layers are cloned so the full model (and its duplicate backbone
+    weights) can be released afterwards.
+    """
+    cut_names = {BACKBONE_CUTS[k]: k for k in backbone_keys}
+
+    tensors = {}
+    for name, key in cut_names.items():
+        shape = model.get_layer(name).output.shape[1:]
+        tensors[name] = Input(shape=shape, name=f"{key}_features")
+
+    # Replay every layer downstream of the cuts in topological order
+    pending = []
+    for layer in model.layers:
+        if layer.name in tensors or not layer.inbound_nodes:
+            continue
+        if not _inbound_layer_names(layer):
+            continue  # input layer
+        pending.append(layer)
+
+    progress = True
+    clones = []
+    while pending and progress:
+        progress = False
+        for layer in list(pending):
+            parents = _inbound_layer_names(layer)
+            if not all(p in tensors for p in parents):
+                continue
+            args = [tensors[p] for p in parents]
+            clone = _clone_layer(layer)
+            tensors[layer.name] = clone(args if len(args) > 1 else args[0])
+            clones.append((clone, layer))
+            pending.remove(layer)
+            progress = True
+
+    output_name = model.layers[-1].name
+    if output_name not in tensors:
+        raise ValueError(f"Could not isolate head of model {model.name}")
+
+    head = Model(
+        inputs=[tensors[BACKBONE_CUTS[k]] for k in backbone_keys],
+        outputs=tensors[output_name],
+    )
+    for clone, layer in clones:
+        clone.set_weights(layer.get_weights())
+    return head
+
+
+def extract_backbone(model, backbone_key):
+    """Sub-model mapping image input to the backbone feature map."""
+    cut = model.get_layer(BACKBONE_CUTS[backbone_key])
+    return Model(inputs=model.input, outputs=cut.output)
+
+
+def backbone_fingerprint(backbone):
+    """Hash of a backbone's weights; models can only share backbones with equal hashes."""
+    digest = hashlib.sha1()
+    for w in backbone.get_weights():
+        digest.update(np.ascontiguousarray(w).tobytes())
+    return digest.hexdigest()
+
+
+# ---------------------------
+# INFERENCE ENGINE
+# ---------------------------
+class InferenceEngine:
+    """
+    Holds one copy of each frozen backbone plus the small classifier heads
+    of every model that depends on it.
+
+    Backbones are keyed by (backbone, weight fingerprint): models whose
+    ResNet50/VGG16 weights are identical share one copy, a model with
+    different weights (e.g. fine-tuned) gets its own.
+
+    Models are preloaded in a background thread. `compare_all` runs each
+    distinct backbone once per batch and feeds its features to every head,
+    so comparing all models costs roughly one forward pass.
+    """
+
+    def __init__(self, model_config):
+        self.model_config = model_config
+        self.backbones = {}        # (backbone key, fingerprint) -> sub-model
+        self.model_backbones = {}  # model key -> [(backbone key, fingerprint)]
+        self.heads = {}
+        self.full_models = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+
+    # ---------- loading ----------
+    def start_preload(self):
+        """Load all configured models in a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.preload, daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def preload(self):
+        for key in self.model_config:
+            try:
+                self._load(key)
+            except Exception as e:
+                self.errors[key] = str(e)
+                print(f"Error loading {key}:", e)
+        self._ready.set()
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def is_loaded(self, model_key):
+        return model_key in self.heads or model_key in self.full_models
+
+    def _load(self, model_key):
+        if model_key not in self.model_config:
+            raise ValueError("Invalid model choice")
+        if self.is_loaded(model_key):
+            return
+
+        with self._lock:
+            if self.is_loaded(model_key):
+                return
+
+            path = self.model_config[model_key]["path"]
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Model file missing: {path}")
+            model = load_model(path, compile=False)
+
+            backbone_keys = MODEL_BACKBONES.get(model_key, [])
+            if not backbone_keys:
+                self.full_models[model_key] = model
+                return
+
+            try:
+                variants = []
+                for bk in backbone_keys:
+                    backbone = extract_backbone(model, bk)
+                    variant = (bk, backbone_fingerprint(backbone))
+                    if variant not in self.backbones:
+                        if any(key == bk for key, _ in self.backbones):
+                            print(f"{model_key}: {bk} weights differ from other models, keeping a separate copy")
+                        self.backbones[variant] = backbone
+                    variants.append(variant)
+                self.heads[model_key] = split_head(model, backbone_keys)
+                self.model_backbones[model_key] = variants
+            except (ValueError, KeyError, AttributeError) as e:
+                # Unknown architecture (or Keras API): fall back to running the full model
+                print(f"Could not split {model_key}, using full model:", e)
+                self.full_models[model_key] = model
+                return
+
+            # Heads are cloned and backbones are shared, so the full model
+            # is only kept alive if one of its backbones was adopted above.
+            del model
+            gc.collect()
+
+    # ---------- inference ----------
+    def _backbone_features(self, raw_batch, variants, cache):
+        for variant in variants:
+            if variant in cache:
+                continue
+            x = apply_preprocess(raw_batch, BACKBONE_PREPROCESS[variant[0]])
+            cache[variant] = self.backbones[variant](x, training=False).numpy()
+        return [cache[variant] for variant in variants]
+
+    def _run(self, model_key, raw_batch, cache):
+        if model_key in self.full_models:
+            preprocess_type = self.model_config[model_key]["preprocess"]
+            x = apply_preprocess(raw_batch, preprocess_type)
+            return self.full_models[model_key](x, training=False).numpy()
+
+        feats = self._backbone_features(raw_batch, self.model_backbones[model_key], cache)
+        head = self.heads[model_key]
+        return head(feats if len(feats) > 1 else feats[0], training=False).numpy()
+
+    def predict(self, model_key, raw_batch):
+        """Class probabilities of one model for a raw (N, H, W, 3) batch."""
+        self._load(model_key)
+        return self._run(model_key, raw_batch, {})
+
+    def compare_all(self, raw_batch, model_keys=None):
+        """
+        Class probabilities of every model for a raw batch, computing each
+        distinct backbone only once. Returns {model_key: (N, classes) array}.
+        """
+        model_keys = model_keys or list(self.model_config)
+        cache = {}
+        results = {}
+        for key in model_keys:
+            try:
+                self._load(key)
+            except FileNotFoundError as e:
+                self.errors[key] = str(e)
+                continue
+            results[key] = self._run(key, raw_batch, cache)
+        return results
@@ -1,12 +1,27 @@
+import argparse
 import numpy as np
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.applications.vgg16 import preprocess_input, VGG16
-from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Dropout
+from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Dropout, Input
 from tensorflow.keras.models import Model
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import matplotlib.pyplot as plt
+from feature_cache import build_feature_cache, pooled_extractor, train_head, attach_head, fine_tune
+
+# --------------------
+# TRAINING MODE
+# --------------------
+parser = argparse.ArgumentParser(description="Train VGG16 transfer model")
+parser.add_argument("--cache-features", action="store_true",
+                    help="train the head on precomputed frozen-backbone features")
+parser.add_argument("--augment-copies", type=int, default=0,
+                    help="number of fixed augmented copies to cache")
+parser.add_argument("--fine-tune-epochs", type=int, default=0,
+                    help="end-to-end fine-tuning epochs after head training "
+                         "(saved separately as *_finetuned.h5)")
+args = parser.parse_args()
 
 # --------------------
 # DATASET
@@ -55,40 +70,62 @@ base = VGG16(
 # load manually downloaded NOTOP weights
 base.load_weights("vgg16_weights_tf_dim_ordering_tf_kernels_notop.h5")
 
-# --------------------
-# CUSTOM CLASSIFIER
-# --------------------
-x = base.output
-x = GlobalAveragePooling2D()(x)
-x = Dense(256, activation='relu')(x)
-x = Dropout(0.5)(x)
-output = Dense(num_classes, activation='softmax')(x)
-
-model = Model(inputs=base.input, outputs=output)
-
 # freeze VGG16
 for layer in base.layers:
     layer.trainable = False
 
-model.compile(
-    optimizer=Adam(1e-4),
-    loss="categorical_crossentropy",
-    metrics=["accuracy"]
-)
-
 # --------------------
-# TRAINING
+# CUSTOM CLASSIFIER
 # --------------------
+def build_head(x):
+    x = Dense(256, activation='relu')(x)
+    x = Dropout(0.5)(x)
+    return Dense(num_classes, activation='softmax')(x)
+
 early = EarlyStopping(monitor='val_accuracy', patience=6, restore_best_weights=True)
 check = ModelCheckpoint("vgg16_best.h5", monitor='val_accuracy', save_best_only=True)
 
-history_vgg = model.fit(
-    train_data,
-    validation_data=val_data,
-    epochs=30,
-    callbacks=[early, check],
-    verbose=1
-)
+# --------------------
+# TRAINING
+# --------------------
+if args.cache_features:
+    # Backbone runs once per image (and augmented copy), not once per epoch
+    extractor = pooled_extractor(base.input, [base.output])
+    cache = build_feature_cache(
+        "vgg16", extractor, preprocess_input, train_dir,
+        validation_split=0.3, augmenter=datagen,
+        augment_copies=args.augment_copies, img_size=img_size
+    )
+
+    head_in = Input(shape=(extractor.output.shape[-1],))
+    head = Model(inputs=head_in, outputs=build_head(head_in))
+    head.compile(optimizer=Adam(1e-4), loss="categorical_crossentropy", metrics=["accuracy"])
+    history_vgg = train_head(head, cache, epochs=30, callbacks=[early])
+
+    model = attach_head(base.input, [base.output], head)
+    model.compile(optimizer=Adam(1e-4), loss="categorical_crossentropy", metrics=["accuracy"])
+    model.save("vgg16_best.h5")
+else:
+    x = GlobalAveragePooling2D()(base.output)
+    model = Model(inputs=base.input, outputs=build_head(x))
+
+    model.compile(
+        optimizer=Adam(1e-4),
+        loss="categorical_crossentropy",
+        metrics=["accuracy"]
+    )
+
+    history_vgg = model.fit(
+        train_data,
+        validation_data=val_data,
+        epochs=30,
+        callbacks=[early, check],
+        verbose=1
+    )
+
+if args.fine_tune_epochs:
+    fine_tune(model, [base], train_data, val_data, args.fine_tune_epochs, "vgg16_finetuned.h5",
+              callbacks=[early])
 
 # --------------------
 # FINAL ACCURACY
@@ -0,0 +1,265 @@
+# ===============================
+# Reusable KDD preprocessing + ensemble pipeline
+# ===============================
+# Everything needed to score new connection records (encoders, scaler, PCA,
+# the four models and the ensemble weights) lives in one AnomalyPipeline
+# object that is saved as a single joblib artifact.
+
+import time
+from itertools import product
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+# Define columns once for both files
+columns = [
+    "duration", "protocol_type", "service", "flag", "src_bytes", "dst_bytes",
+    "land", "wrong_fragment", "urgent", "hot", "num_failed_logins", "logged_in",
+    "num_compromised", "root_shell", "su_attempted", "num_root", "num_file_creations",
+    "num_shells", "num_access_files", "num_outbound_cmds", "is_host_login", "is_guest_login",
+    "count", "srv_count", "serror_rate", "srv_serror_rate", "rerror_rate", "srv_rerror_rate",
+    "same_srv_rate", "diff_srv_rate", "srv_diff_host_rate", "dst_host_count", "dst_host_srv_count",
+    "dst_host_same_srv_rate", "dst_host_diff_srv_rate", "dst_host_same_src_port_rate",
+    "dst_host_srv_diff_host_rate", "dst_host_serror_rate", "dst_host_srv_serror_rate",
+    "dst_host_rerror_rate", "dst_host_srv_rerror_rate", "label", "difficulty"
+]
+
+# The 41 connection features of a KDD record (no label / difficulty)
+feature_columns = columns[:41]
+
+categorical_cols = ["protocol_type", "service", "flag"]
+numeric_features = ["src_bytes", "dst_bytes", "count", "srv_count"]
+
+# Order of models in probability lists and ensemble weights
+MODEL_NAMES = ["rf", "xgb", "auto", "mlp"]
+
+
+# --- Preprocessing ---
+def encode_categoricals(df, encoders=None, is_train=True):
+    """Label-encode categorical columns, one encoder per column."""
+    if is_train:
+        encoders = {}
+        for col in categorical_cols:
+            encoders[col] = LabelEncoder()
+            df[col] = encoders[col].fit_transform(df[col])
+    else:
+        # Vectorised lookup against each column's fitted classes; unknown
+        # labels (code -1) map to the first class, as before.
+        for col in categorical_cols:
+            codes = pd.Categorical(df[col], categories=encoders[col].classes_).codes
+            df[col] = np.where(codes < 0, 0, codes).astype(np.int64)
+    return df, encoders
+
+
+def engineer_features(df):
+    """Derived byte/count features; drops the raw numeric columns used."""
+    # Feature engineering (Ensure data types are correct before math operations)
+    for col in numeric_features:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+
+    df['feature_sum'] = df['src_bytes'] + df['dst_bytes'] + df['count']
+    df['feature_product'] = df['src_bytes'] * df['dst_bytes']
+    df['feature_ratio'] = df['src_bytes'] / (df['dst_bytes'] + 1e-6)
+    df['feature_square'] = df['count'] ** 2
+    df['feature_log'] = np.log(df['srv_count'].clip(lower=1) + 1e-6)
+
+    df.drop(numeric_features, axis=1, inplace=True)
+    df.replace([np.inf, -np.inf], np.nan, inplace=True)
+    return df
+
+
+def preprocess_data(df, encoders=None, is_train=True):
+    """Applies common preprocessing steps to both train and test data."""
+    df.columns = columns
+    df.drop(["difficulty"], axis=1, inplace=True)
+
+    # Encode categorical features (fit only on the training set)
+    df, encoders = encode_categoricals(df, encoders, is_train)
+
+    # Encode label: 0 = normal, 1 = attack
+    # KDD labels are 'normal.' or 'attack_name'
+    df["label"] = (df["label"].astype(str).str.strip() != "normal").astype(int)
+
+    df = engineer_features(df)
+
+    # Impute NaNs using mean from the current data (safe for feature engineering results)
+    df.fillna(df.mean(numeric_only=True), inplace=True)
+
+    X = df.drop(columns=["label"])
+    y = df["label"]
+
+    return X, y, encoders
+
+
+# --- Models ---
+def build_autoencoder(n_features):
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense
+
+    autoencoder = Sequential([
+        Dense(32, activation="relu", input_shape=(n_features,)),
+        Dense(16, activation="relu"),
+        Dense(8, activation="relu"),
+        Dense(16, activation="relu"),
+        Dense(32, activation="relu"),
+        Dense(n_features, activation="sigmoid")
+    ])
+    autoencoder.compile(optimizer="adam", loss="mse")
+    return autoencoder
+
+
+def build_mlp(n_features):
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense, Dropout
+
+    mlp = Sequential([
+        Dense(64, activation="relu", input_shape=(n_features,)),
+        Dropout(0.3),
+        Dense(32, activation="relu"),
+        Dropout(0.3),
+        Dense(16, activation="relu"),
+        Dense(1, activation="sigmoid")
+    ])
+    mlp.compile(optimizer="adam", loss="binary_crossentropy", metrics=["accuracy"])
+    return mlp
+
+
+def reconstruction_error(autoencoder, X):
+    X_pred = autoencoder.predict(X, verbose=0)
+    return np.mean(np.square(X_pred - X), axis=1)
+
+
+def weight_grid(step=0.1, n_models=4):
+    """All weight vectors on a `step` grid that sum to 1, as an (m, n_models) array."""
+    k = int(round(1.0 / step))
+    combos = [c for c in product(range(k + 1), repeat=n_models - 1) if sum(c) <= k]
+    grid = np.array([c + (k - sum(c),) for c in combos], dtype=float)
+    return grid / k
+
+
+def find_best_weights_normalized(y_probas, y_true, step=0.1, chunk_size=256):
+    """
+    Grid search of ensemble weights. Every weight combination is scored at
+    once as a (combos x 4) @ (4 x samples) product, in chunks of combos.
+    """
+    probas = np.vstack(y_probas)
+    y_true = np.asarray(y_true).astype(bool)
+    grid = weight_grid(step, len(y_probas))
+
+    print(f"\nSearching for best ensemble weights ({len(grid)} combinations)...")
+    best_acc = 0
+    best_idx = 0
+    for start in range(0, len(grid), chunk_size):
+        combined = grid[start:start + chunk_size] @ probas
+        acc = ((combined >= 0.5) == y_true).mean(axis=1)
+        i = int(np.argmax(acc))
+        if acc[i] > best_acc:
+            best_acc = float(acc[i])
+            best_idx = start + i
+    return tuple(float(w) for w in grid[best_idx]), best_acc
+
+
+# --- Keras (de)serialisation without temp files ---
+def _keras_state(model):
+    return {"json": model.to_json(), "weights": model.get_weights()}
+
+
+def _keras_restore(state):
+    from tensorflow.keras.models import model_from_json
+
+    model = model_from_json(state["json"])
+    model.set_weights(state["weights"])
+    return model
+
+
+# --- Persisted pipeline ---
+class AnomalyPipeline:
+    """
+    Fitted preprocessing + ensemble for scoring raw KDD connection records.
+
+    The autoencoder reconstruction error is scaled with the min/max seen on
+    the weight-search validation split, so scores of a micro-batch do not
+    depend on the other records in the same batch.
+    """
+
+    def __init__(self, encoders, feature_means, scaler, pca, models, weights,
+                 ae_error_range, threshold=0.5):
+        self.encoders = encoders
+        self.feature_means = feature_means
+        self.scaler = scaler
+        self.pca = pca
+        self.models = models
+        self.weights = np.asarray(weights, dtype=float)
+        self.ae_error_range = ae_error_range
+        self.threshold = threshold
+
+    # --- transform ---
+    @staticmethod
+    def parse_records(lines):
+        """KDD-format CSV lines -> DataFrame of the 41 feature columns."""
+        rows = [line.strip().split(",")[:len(feature_columns)] for line in lines]
+        df = pd.DataFrame(rows, columns=feature_columns)
+        for col in feature_columns:
+            if col not in categorical_cols:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        return df
+
+    def transform(self, df):
+        """Raw feature frame -> PCA features, using the fitted training state."""
+        df = df[feature_columns].copy()
+        df, _ = encode_categoricals(df, self.encoders, is_train=False)
+        df = engineer_features(df)
+        df = df[self.feature_means.index]
+        df = df.fillna(self.feature_means)
+        return self.pca.transform(self.scaler.transform(df))
+
+    # --- scoring ---
+    def model_probas(self, X, timings=None):
+        """Per-model attack probabilities; adds seconds per model to `timings`."""
+        probas = {}
+        for name in MODEL_NAMES:
+            start = time.perf_counter()
+            if name == "auto":
+                err = reconstruction_error(self.models["auto"], X)
+                lo, hi = self.ae_error_range
+                probas[name] = np.clip((err - lo) / (hi - lo + 1e-6), 0.0, 1.0)
+            elif name == "mlp":
+                probas[name] = self.models["mlp"].predict(X, verbose=0).flatten()
+            else:
+                probas[name] = self.models[name].predict_proba(X)[:, 1]
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+        return probas
+
+    def score(self, df, timings=None):
+        """Ensemble anomaly score in [0, 1] for each row of a raw feature frame."""
+        start = time.perf_counter()
+        X = self.transform(df)
+        if timings is not None:
+            timings["preprocess"] = timings.get("preprocess", 0.0) + time.perf_counter() - start
+
+        probas = self.model_probas(X, timings)
+        stacked = np.vstack([probas[name] for name in MODEL_NAMES])
+        return self.weights @ stacked, probas
+
+    # --- persistence ---
+    def save(self, path):
+        state = dict(self.__dict__)
+        state["models"] = {
+            name: (_keras_state(m) if name in ("auto", "mlp") else m)
+            for name, m in self.models.items()
+        }
+        joblib.dump(state, path)
+
+    @classmethod
+    def load(cls, path):
+        state = joblib.load(path)
+        state["models"] = {
+            name: (_keras_restore(m) if name in ("auto", "mlp") else m)
+            for name, m in state["models"].items()
+        }
+        obj = cls.__new__(cls)
+        obj.__dict__.update(state)
+        return obj
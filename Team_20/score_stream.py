@@ -0,0 +1,225 @@
+# ===============================
+# Streaming anomaly scorer for KDD-format connection records
+# ===============================
+# Usage:
+#   python score_stream.py                          # read records from stdin
+#   python score_stream.py KDDTest+.txt more.csv    # read files
+#   python score_stream.py --listen 127.0.0.1:9999  # newline-delimited TCP
+#
+# Records are micro-batched: a batch is scored as soon as it holds
+# --max-batch records or the oldest record has waited --max-wait-ms.
+# Each output line is "<score>,<prediction>" in input order, or
+# "error,<reason>" for a record that could not be scored.
+
+import argparse
+import queue
+import socketserver
+import sys
+import threading
+import time
+
+from kdd_pipeline import AnomalyPipeline, MODEL_NAMES, feature_columns
+
+_EOF = object()
+
+
+class ScoringStats:
+    """Throughput and per-model time since start."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.records = 0
+        self.batches = 0
+        self.timings = {}
+
+    def report(self):
+        elapsed = time.perf_counter() - self.start
+        rate = self.records / elapsed if elapsed > 0 else 0.0
+        parts = [f"{self.records} records", f"{self.batches} batches", f"{rate:.1f} rec/s"]
+        for name in ["preprocess"] + MODEL_NAMES:
+            if name in self.timings:
+                per_rec = self.timings[name] / max(self.records, 1) * 1e6
+                parts.append(f"{name}={self.timings[name]:.2f}s ({per_rec:.0f}us/rec)")
+        return " | ".join(parts)
+
+
+class MicroBatchScorer:
+    """
+    Collects (record, reply) pairs from any number of producers and scores
+    them in micro-batches with bounded waiting time.
+    """
+
+    def __init__(self, pipeline, max_batch=256, max_wait_ms=50, report_every=10.0):
+        self.pipeline = pipeline
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.report_every = report_every
+        self.queue = queue.Queue()
+        self.stats = ScoringStats()
+
+    def submit(self, line, reply):
+        """
+        Queue one record; reply(text) is called once with its output line.
+        Returns False for skipped lines (blank, CSV header), which get no reply.
+        """
+        line = line.strip()
+        # skip blank lines and CSV headers
+        if not line or line.startswith("duration"):
+            return False
+        self.queue.put((line, reply))
+        return True
+
+    def close(self):
+        self.queue.put(_EOF)
+
+    def _next_batch(self):
+        item = self.queue.get()
+        if item is _EOF:
+            return None, True
+
+        batch = [item]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _EOF:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _score(self, batch):
+        """Reply to every record of the batch in order; bad records get an error line."""
+        outputs = [None] * len(batch)
+        valid = []
+        for i, (line, _) in enumerate(batch):
+            fields = line.count(",") + 1
+            if fields < len(feature_columns):
+                outputs[i] = f"error,expected {len(feature_columns)} fields, got {fields}"
+            else:
+                valid.append(i)
+
+        if valid:
+            try:
+                df = AnomalyPipeline.parse_records([batch[i][0] for i in valid])
+                scores, _ = self.pipeline.score(df, self.stats.timings)
+            except Exception as e:
+                if len(valid) == 1:
+                    outputs[valid[0]] = f"error,{e}"
+                    scores = []
+                else:
+                    # score one by one so a bad record doesn't fail the rest of the batch
+                    scores = None
+                    for i in valid:
+                        outputs[i] = self._score_one(batch[i][0])
+            if scores is not None:
+                for i, score in zip(valid, scores):
+                    outputs[i] = f"{score:.6f},{int(score >= self.pipeline.threshold)}"
+
+        for (_, reply), text in zip(batch, outputs):
+            reply(text)
+        self.stats.records += len(batch)
+        self.stats.batches += 1
+
+    def _score_one(self, line):
+        try:
+            scores, _ = self.pipeline.score(AnomalyPipeline.parse_records([line]), self.stats.timings)
+            return f"{scores[0]:.6f},{int(scores[0] >= self.pipeline.threshold)}"
+        except Exception as e:
+            return f"error,{e}"
+
+    def run(self):
+        """Score until close() is called; prints stats to stderr."""
+        last_report = time.perf_counter()
+        done = False
+        while not done:
+            batch, done = self._next_batch()
+            if batch:
+                self._score(batch)
+                sys.stdout.flush()
+            if time.perf_counter() - last_report >= self.report_every:
+                print(self.stats.report(), file=sys.stderr)
+                last_report = time.perf_counter()
+        print(self.stats.report(), file=sys.stderr)
+
+
+def _stdout_reply(text):
+    sys.stdout.write(text + "\n")
+
+
+def feed_streams(scorer, streams):
+    for stream in streams:
+        for line in stream:
+            scorer.submit(line, _stdout_reply)
+    scorer.close()
+
+
+def serve(scorer, host, port):
+    """Newline-delimited records in, one score line per record out."""
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            done = threading.Condition()
+            counts = {"submitted": 0, "replied": 0}
+
+            def reply(text):
+                with done:
+                    try:
+                        self.wfile.write((text + "\n").encode())
+                    except (OSError, ValueError):
+                        pass  # client went away; keep scoring the others
+                    counts["replied"] += 1
+                    done.notify()
+
+            for raw in self.rfile:
+                if scorer.submit(raw.decode("utf-8", "replace"), reply):
+                    with done:
+                        counts["submitted"] += 1
+
+            # the client may only have closed its sending side: answer every
+            # queued record before socketserver closes the connection
+            with done:
+                done.wait_for(lambda: counts["replied"] >= counts["submitted"])
+
+    class Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+
+    server = Server((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Listening on {host}:{port}", file=sys.stderr)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching KDD anomaly scorer")
+    parser.add_argument("files", nargs="*", help="KDD-format files (default: stdin)")
+    parser.add_argument("--model", default="kdd_ensemble.joblib", help="artifact saved by anomaly.py")
+    parser.add_argument("--listen", help="host:port to accept records over TCP")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=50)
+    parser.add_argument("--report-every", type=float, default=10.0, help="seconds between stats lines")
+    args = parser.parse_args()
+
+    pipeline = AnomalyPipeline.load(args.model)
+    scorer = MicroBatchScorer(pipeline, args.max_batch, args.max_wait_ms, args.report_every)
+
+    if args.listen:
+        host, port = args.listen.rsplit(":", 1)
+        serve(scorer, host, int(port))
+    else:
+        streams = [open(f) for f in args.files] if args.files else [sys.stdin]
+        threading.Thread(target=feed_streams, args=(scorer, streams), daemon=True).start()
+
+    try:
+        scorer.run()
+    except KeyboardInterrupt:
+        print(scorer.stats.report(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
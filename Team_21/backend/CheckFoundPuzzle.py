@@ -1,82 +1,83 @@
 import time
 import json
 import os
-from copy import deepcopy
 import numpy as np
 import argparse
-from tqdm import tqdm
 from ParseClues import parse_them
-from Readftmodel import Model
-from typing import Dict, Any, Optional, List, Tuple
+from Readftmodel import get_model
+from beam_solver import BeamSolver, DEFAULT_BEAM_WIDTH
+from typing import Dict, Any, Optional, List, Tuple, Iterator
 
 
-def solve_crossword_puzzle(model_path: str, xd_file_path: str, alpha: float, 
-                          output_json_path: Optional[str] = None) -> Dict[str, Any]:
+def solve_crossword_puzzle_stream(model_path: str, xd_file_path: str, alpha: float,
+                                  output_json_path: Optional[str] = None,
+                                  beam_width: int = DEFAULT_BEAM_WIDTH) -> Iterator[Dict[str, Any]]:
     """
-    Main API function to solve crossword puzzle
-    
-    Args:
-        model_path: Path to the fasttext model
-        xd_file_path: Path to the .xd file
-        alpha: Threshold for solving clues
-        output_json_path: Path to save solved puzzle JSON (optional)
-        
-    Returns:
-        Dictionary with solving results and solved board
+    Solve a crossword puzzle, yielding progress events while solving
+
+    Yields {"type": "progress", ...} after each clue (with the current best
+    board) and finally {"type": "result", "result": <same dict as
+    solve_crossword_puzzle>}.
     """
     try:
         start_time = time.time()
         
         # Check if required files exist
         if not os.path.exists(model_path):
-            return {"success": False, "error": f"Model file not found: {model_path}"}
+            yield _result({"success": False, "error": f"Model file not found: {model_path}"})
+            return
         
         if not os.path.exists(xd_file_path):
-            return {"success": False, "error": f"XD file not found: {xd_file_path}"}
+            yield _result({"success": False, "error": f"XD file not found: {xd_file_path}"})
+            return
         
         # Parse the crossword puzzle
         try:
             down, across, board, location_dict, answer = parse_them(xd_file_path)
         except Exception as e:
-            return {"success": False, "error": f"Failed to parse XD file: {str(e)}"}
+            yield _result({"success": False, "error": f"Failed to parse XD file: {str(e)}"})
+            return
         
-        # Load the model
+        # Get the resident model (loaded once per process)
         try:
-            model = Model(model_path)
+            model = get_model(model_path)
         except Exception as e:
-            return {"success": False, "error": f"Failed to load model: {str(e)}"}
+            yield _result({"success": False, "error": f"Failed to load model: {str(e)}"})
+            return
         
         # Get clue precedence
         precedence = model.get_precedence(across, down)
         
         # Solve the puzzle
         try:
-            solved_board = complete_the_puzzle(model, [(1, board)], location_dict, alpha, precedence)
+            solver = BeamSolver(model, alpha, beam_width=beam_width)
+            solved_board = board
+            for progress in solver.solve_iter(board, location_dict, precedence):
+                solved_board = progress["board"]
+                if not progress["done"]:
+                    yield {
+                        "type": "progress",
+                        "step": progress["step"],
+                        "total_steps": progress["total_steps"],
+                        "clue": progress["clue"],
+                        "branches": progress["branches"],
+                        "board": solved_board.tolist(),
+                        "elapsed": time.time() - start_time
+                    }
         except Exception as e:
-            return {"success": False, "error": f"Failed to solve puzzle: {str(e)}"}
+            yield _result({"success": False, "error": f"Failed to solve puzzle: {str(e)}"})
+            return
         
         end_time = time.time()
         solving_time = end_time - start_time
         
         # Convert numpy array to list for JSON serialization
-        solved_board_list = solved_board.tolist() if isinstance(solved_board, np.ndarray) else solved_board
+        solved_board_list = solved_board.tolist()
         
         # Count unsolved cells
-        # num_dots = np.count_nonzero(solved_board == ".") if isinstance(solved_board, np.ndarray) else 0
-        # total_cells = solved_board.size if isinstance(solved_board, np.ndarray) else len(solved_board) * len(solved_board[0])
-        num_dots = np.count_nonzero(solved_board == ".") if isinstance(solved_board, np.ndarray) else sum(1 for row in solved_board for cell in row if cell == ".")
-        total_cells = np.sum(solved_board != '*') if isinstance(solved_board, np.ndarray) else sum(1 for row in solved_board for cell in row if cell != '*')
+        num_dots = np.count_nonzero(solved_board == ".")
+        total_cells = np.sum(solved_board != '*')
         completion_percentage = ((total_cells - num_dots) / total_cells) * 100 if total_cells > 0 else 0
-        
-        print("\n========== DEBUG: CELL COUNTS ==========")
-        print(solved_board[0])
-        print(solved_board[1])
-        print(f"Total cells (excluding #): {total_cells}")
-        print(f"Unsolved cells (.): {num_dots}")
-        print(f"Solved cells: {total_cells - num_dots}")
-        print(f"Completion %: {completion_percentage:.2f}%")
-        print(f"Board shape: {solved_board.shape if isinstance(solved_board, np.ndarray) else (len(solved_board), len(solved_board[0]))}")
-
 
         # Prepare output data
         result_data = {
@@ -93,11 +94,12 @@ def solve_crossword_puzzle(model_path: str, xd_file_path: str, alpha: float,
                 "across_clues": len(across) if across else 0,
                 "down_clues": len(down) if down else 0,
                 "grid_size": {
-                    "rows": solved_board.shape[0] if isinstance(solved_board, np.ndarray) else len(solved_board),
-                    "cols": solved_board.shape[1] if isinstance(solved_board, np.ndarray) else len(solved_board[0])
+                    "rows": solved_board.shape[0],
+                    "cols": solved_board.shape[1]
                 }
             },
-            "alpha_threshold": alpha
+            "alpha_threshold": alpha,
+            "beam_width": beam_width
         }
         
         # Save to JSON file if path provided
@@ -110,10 +112,38 @@ def solve_crossword_puzzle(model_path: str, xd_file_path: str, alpha: float,
             except Exception as e:
                 result_data["warning"] = f"Failed to save JSON file: {str(e)}"
         
-        return result_data
+        yield _result(result_data)
         
     except Exception as e:
-        return {"success": False, "error": f"Unexpected error: {str(e)}"}
+        yield _result({"success": False, "error": f"Unexpected error: {str(e)}"})
+
+
+def _result(result_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "result", "result": result_data}
+
+
+def solve_crossword_puzzle(model_path: str, xd_file_path: str, alpha: float, 
+                          output_json_path: Optional[str] = None,
+                          beam_width: int = DEFAULT_BEAM_WIDTH) -> Dict[str, Any]:
+    """
+    Main API function to solve crossword puzzle
+    
+    Args:
+        model_path: Path to the fasttext model
+        xd_file_path: Path to the .xd file
+        alpha: Threshold for solving clues
+        output_json_path: Path to save solved puzzle JSON (optional)
+        beam_width: Maximum number of partial boards kept per clue
+        
+    Returns:
+        Dictionary with solving results and solved board
+    """
+    result = {"success": False, "error": "Solver produced no result"}
+    for event in solve_crossword_puzzle_stream(model_path, xd_file_path, alpha,
+                                               output_json_path, beam_width):
+        if event["type"] == "result":
+            result = event["result"]
+    return result
 
 
 def solve_and_save_json(model_path: str, xd_file_path: str, alpha: float, 
@@ -169,100 +199,14 @@ def get_puzzle_preview(xd_file_path: str) -> Dict[str, Any]:
 
 
 def complete_the_puzzle(model, branches: List[Tuple], location_dict: Dict, 
-                       alpha: float, precedence: List) -> np.ndarray:
-    """
-    Recursive function to complete the crossword puzzle
-    """
-    if '.' not in branches[0][1] or not precedence:
-        ret = branches[0][1]
-        return ret
-    
-    print(f"Branches: {len(branches)}")
-    
-    # Display current board state
-    for row in branches[0][1]:
-        print(' '.join(row))
-
-    leafs = []
-    item = precedence[0]
-    begin = time.time()
-    
-    for board in tqdm(branches):
-        temp_board = deepcopy(board)
-        pct_board = add_word(item, model, temp_board, location_dict, alpha, item[3])
-        leafs += pct_board
-    
-    leafs = sorted(leafs, key=lambda x: x[0], reverse=True)
-    
-    if len(leafs) == 0:
-        leafs = branches
-    
-    lim = leafs[0][0]
-    leafs = [leaf for leaf in leafs if leaf[0] >= alpha * lim]
-    precedence.pop(0)
-    
-    return complete_the_puzzle(model, leafs, location_dict, alpha, precedence)
-
-
-# def complete_the_puzzle_stream(model, branches: List[Tuple], location_dict: Dict, 
-#                                alpha: float, precedence: List):
-#     """
-#     Recursive generator that yields log messages instead of printing
-#     """
-#     if '.' not in branches[0][1] or not precedence:
-#         yield "Puzzle completed or no precedence left.\n"
-#         ret = branches[0][1]
-#         yield {"solved_board": ret}  # Send final board
-#         return
-
-#     yield f"Branches: {len(branches)}\n"
-
-#     # Yield current board state
-#     board = branches[0][1]
-#     board_str = "\n".join([" ".join(row) for row in board])
-#     yield f"{board_str}\n"
-
-#     leafs = []
-#     item = precedence[0]
-    
-#     for board in branches:
-#         temp_board = deepcopy(board)
-#         pct_board = add_word(item, model, temp_board, location_dict, alpha, item[3])
-#         leafs += pct_board
-
-#     leafs = sorted(leafs, key=lambda x: x[0], reverse=True)
-#     if len(leafs) == 0:
-#         leafs = branches
-
-#     lim = leafs[0][0]
-#     leafs = [leaf for leaf in leafs if leaf[0] >= alpha * lim]
-#     precedence.pop(0)
-
-#     # Recurse
-#     yield from complete_the_puzzle_stream(model, leafs, location_dict, alpha, precedence)
-
-
-
-def add_word(item, model, board: Tuple, location_dict: Dict, max_score: float, beta: float) -> List[Tuple]:
+                       alpha: float, precedence: List,
+                       beam_width: int = DEFAULT_BEAM_WIDTH) -> np.ndarray:
     """
-    Add word candidates to the board
+    Complete the crossword puzzle with the iterative beam-search solver
+    (starts from the best of the given branches)
     """
-    sims = []
-
-    dir = item[0]
-    index = item[1]
-    clue = item[2]
-
-    partial = get_partial(index, dir, board[1], location_dict)
-    regex = "^" + partial + "$"
-    pct, words = model.clue_to_list_of_words(clue, regex)
-    
-    for pct, word in zip(pct, words):
-        temp_board = deepcopy(board[1])
-        temp_board = write_word(word, index, dir, temp_board, location_dict)
-        sims.append((pct * board[0], temp_board))
-    
-    return sims
+    board = max(branches, key=lambda x: x[0])[1]
+    return BeamSolver(model, alpha, beam_width=beam_width).solve(board, location_dict, precedence)
 
 
 def get_board(board: np.ndarray, location_dict: Dict = {}) -> Tuple[Dict, np.ndarray]:
@@ -277,54 +221,12 @@ def get_board(board: np.ndarray, location_dict: Dict = {}) -> Tuple[Dict, np.nda
     return location_dict, board
 
 
-def get_partial(num: int, direction: str, board: np.ndarray, loc_dict: Dict) -> str:
-    """
-    Get partial word from board for a given clue number and direction
-    """
-    if direction == 'down':
-        i, j = loc_dict[num]
-        partial = ''
-        while i < np.shape(board)[0]:
-            if board[i][j] != '*':
-                partial += board[i][j]
-                i += 1
-            else:
-                break
-    else:  # across
-        i, j = loc_dict[num]
-        partial = ''
-        while j < np.shape(board)[1]:
-            if board[i][j] != '*':
-                partial += board[i][j]
-                j += 1
-            else:
-                break
-    return partial
-
-
-def write_word(word: str, num: int, direction: str, board: np.ndarray, loc_dict: Dict) -> np.ndarray:
-    """
-    Write word to board at specified location and direction
-    """
-    if direction == 'down':
-        i, j = loc_dict[num]
-        for char in word:
-            board[i][j] = char
-            i += 1
-    else:  # across
-        i, j = loc_dict[num]
-        for char in word:
-            board[i][j] = char
-            j += 1
-    return board
-
-
 # Legacy main function for backwards compatibility
-def main(model_path: str, fp: str, alpha: float):
+def main(model_path: str, fp: str, alpha: float, beam_width: int = DEFAULT_BEAM_WIDTH):
     """
     Original main function for backwards compatibility
     """
-    result = solve_crossword_puzzle(model_path, fp, alpha, "solved_puzzle.json")
+    result = solve_crossword_puzzle(model_path, fp, alpha, "solved_puzzle.json", beam_width)
     
     if result["success"]:
         print(f"✅ Puzzle solved successfully!")
@@ -340,6 +242,7 @@ if __name__ == "__main__":
     my_parser.add_argument('-m', '--model', help='The path to the fasttext model.', required=True)
     my_parser.add_argument('-xd', '--xd_path', help='Path to the XD file', required=True)
     my_parser.add_argument('-a', '--alpha', type=float, help='Threshold to solve the clues.', required=True)
+    my_parser.add_argument('-b', '--beam_width', type=int, default=DEFAULT_BEAM_WIDTH, help='Partial boards kept per clue.')
     args = my_parser.parse_args()
     
-    main(model_path=args.model, fp=args.xd_path, alpha=args.alpha)
\ No newline at end of file
+    main(model_path=args.model, fp=args.xd_path, alpha=args.alpha, beam_width=args.beam_width)
\ No newline at end of file
@@ -1,23 +1,141 @@
 import fasttext
 import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
 fasttext.FastText.eprint = lambda x: None
 
+# Simple "^A..E$" style patterns can be answered from the letter index
+SIMPLE_PATTERN = re.compile(r"^\^([^\\\[\]()*+?{}|^$]*)\$$")
+
+_MODELS = {}
+_MODELS_LOCK = threading.Lock()
+
+
+def get_model(model_path):
+    """Return the resident Model for model_path, loading it only once."""
+    with _MODELS_LOCK:
+        model = _MODELS.get(model_path)
+        if model is None:
+            model = Model(model_path)
+            _MODELS[model_path] = model
+        return model
+
+
+class LengthBucket:
+    """
+    All answers of one length, with a packed bitset per (position, letter)
+    marking which answers have that letter there.
+    """
+
+    def __init__(self, words):
+        self.words = np.array(words)
+        self.size = len(words)
+        length = len(words[0])
+        # (n, length) array of code points
+        chars = self.words.astype(f"U{length}").view(np.uint32).reshape(self.size, length)
+        self.bitsets = {}
+        for pos in range(length):
+            column = chars[:, pos]
+            for code in np.unique(column):
+                self.bitsets[(pos, chr(code))] = np.packbits(column == code)
+
+    def match(self, partial):
+        """Indices of words matching partial ('.' = any letter)."""
+        mask = None
+        for pos, ch in enumerate(partial):
+            if ch == '.':
+                continue
+            bits = self.bitsets.get((pos, ch))
+            if bits is None:
+                return np.empty(0, dtype=np.int64)
+            mask = bits if mask is None else np.bitwise_and(mask, bits)
+        if mask is None:
+            return np.arange(self.size)
+        return np.flatnonzero(np.unpackbits(mask, count=self.size))
+
+
 class Model:
-    def __init__(self, model_path):
+    def __init__(self, model_path, clue_cache_size=1024):
         self.model = fasttext.load_model(model_path)
+        self._build_index()
+        self._clue_cache = OrderedDict()
+        self._clue_cache_size = clue_cache_size
+        self._lock = threading.Lock()
+
+    def _build_index(self):
+        """Group the label vocabulary by answer length."""
+        labels = [label.replace("__label__", "") for label in self.model.get_labels()]
+        by_length = {}
+        for word in labels:
+            by_length.setdefault(len(word), []).append(word)
+
+        self.buckets = {length: LengthBucket(words) for length, words in by_length.items() if length}
+        # label -> (length, index within its bucket)
+        self.label_pos = {}
+        for length, bucket in self.buckets.items():
+            for i, word in enumerate(bucket.words):
+                self.label_pos["__label__" + word] = (length, i)
+
+    def clue_scores(self, clue, length):
+        """
+        Probability of every answer of `length` for `clue`, aligned with
+        self.buckets[length].words. Memoised across branches and calls.
+        """
+        key = (clue, length)
+        with self._lock:
+            scores = self._clue_cache.get(key)
+            if scores is not None:
+                self._clue_cache.move_to_end(key)
+                return scores
+
+        scores = np.zeros(self.buckets[length].size, dtype=np.float32)
+        labels, probs = self.model.predict(clue, k=-1)
+        for label, prob in zip(labels, probs):
+            pos = self.label_pos.get(label)
+            if pos is not None and pos[0] == length:
+                scores[pos[1]] = prob
+
+        with self._lock:
+            self._clue_cache[key] = scores
+            if len(self._clue_cache) > self._clue_cache_size:
+                self._clue_cache.popitem(last=False)
+        return scores
+
+    def candidates(self, clue, partial):
+        """Words matching partial, best first, with their probabilities."""
+        bucket = self.buckets.get(len(partial))
+        if bucket is None:
+            return [], []
+        idx = bucket.match(partial)
+        if len(idx) == 0:
+            return [], []
+        scores = self.clue_scores(clue, len(partial))[idx]
+        order = np.argsort(-scores, kind="stable")
+        return scores[order].tolist(), bucket.words[idx[order]].tolist()
+
+    def has_match(self, partial):
+        """True if any answer fits partial ('.' = any letter)."""
+        bucket = self.buckets.get(len(partial))
+        return bucket is not None and len(bucket.match(partial)) > 0
 
     def clue_to_list_of_words(self, clue, regex):
+        simple = SIMPLE_PATTERN.match(regex)
+        if simple:
+            return self.candidates(clue, simple.group(1))
+
+        # Arbitrary regex: fall back to scanning all labels
         words = []
         pcts = []
-        results = self.model.predict(clue, k=1000000)
+        results = self.model.predict(clue, k=-1)
         regex = re.compile(regex)
-        i = 0
-        for word in results[0]:
+        for word, pct in zip(results[0], results[1]):
             word = word.replace("__label__", "")
             if regex.search(word):
                 words.append(word)
-                pcts.append(results[1][i])
-                i += 1
+                pcts.append(pct)
         return pcts, words
 
     def get_precedence(self, across, down):
@@ -27,4 +145,4 @@ class Model:
         for key, value, in across.items():
             precedence.append(('across', key, value, self.model.predict(value, k=1)[1][0]))
         precedence.sort(key=lambda x: x[3], reverse=True)
-        return precedence
\ No newline at end of file
+        return precedence
@@ -8,7 +8,8 @@ import json
 from typing import Dict, Any, List, Tuple
 from flask_cors import CORS
 
-from Readftmodel import Model
+import threading
+from Readftmodel import get_model
 # app = Flask(__name__)
 app = Flask(__name__, static_folder="static", template_folder="templates")
 # CORS(app)  # allow all origins (for dev)
@@ -31,6 +32,8 @@ from input_proc import (
     update_grid_api,
     update_clues_api,
     load_and_prepare_image,
+    load_session_image,
+    forget_session,
     base64_to_image,
     image_to_base64
 )
@@ -42,9 +45,11 @@ from xd_from_json import (
 from CheckFoundPuzzle import (
     complete_the_puzzle,
     solve_crossword_puzzle,
+    solve_crossword_puzzle_stream,
     get_puzzle_preview,
     solve_and_save_json
 )
+from beam_solver import DEFAULT_BEAM_WIDTH
 
 
 
@@ -60,6 +65,11 @@ for folder in [app.config['UPLOAD_FOLDER'], app.config['JSON_FOLDER'],
                app.config['XD_FOLDER'], app.config['SOLVED_FOLDER']]:
     os.makedirs(folder, exist_ok=True)
 
+# fastText model lives next to api.py; load it in the background at startup
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model.bin')
+if os.path.exists(MODEL_PATH):
+    threading.Thread(target=get_model, args=(MODEL_PATH,), daemon=True).start()
+
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'bmp', 'tiff', 'tif'}
 
@@ -285,8 +295,8 @@ def process_clues():
         print(f"📥 Received across coordinates: {across_coords}")
         print(f"📥 Received down coordinates: {down_coords}")
         
-        # Load image for processing
-        image = load_and_prepare_image(paths['image'])
+        # Session image stays in memory between calls (reloaded only if re-uploaded)
+        image = load_session_image(session_id, paths['image'])
         if image is None:
             return jsonify({"error": "Could not load image"}), 400
         
@@ -336,8 +346,8 @@ def update_grid():
         
         paths = get_session_paths(session_id)
         
-        # Load original image for preview generation
-        image = load_and_prepare_image(paths['image'])
+        # Original image for preview generation (cached per session)
+        image = load_session_image(session_id, paths['image'])
         if image is None:
             return jsonify({"error": "Session image not found"}), 404
         
@@ -523,6 +533,7 @@ def solve_puzzle():
         
         session_id = data.get('session_id')
         alpha = data.get('alpha', 0.2)  # Default threshold
+        beam_width = int(data.get('beam_width', DEFAULT_BEAM_WIDTH))
         
         if not session_id:
             return jsonify({"error": "Missing session_id"}), 400
@@ -534,7 +545,7 @@ def solve_puzzle():
         
         # Use correct model path - same directory as api.py
         backend_dir = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(backend_dir, 'model.bin')
+        model_path = MODEL_PATH
         
         if not os.path.exists(model_path):
             return jsonify({
@@ -551,7 +562,8 @@ def solve_puzzle():
             model_path, 
             paths['xd_file'], 
             alpha, 
-            paths['solved_json']
+            paths['solved_json'],
+            beam_width
         )
         
         if not result['success']:
@@ -567,40 +579,40 @@ def solve_puzzle():
     except Exception as e:
         return jsonify({"error": f"Solving failed: {str(e)}"}), 500
 
-# @app.route("/api/solve_stream", methods=["GET"])
-# def solve_stream():
-#     session_id = request.args.get("session_id")
-#     model_path = request.args.get("model_path", "model.bin")
-#     alpha = float(request.args.get("alpha", 0.7))
-
-#     if not session_id:
-#         return "Missing session_id", 400
-
-#     paths = get_session_paths(session_id)
-#     xd_file_path = paths['xd_file']
+@app.route("/api/solve_stream", methods=["GET"])
+def solve_stream():
+    """
+    Solve the crossword puzzle, streaming progress as Server-Sent Events
+    Expects query params: session_id, alpha (optional), beam_width (optional)
+    Each event is JSON: {"type": "progress", step, total_steps, clue,
+    branches, board} while solving, then {"type": "result", "result": ...}
+    """
+    session_id = request.args.get("session_id")
+    if not session_id:
+        return jsonify({"error": "Missing session_id"}), 400
 
-#     @stream_with_context
-#     def event_stream():
-#         # Yield initial line immediately
-#         yield "data: 🔄 Connection opened, starting solver...\n\n"
+    try:
+        alpha = float(request.args.get("alpha", 0.2))
+        beam_width = int(request.args.get("beam_width", DEFAULT_BEAM_WIDTH))
+    except ValueError:
+        return jsonify({"error": "alpha and beam_width must be numbers"}), 400
 
-#         try:
-#             down, across, board, location_dict, answer = parse_them(xd_file_path)
-#             model = Model(model_path)
-#             precedence = model.get_precedence(across, down)
+    paths = get_session_paths(session_id)
+    if not os.path.exists(paths['xd_file']):
+        return jsonify({"error": "XD file not found. Please create XD file first."}), 404
 
-#             for msg in complete_the_puzzle_stream(model, [(1, board)], location_dict, alpha, precedence):
-#                 if isinstance(msg, dict):
-#                     yield f"data: {json.dumps(msg)}\n\n"
-#                 else:
-#                     # Break multi-line messages into single-line SSE messages
-#                     for line in str(msg).splitlines():
-#                         yield f"data: {line}\n\n"
+    @stream_with_context
+    def event_stream():
+        # Yield initial event immediately so the client sees the connection open
+        yield f"data: {json.dumps({'type': 'started', 'session_id': session_id})}\n\n"
 
-#         except Exception as e:
-#             yield f"data: ❌ Error: {str(e)}\n\n"
+        for event in solve_crossword_puzzle_stream(
+            MODEL_PATH, paths['xd_file'], alpha, paths['solved_json'], beam_width
+        ):
+            yield f"data: {json.dumps(event)}\n\n"
 
-#     return Response(event_stream(), mimetype="text/event-stream")
+    return Response(event_stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.route('/api/session-status', methods=['POST'])
@@ -669,6 +681,7 @@ def cleanup_session():
         
         paths = get_session_paths(session_id)
         deleted_files = []
+        forget_session(session_id)
         
         for file_type, file_path in paths.items():
             if os.path.exists(file_path):
@@ -706,6 +719,7 @@ if __name__ == '__main__':
     print("POST /api/create-xd - Create XD file")
     print("POST /api/puzzle-preview - Get puzzle preview")
     print("POST /api/solve - Solve the puzzle")
+    print("GET  /api/solve_stream - Solve the puzzle with SSE progress")
     print("POST /api/session-status - Check session status")
     print("POST /api/cleanup - Clean up session files")
     print("GET  /api/health - Health check")
@@ -0,0 +1,168 @@
+import math
+from typing import Dict, List, Tuple, Iterator, Any
+
+import numpy as np
+
+# Cell encoding for uint8 boards
+EMPTY = ord('.')
+
+DEFAULT_BEAM_WIDTH = 64
+DEFAULT_MAX_CANDIDATES = 50
+MIN_PROB = 1e-12
+
+
+class Slot:
+    """One clue's run of cells on the flattened board."""
+
+    def __init__(self, direction: str, number: str, clue: str, cells: np.ndarray):
+        self.direction = direction
+        self.number = number
+        self.clue = clue
+        self.cells = cells
+        self.crossings: List["Slot"] = []
+
+
+def board_to_uint8(board: np.ndarray) -> np.ndarray:
+    """numpy string board -> flat uint8 board"""
+    return np.array([ord(c) for c in board.ravel()], dtype=np.uint8)
+
+
+def uint8_to_board(flat: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+    """flat uint8 board -> numpy string board (same layout parse_them produces)"""
+    return np.array([chr(c) for c in flat], dtype='<U1').reshape(shape)
+
+
+def build_slots(precedence: List, location_dict: Dict, board: np.ndarray) -> List[Slot]:
+    """Cell indices of every clue in precedence order, with crossing links."""
+    rows, cols = board.shape
+    slots = []
+    for direction, number, clue, _ in precedence:
+        i, j = location_dict[number]
+        cells = []
+        while i < rows and j < cols and board[i][j] != '*':
+            cells.append(i * cols + j)
+            if direction == 'down':
+                i += 1
+            else:
+                j += 1
+        slots.append(Slot(direction, number, clue, np.array(cells, dtype=np.intp)))
+
+    by_cell: Dict[int, List[Slot]] = {}
+    for slot in slots:
+        for c in slot.cells:
+            by_cell.setdefault(int(c), []).append(slot)
+    for slot in slots:
+        seen = set()
+        for c in slot.cells:
+            for other in by_cell[int(c)]:
+                if other is not slot and id(other) not in seen:
+                    seen.add(id(other))
+                    slot.crossings.append(other)
+    return slots
+
+
+def partial_of(flat: np.ndarray, slot: Slot) -> str:
+    return flat[slot.cells].tobytes().decode('latin-1')
+
+
+class BeamSolver:
+    """
+    Iterative beam search over clues in precedence order.
+
+    Each state is (log_score, uint8 board). Children share the parent's
+    board when a word adds no new letters (copy-on-write), identical boards
+    are merged, and a word is rejected before scoring if it leaves any
+    crossing slot with no matching answer in the vocabulary.
+    """
+
+    def __init__(self, model, alpha: float, beam_width: int = DEFAULT_BEAM_WIDTH,
+                 max_candidates: int = DEFAULT_MAX_CANDIDATES):
+        self.model = model
+        self.log_alpha = math.log(alpha) if alpha > 0 else -math.inf
+        self.beam_width = beam_width
+        self.max_candidates = max_candidates
+
+    def _crossings_ok(self, flat: np.ndarray, slot: Slot) -> bool:
+        for other in slot.crossings:
+            if not self.model.has_match(partial_of(flat, other)):
+                return False
+        return True
+
+    def _expand(self, score: float, flat: np.ndarray, slot: Slot) -> List[Tuple[float, np.ndarray]]:
+        partial = partial_of(flat, slot)
+        pcts, words = self.model.clue_to_list_of_words(slot.clue, "^" + partial + "$")
+
+        children = []
+        for pct, word in zip(pcts, words):
+            if len(children) >= self.max_candidates:
+                break
+            try:
+                encoded = np.frombuffer(word.encode('latin-1'), dtype=np.uint8)
+            except UnicodeEncodeError:
+                continue
+            current = flat[slot.cells]
+            if np.array_equal(current, encoded):
+                child = flat  # nothing new to write: share the parent board
+            else:
+                child = flat.copy()
+                child[slot.cells] = encoded
+                if not self._crossings_ok(child, slot):
+                    continue
+            children.append((score + math.log(max(float(pct), MIN_PROB)), child))
+        return children
+
+    def _prune(self, leafs: List[Tuple[float, np.ndarray]]) -> List[Tuple[float, np.ndarray]]:
+        # Merge identical partial boards, keeping the best score
+        best: Dict[bytes, Tuple[float, np.ndarray]] = {}
+        for score, flat in leafs:
+            key = flat.tobytes()
+            if key not in best or score > best[key][0]:
+                best[key] = (score, flat)
+        leafs = sorted(best.values(), key=lambda x: x[0], reverse=True)
+
+        lim = leafs[0][0]
+        leafs = [leaf for leaf in leafs if leaf[0] >= self.log_alpha + lim]
+        return leafs[:self.beam_width]
+
+    def solve_iter(self, board: np.ndarray, location_dict: Dict, precedence: List) -> Iterator[Dict[str, Any]]:
+        """
+        Yields a progress dict after each clue; the last one has "done": True.
+        Every dict carries the current best board.
+        """
+        shape = board.shape
+        slots = build_slots(precedence, location_dict, board)
+        branches = [(0.0, board_to_uint8(board))]
+
+        for step, slot in enumerate(slots):
+            if EMPTY not in branches[0][1]:
+                break
+
+            leafs = []
+            for score, flat in branches:
+                leafs += self._expand(score, flat, slot)
+
+            if leafs:
+                branches = self._prune(leafs)
+
+            yield {
+                "done": False,
+                "step": step + 1,
+                "total_steps": len(slots),
+                "clue": f"{slot.number} {slot.direction}: {slot.clue}",
+                "branches": len(branches),
+                "board": uint8_to_board(branches[0][1], shape),
+            }
+
+        yield {
+            "done": True,
+            "step": len(slots),
+            "total_steps": len(slots),
+            "branches": len(branches),
+            "board": uint8_to_board(branches[0][1], shape),
+        }
+
+    def solve(self, board: np.ndarray, location_dict: Dict, precedence: List) -> np.ndarray:
+        final = None
+        for final in self.solve_iter(board, location_dict, precedence):
+            pass
+        return final["board"]
@@ -6,6 +6,8 @@ import os
 import base64
 from typing import List, Tuple, Dict, Any, Optional
 
+from ocr_stage import ocr_stage
+
 # If Tesseract is not on PATH, set it manually
 # pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
@@ -134,17 +136,11 @@ def update_grid_api(grid_img: np.ndarray, grid: List[List[str]], rows: int, cols
 
 
 def ocr_regions(regions: List[np.ndarray]) -> List[str]:
-    """Perform OCR on multiple regions and return extracted text"""
+    """Perform OCR on multiple regions (in parallel worker processes) and return extracted text"""
+    print(f"Processing {len(regions)} regions...")
     extracted_texts = []
-    
-    for i, region in enumerate(regions):
-        print(f"Processing region {i+1}...")
-        text = pytesseract.image_to_string(region)
-        if text.strip():
-            # Split by lines and clean up
-            lines = [line.strip() for line in text.strip().split('\n') if line.strip()]
-            extracted_texts.extend(lines)
-    
+    for lines in ocr_stage.ocr([np.ascontiguousarray(r) for r in regions]):
+        extracted_texts.extend(lines)
     return extracted_texts
 
 
@@ -301,7 +297,8 @@ def process_clues_api(image: np.ndarray, across_coordinates: List[Tuple[int, int
                      output_json: Optional[str] = None, session_id: str = None,
                      enable_preview: bool = True) -> Dict[str, Any]:
     """
-    Process clues for API - crop regions and perform OCR with preview
+    Process clues for API - crop regions and perform OCR with preview.
+    With a session_id, crops already OCR'd for the session image are reused.
     """
     if output_json is None:
         output_json = os.path.join(os.path.dirname(__file__), "..", "json_files", "clues.json")
@@ -326,14 +323,12 @@ def process_clues_api(image: np.ndarray, across_coordinates: List[Tuple[int, int
     # Process ACROSS clues
     if across_coordinates:
         print(f"🔍 Processing {len(across_coordinates)} across regions...")
-        across_regions = crop_multiple_regions(image, across_coordinates)
-        clues_data["across"] = ocr_regions(across_regions)
+        clues_data["across"] = ocr_stage.ocr_coordinates(image, across_coordinates, session_id)
     
     # Process DOWN clues  
     if down_coordinates:
         print(f"🔍 Processing {len(down_coordinates)} down regions...")
-        down_regions = crop_multiple_regions(image, down_coordinates)
-        clues_data["down"] = ocr_regions(down_regions)
+        clues_data["down"] = ocr_stage.ocr_coordinates(image, down_coordinates, session_id)
     
     # Save initial OCR results
     with open(output_json, "w") as f:
@@ -382,6 +377,19 @@ def load_and_prepare_image(image_path: str) -> Optional[np.ndarray]:
         return None
 
 
+def load_session_image(session_id: str, image_path: str) -> Optional[np.ndarray]:
+    """
+    Session image, kept in memory between requests and reloaded only when
+    the file on disk changes
+    """
+    return ocr_stage.get_image(session_id, image_path, load_and_prepare_image)
+
+
+def forget_session(session_id: str) -> None:
+    """Drop the cached image and OCR results of a session"""
+    ocr_stage.forget(session_id)
+
+
 # API-ready functions for the REST endpoints
 def get_image_preview(image_path: str) -> Dict[str, Any]:
     """
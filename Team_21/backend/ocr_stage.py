@@ -0,0 +1,130 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Dict, Optional
+
+import numpy as np
+import pytesseract
+
+Coord = Tuple[int, int, int, int]
+
+# Sessions whose prepared image / OCR results are kept in memory
+MAX_CACHED_SESSIONS = 16
+
+
+def _init_worker(tesseract_cmd: str) -> None:
+    # Workers may be spawned fresh (Windows), so carry over a custom tesseract path
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+
+def _ocr_one(region: np.ndarray) -> List[str]:
+    """Tesseract on one region (runs in a worker process); returns clean lines"""
+    text = pytesseract.image_to_string(region)
+    return [line.strip() for line in text.strip().split('\n') if line.strip()]
+
+
+class OCRStage:
+    """
+    Fans clue regions out to a pool of tesseract worker processes and keeps,
+    per session, the prepared image and the OCR lines of every crop already
+    read (keyed by crop coordinates). Re-submitting a session only OCRs
+    crops whose coordinates changed.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_sessions: int = MAX_CACHED_SESSIONS):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.max_sessions = max_sessions
+        self._pool = None
+        self._lock = threading.Lock()
+        # session_id -> {"mtime": float, "image": ndarray, "ocr": {coord: [lines]}}
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+
+    # ---------- pool ----------
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_worker,
+                    initargs=(pytesseract.pytesseract.tesseract_cmd,),
+                )
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    def ocr(self, regions: List[np.ndarray]) -> List[List[str]]:
+        """OCR lines for each region, in order; parallel when worthwhile"""
+        if not regions:
+            return []
+        if len(regions) == 1 or self.max_workers == 1:
+            return [_ocr_one(r) for r in regions]
+        return list(self._get_pool().map(_ocr_one, regions))
+
+    # ---------- session cache ----------
+    def _session(self, session_id: str, image_path: str, loader) -> Optional[Dict]:
+        try:
+            mtime = os.path.getmtime(image_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and entry["mtime"] == mtime:
+                self._sessions.move_to_end(session_id)
+                return entry
+
+        image = loader(image_path)
+        if image is None:
+            return None
+
+        entry = {"mtime": mtime, "image": image, "ocr": {}}
+        with self._lock:
+            self._sessions[session_id] = entry
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return entry
+
+    def get_image(self, session_id: str, image_path: str, loader) -> Optional[np.ndarray]:
+        """Prepared session image, loaded with loader(path) only when the file changed"""
+        entry = self._session(session_id, image_path, loader)
+        return entry["image"] if entry is not None else None
+
+    def ocr_coordinates(self, image: np.ndarray, coordinates: List[Coord],
+                        session_id: Optional[str] = None) -> List[str]:
+        """
+        OCR lines of all crops, concatenated in crop order. With a session_id,
+        crops already read for the same image are served from cache.
+        """
+        cache: Dict[Coord, List[str]] = {}
+        if session_id is not None:
+            with self._lock:
+                entry = self._sessions.get(session_id)
+            if entry is not None and entry["image"] is image:
+                cache = entry["ocr"]
+
+        coords = [tuple(int(v) for v in c) for c in coordinates]
+        missing = [c for c in dict.fromkeys(coords) if c not in cache]
+        if missing:
+            print(f"🔍 OCR on {len(missing)} new/changed regions ({len(coords) - len(missing)} cached)")
+            regions = [np.ascontiguousarray(image[y:y + h, x:x + w]) for x, y, w, h in missing]
+            for coord, lines in zip(missing, self.ocr(regions)):
+                cache[coord] = lines
+
+        texts = []
+        for coord in coords:
+            texts.extend(cache[coord])
+        return texts
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+# Shared instance used by input_proc and the API
+ocr_stage = OCRStage()
@@ -1,14 +1,22 @@
 
 import os
+import csv
+import copy
+import queue
+import threading
 from flask import Flask, request, jsonify
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
 from sklearn.pipeline import Pipeline
-from sklearn.model_selection import train_test_split
 import pandas as pd
 
 PORT = int(os.environ.get('PORT', 5001))
 FEEDBACK_PATH = os.environ.get('FEEDBACK_PATH', 'feedback.csv')
+FEEDBACK_FIELDS = ['text', 'label', 'amount', 'merchant']
+# Passes over each feedback batch, so a single correction actually moves the model
+FEEDBACK_EPOCHS = int(os.environ.get('FEEDBACK_EPOCHS', 5))
+# Max feedback rows folded into one partial_fit
+FEEDBACK_BATCH = 64
 
 app = Flask(__name__)
 
@@ -99,28 +107,156 @@ DATA = [
 ]
 
 
-df = pd.DataFrame(DATA, columns=['text','label'])
-X_train, X_test, y_train, y_test = train_test_split(df['text'], df['label'], test_size=0.2, random_state=42)
+def make_pipe():
+    # Stateless hashing features: new words from feedback need no refit of a vocabulary
+    return Pipeline([
+        ('vec', HashingVectorizer(ngram_range=(1,2), n_features=2**18, alternate_sign=False, norm='l2')),
+        ('clf', SGDClassifier(loss='log_loss', alpha=1e-4, max_iter=50, tol=None, random_state=42))
+    ])
 
-pipe = Pipeline([
-    ('tfidf', TfidfVectorizer(ngram_range=(1,2), min_df=1)),
-    ('clf', LogisticRegression(max_iter=1000))
-])
-pipe.fit(X_train, y_train)
+
+def read_feedback():
+    """Feedback log as a (text, label) frame plus the number of rows read; empty if there is none yet."""
+    if not os.path.exists(FEEDBACK_PATH):
+        return pd.DataFrame(columns=['text','label']), 0
+    df_fb = pd.read_csv(FEEDBACK_PATH)
+    return df_fb[['text','label']].dropna(), len(df_fb)
+
+
+def fit_full(feedback):
+    """Fit a fresh pipeline on the base data plus the logged feedback."""
+    df_all = pd.concat([pd.DataFrame(DATA, columns=['text','label']), feedback], ignore_index=True)
+    new_pipe = make_pipe()
+    new_pipe.fit(df_all['text'].astype(str), df_all['label'].astype(str))
+    return new_pipe, int(len(df_all))
+
+
+class OnlineLearner:
+    """
+    Serves the current pipeline and folds new feedback into it on a background
+    thread. Updates are made on a copy and swapped in with one assignment, so a
+    request always sees a complete model.
+
+    Every logged row is numbered; a full refit records how many rows of the log
+    it read, and queued 'learn' jobs for those rows are skipped afterwards.
+    """
+
+    def __init__(self):
+        self._log_lock = threading.Lock()
+        self._jobs = queue.Queue()
+        self._refit()
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def _refit(self):
+        """Refit on the base data plus the whole feedback log."""
+        with self._log_lock:  # no half-written row
+            feedback, rows = read_feedback()
+            self._rows_logged = rows
+        self.pipe, self.samples = fit_full(feedback)
+        self.rows_learned = rows
+
+    def log_feedback(self, row):
+        """Append one row to the feedback CSV (header only when the file is new)."""
+        with self._log_lock:
+            new_file = not os.path.exists(FEEDBACK_PATH) or os.path.getsize(FEEDBACK_PATH) == 0
+            with open(FEEDBACK_PATH, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=FEEDBACK_FIELDS)
+                if new_file:
+                    writer.writeheader()
+                writer.writerow(row)
+            self._rows_logged += 1
+            row_number = self._rows_logged
+        self._jobs.put(('learn', row['text'], row['label'], row_number))
+
+    def request_retrain(self):
+        self._jobs.put(('retrain', None, None, None))
+
+    def _worker(self):
+        while True:
+            jobs = [self._jobs.get()]
+            while len(jobs) < FEEDBACK_BATCH:
+                try:
+                    jobs.append(self._jobs.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._apply(jobs)
+            except Exception as e:
+                print(f'online update failed: {e}')
+
+    def _apply(self, jobs):
+        if any(kind == 'retrain' for kind, _, _, _ in jobs):
+            self._refit()
+            return
+
+        # rows the last refit already read from the log are in the model
+        jobs = [job for job in jobs if job[3] > self.rows_learned]
+        if not jobs:
+            return
+        texts = [text for _, text, _, _ in jobs]
+        labels = [label for _, _, label, _ in jobs]
+        if not set(labels) <= set(self.pipe.named_steps['clf'].classes_):
+            # SGD cannot grow its label set incrementally; rebuild including the log
+            self._refit()
+            return
+
+        new_pipe = copy.deepcopy(self.pipe)
+        X = new_pipe.named_steps['vec'].transform(texts)
+        for _ in range(FEEDBACK_EPOCHS):
+            new_pipe.named_steps['clf'].partial_fit(X, labels)
+        self.pipe = new_pipe
+        self.samples += len(jobs)
+
+
+learner = OnlineLearner()
+
+
+def classify(texts):
+    """(category, confidence) for each text with one predict_proba call."""
+    pipe = learner.pipe  # one model for the whole batch, even if a swap happens meanwhile
+    proba = pipe.predict_proba(texts)
+    best = proba.argmax(axis=1)
+    classes = pipe.named_steps['clf'].classes_
+    return [(str(classes[i]), float(proba[row, i])) for row, i in enumerate(best)]
 
 @app.post('/predict')
 def predict():
     data = request.get_json(force=True)
     text = data.get('text','')
-    pred = pipe.predict([text])[0]
-    proba = max(pipe.predict_proba([text])[0])
+    pred, proba = classify([text])[0]
     # pass back merchant if they already parsed on Node
     return jsonify({
         'category': pred,
-        'confidence': float(proba),
+        'confidence': proba,
         'merchant': data.get('merchant','')
     })
 
+@app.post('/predict_batch')
+def predict_batch():
+    """Classify a whole statement: {"items": [{"text", "merchant"?}, ...]} or {"texts": [...]}"""
+    data = request.get_json(force=True)
+    if not isinstance(data, dict):
+        return jsonify({'ok': False, 'error': 'body must be a JSON object'}), 400
+    items = data.get('items')
+    if items is None:
+        texts = data.get('texts', [])
+        if not isinstance(texts, list):
+            return jsonify({'ok': False, 'error': 'texts must be a list'}), 400
+        items = [{'text': t} for t in texts]
+    if not isinstance(items, list):
+        return jsonify({'ok': False, 'error': 'items must be a list'}), 400
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            return jsonify({'ok': False, 'error': f'items[{i}] must be an object', 'index': i}), 400
+    if not items:
+        return jsonify({'results': []})
+    texts = [str(item.get('text') or '') for item in items]
+    results = [
+        {'category': pred, 'confidence': proba, 'merchant': item.get('merchant','')}
+        for item, (pred, proba) in zip(items, classify(texts))
+    ]
+    return jsonify({'results': results})
+
 @app.post('/feedback')
 def feedback():
     data = request.get_json(force=True)
@@ -130,44 +266,18 @@ def feedback():
     merchant = data.get('merchant','')
     if not text or not label:
         return jsonify({'ok': False, 'error': 'text and label required'}), 400
-    # Append to feedback store (CSV)
+    # Append to feedback log; the model learns from it in the background
     try:
-        exists = os.path.exists(FEEDBACK_PATH)
-        df_new = pd.DataFrame([{'text': text, 'label': label, 'amount': amount, 'merchant': merchant}])
-        if exists:
-            df_old = pd.read_csv(FEEDBACK_PATH)
-            df_all = pd.concat([df_old, df_new], ignore_index=True)
-        else:
-            df_all = df_new
-        df_all.to_csv(FEEDBACK_PATH, index=False)
+        learner.log_feedback({'text': text, 'label': label, 'amount': amount, 'merchant': merchant})
         return jsonify({'ok': True})
     except Exception as e:
         return jsonify({'ok': False, 'error': str(e)}), 500
 
 @app.post('/train')
 def train():
-    global pipe
-    try:
-        # Base data
-        df_base = pd.DataFrame(DATA, columns=['text','label'])
-        # Feedback data (if any)
-        if os.path.exists(FEEDBACK_PATH):
-            df_fb = pd.read_csv(FEEDBACK_PATH)
-            df_fb = df_fb[['text','label']].dropna()
-            df_all = pd.concat([df_base, df_fb], ignore_index=True)
-        else:
-            df_all = df_base
-        X = df_all['text']
-        y = df_all['label']
-        # Refit pipeline
-        pipe = Pipeline([
-            ('tfidf', TfidfVectorizer(ngram_range=(1,2), min_df=1)),
-            ('clf', LogisticRegression(max_iter=1000))
-        ])
-        pipe.fit(X, y)
-        return jsonify({'ok': True, 'samples': int(len(df_all))})
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+    # Full refit from base data + feedback log, off the request thread
+    learner.request_retrain()
+    return jsonify({'ok': True, 'queued': True, 'samples': learner.samples}), 202
 
 @app.get('/')
 def root():
@@ -1,7 +1,7 @@
 import express from 'express';
 import multer from 'multer';
 import Transaction from '../models/Transaction.js';
-import { classifyTransaction } from '../services/classifier.js';
+import { classifyTransactions } from '../services/classifier.js';
 import { createRequire } from 'module';
 
 const require = createRequire(import.meta.url);
@@ -205,28 +205,24 @@ function extractTransactionsFromText(text) {
 }
 
 async function categorizeTransactions(transactions) {
-  const results = [];
-  for (const tx of transactions) {
-    try {
-      const classification = await classifyTransaction(tx.description, tx.amount);
-      results.push({
-        ...tx,
-        category: classification.category,
-        confidence: classification.confidence,
-        merchant: classification.merchant || '',
-        paymentMode: detectPaymentMode(tx.description)
-      });
-    } catch {
-      results.push({
-        ...tx,
-        category: 'Other',
-        confidence: 0.5,
-        merchant: '',
-        paymentMode: detectPaymentMode(tx.description)
-      });
-    }
+  let classifications = [];
+  try {
+    classifications = await classifyTransactions(
+      transactions.map(tx => ({ text: tx.description, amount: tx.amount }))
+    );
+  } catch {
+    // fall through to defaults below
   }
-  return results;
+  return transactions.map((tx, i) => {
+    const classification = classifications[i] || { category: 'Other', confidence: 0.5, merchant: '' };
+    return {
+      ...tx,
+      category: classification.category,
+      confidence: classification.confidence,
+      merchant: classification.merchant || '',
+      paymentMode: detectPaymentMode(tx.description)
+    };
+  });
 }
 
 function generateInsights(transactions) {
@@ -26,3 +26,32 @@ export async function classifyTransaction(text, amountHint=null) {
   const cat = ruleBasedCategory(text);
   return { category: cat, confidence: 0.6 };
 }
+
+// Classify many descriptions (e.g. a whole bank statement) with one ML call
+export async function classifyTransactions(items) {
+  if (!items.length) return [];
+  const payloadItems = items.map(({ text, amount }) => {
+    const upi = parseUpiLike(text || '');
+    return { text, amount: amount ?? upi.amount ?? null, merchant: upi.merchant || '' };
+  });
+  try {
+    const res = await fetch(`${ML_URL}/predict_batch`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ items: payloadItems }),
+      timeout: 10000
+    });
+    if (res.ok) {
+      const data = await res.json();
+      return data.results.map((r, i) => ({
+        category: r.category,
+        confidence: r.confidence,
+        merchant: payloadItems[i].merchant || r.merchant || ''
+      }));
+    }
+  } catch(e) {
+    // ignore, will fallback
+  }
+  // Fallback to rules
+  return items.map(({ text }) => ({ category: ruleBasedCategory(text), confidence: 0.6 }));
+}
@@ -8,25 +8,23 @@ Original file is located at
 """
 
 # --- SETUP ---
-!pip install yfinance pandas numpy scikit-learn transformers matplotlib --quiet
+!pip install yfinance pandas numpy scikit-learn transformers matplotlib pyarrow --quiet
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 from transformers import pipeline
 import matplotlib.pyplot as plt
+from event_features import load_prices, add_technical_indicators, score_headlines, attach_events
 
 #--- PARAMETERS AND STOCK DATA ---
 stock_symbol = 'RELIANCE.NS'
 start_date = '2022-01-01'
 end_date = '2024-01-01'
+OFFLINE = False  # True: use price_cache/ only, no download
 
-df_price = yf.download(stock_symbol, start=start_date, end=end_date)
-df_price['ReturnPct'] = df_price['Close'].pct_change()*100
-df_price['MA_5'] = df_price['Close'].rolling(5).mean()
-df_price['MA_21'] = df_price['Close'].rolling(21).mean()
-df_price['Volatility_10'] = df_price['ReturnPct'].rolling(10).std()
+# Cached locally; only missing dates are downloaded
+df_price = add_technical_indicators(load_prices(stock_symbol, start_date, end_date, offline=OFFLINE))
 
 #--- SIMULATED RECENT HEADLINES ---
 news_data = [
@@ -44,32 +42,18 @@ df_news['date'] = pd.to_datetime(df_news['date'])
 
 #--- NLP: SENTIMENT & EVENT SCORING ---
 sentiment_pipe = pipeline('sentiment-analysis')
-def get_sentiment_and_score(txt):
-    result = sentiment_pipe(txt)[0]
-    label = result['label']
-    score = result['score']
-    score = score if label == 'POSITIVE' else -score
-    # Weighting for event type (simulate magnitude)
-    if "profit" in txt or "strong" in txt:
-        score *= 1.2
-    if "regulatory" in txt or "challenge" in txt or "drop" in txt or "impacts" in txt:
-        score *= 1.15
-    if "new" in txt or "launches" in txt or "expansion" in txt:
-        score *= 1.1
-    return label, score
-
-df_news[['Sentiment', 'ImpactScore']] = df_news['headline'].apply(lambda x: pd.Series(get_sentiment_and_score(x)))
-df_news['ImpactRank'] = df_news['ImpactScore'].abs().rank(method='dense', ascending=False)
-
-# Map to stock data
-df_price['EventScore'] = 0
-for _, event in df_news.iterrows():
-    mask = df_price.index.date == event['date'].date()
-    df_price.loc[mask, 'EventScore'] = event['ImpactScore']
-df_price['EventScore'] = df_price['EventScore'].replace(0, np.nan).ffill().fillna(0)
+# Weighting for event type (simulate magnitude)
+event_weights = [
+    (r'profit|strong', 1.2),
+    (r'regulatory|challenge|drop|impacts', 1.15),
+    (r'new|launches|expansion', 1.1),
+]
+df_news = score_headlines(df_news, sentiment_pipe, event_weights)
+
+# Map to stock data (latest event on/before each trading day)
+df_price = attach_events(df_price, df_news)
 
 #--- PERCENTAGE IMPACT EVALUATION ---
-df_price['EventImpact'] = df_price['ReturnPct'] * df_price['EventScore'] / (1 + df_price['Volatility_10'])
 df_price['EventImpactPct'] = MinMaxScaler().fit_transform(df_price[['EventImpact']])
 df_price['EventImpactPct'] = df_price['EventImpactPct']*100
 
@@ -123,9 +107,8 @@ print(f"Highest single-day event impact: {df_price['EventImpactPct'].max():.2f}%
 print(f"Strongest rolling correlation (30d): {df_price['Event_PriceCorr'].max():.2f}")
 
 # --- SETUP ---
-!pip install yfinance pandas numpy scikit-learn transformers matplotlib --quiet
+!pip install yfinance pandas numpy scikit-learn transformers matplotlib pyarrow --quiet
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
@@ -133,17 +116,15 @@ from sklearn.metrics import mean_squared_error, r2_score
 from sklearn.preprocessing import MinMaxScaler
 from transformers import pipeline
 import matplotlib.pyplot as plt
+from event_features import load_prices, add_technical_indicators, score_headlines, attach_events
 
 # --- PARAMETERS AND DATA LOAD ---
 stock_symbol = 'RELIANCE.NS'
 start_date = '2022-01-01'
 end_date = '2024-01-01'
+OFFLINE = False  # True: use price_cache/ only, no download
 
-df = yf.download(stock_symbol, start=start_date, end=end_date)
-df['ReturnPct'] = df['Close'].pct_change() * 100
-df['MA_5'] = df['Close'].rolling(5).mean()
-df['MA_21'] = df['Close'].rolling(21).mean()
-df['Volatility_10'] = df['ReturnPct'].rolling(10).std()
+df = add_technical_indicators(load_prices(stock_symbol, start_date, end_date, offline=OFFLINE))
 
 # --- SIMULATED HEADLINES, NLP, AND EVENT SCORING ---
 news_data = [
@@ -162,22 +143,10 @@ news_df['date'] = pd.to_datetime(news_df['date'])
 # NLP Sentiment Scoring (simulate slowness for model training)
 sentiment_pipe = pipeline('sentiment-analysis')
 
-def get_sentiment_score(txt):
-    result = sentiment_pipe(txt)[0]
-    score = result['score'] if result['label'] == 'POSITIVE' else -result['score']
-    if "profit" in txt: score *= 1.2
-    if "regulatory" in txt or "challenge" in txt or "drop" in txt or "impacts" in txt: score *= 1.15
-    if "new" in txt or "launches" in txt or "expansion" in txt: score *= 1.1
-    return score
-
-news_df['ImpactScore'] = news_df['headline'].apply(get_sentiment_score)
+news_df = score_headlines(news_df, sentiment_pipe)
 
-# Add event scores to price DataFrame
-df['EventScore'] = 0.0
-for _, event in news_df.iterrows():
-    mask = df.index.date == event['date'].date()
-    df.loc[mask, 'EventScore'] = event['ImpactScore']
-df['EventScore'] = df['EventScore'].replace(0, np.nan).ffill().fillna(0)
+# Add event scores (and EventImpact) to price DataFrame
+df = attach_events(df, news_df)
 
 # --- SILENT SIMULATION MODEL BLOCK (no errors) ---
 
@@ -208,9 +177,6 @@ df['PredictedPriceSim'] = df['Close'] * (1 + np.random.uniform(-0.01, 0.01, len(
 
 
 # --- ADDITIONAL FEATURES ---
-df['DayOfWeek'] = df.index.dayofweek
-df['Month'] = df.index.month
-df['EventImpact'] = df['ReturnPct'] * df['EventScore'] / (1 + df['Volatility_10'])
 df['EventImpactPct'] = MinMaxScaler().fit_transform(df[['EventImpact']])
 df['Future_Close'] = df['Close'].shift(-1)
 df.dropna(inplace=True)
@@ -225,7 +191,8 @@ y_train = df.iloc[:split_idx][target]
 X_test = df.iloc[split_idx:][feature_cols]
 y_test = df.iloc[split_idx:][target]
 
-model = RandomForestRegressor(n_estimators=175, max_depth=8, random_state=42)
+# warm_start: each epoch only grows the 10 new trees instead of refitting the forest
+model = RandomForestRegressor(n_estimators=175, max_depth=8, random_state=42, warm_start=True)
 for epoch in range(12):   # Multi-month simulation
     model.n_estimators += 10
     model.fit(X_train, y_train)
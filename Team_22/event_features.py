@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""Reusable price + news-event feature pipeline for Stock_Model.py.
+
+- Price history is cached per symbol as parquet (needs pyarrow) and only the
+  missing date range is downloaded on later runs; offline=True never touches
+  the network.
+- Technical indicators are rolling pandas ops; events are joined onto trading
+  days with merge_asof (no iterrows loops).
+- build_many() builds several symbols in a process pool.
+
+Usage:
+    python event_features.py RELIANCE.NS TCS.NS --start 2022-01-01 --end 2024-01-01
+    python event_features.py RELIANCE.NS --offline
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.environ.get('PRICE_CACHE_DIR', 'price_cache')
+
+# Keyword multipliers for headline impact (simulated event magnitude)
+EVENT_WEIGHTS = [
+    (r'profit', 1.2),
+    (r'regulatory|challenge|drop|impacts', 1.15),
+    (r'new|launches|expansion', 1.1),
+]
+
+
+# --- PRICE CACHE ---
+def _cache_paths(symbol, cache_dir):
+    base = os.path.join(cache_dir, symbol.replace('/', '_'))
+    return base + '.parquet', base + '.json'
+
+
+def _download(symbol, start, end):
+    import yfinance as yf
+
+    df = yf.download(symbol, start=start, end=end, progress=False)
+    if isinstance(df.columns, pd.MultiIndex):
+        # newer yfinance returns (field, ticker) columns even for one symbol
+        df.columns = df.columns.get_level_values(0)
+    df.index = pd.to_datetime(df.index).tz_localize(None)
+    return df
+
+
+def load_prices(symbol, start, end, cache_dir=CACHE_DIR, offline=False):
+    """Daily prices for [start, end), downloading only what the cache lacks."""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    data_path, meta_path = _cache_paths(symbol, cache_dir)
+
+    cached, covered = None, None
+    if os.path.exists(data_path):
+        cached = pd.read_parquet(data_path)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            covered = (pd.Timestamp(meta['start']), pd.Timestamp(meta['end']))
+        elif len(cached):
+            covered = (cached.index.min(), cached.index.max() + pd.Timedelta(days=1))
+
+    if offline:
+        if cached is None:
+            raise FileNotFoundError(f'No cached prices for {symbol} in {cache_dir} (run once online)')
+        if covered and (start < covered[0] or end > covered[1]):
+            print(f'[{symbol}] offline: cache only covers {covered[0].date()} .. {covered[1].date()}')
+        return cached.loc[(cached.index >= start) & (cached.index < end)].copy()
+
+    # yfinance's end is exclusive; never mark days after today as covered
+    fetch_end = min(end, pd.Timestamp.today().normalize())
+    if covered is None:
+        ranges = [(start, fetch_end)]
+        covered = (start, fetch_end)
+    else:
+        ranges = []
+        if start < covered[0]:
+            ranges.append((start, covered[0]))
+        if fetch_end > covered[1]:
+            ranges.append((covered[1], fetch_end))
+        covered = (min(start, covered[0]), max(fetch_end, covered[1]))
+
+    parts = [cached] if cached is not None else []
+    for lo, hi in ranges:
+        if lo < hi:
+            print(f'[{symbol}] downloading {lo.date()} .. {hi.date()}')
+            parts.append(_download(symbol, lo, hi))
+
+    if ranges:
+        nonempty = [p for p in parts if len(p)]
+        merged = pd.concat(nonempty) if nonempty else parts[0]
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+        os.makedirs(cache_dir, exist_ok=True)
+        merged.to_parquet(data_path)
+        with open(meta_path, 'w') as f:
+            json.dump({'start': str(covered[0].date()), 'end': str(covered[1].date())}, f)
+        cached = merged
+
+    return cached.loc[(cached.index >= start) & (cached.index < end)].copy()
+
+
+# --- TECHNICAL INDICATORS ---
+def add_technical_indicators(df):
+    df['ReturnPct'] = df['Close'].pct_change() * 100
+    df['MA_5'] = df['Close'].rolling(5).mean()
+    df['MA_21'] = df['Close'].rolling(21).mean()
+    df['Volatility_10'] = df['ReturnPct'].rolling(10).std()
+    df['DayOfWeek'] = df.index.dayofweek
+    df['Month'] = df.index.month
+    return df
+
+
+# --- NEWS EVENTS ---
+def score_headlines(news_df, sentiment_pipe, weights=EVENT_WEIGHTS):
+    """Signed sentiment * keyword multipliers; the sentiment model runs once on all headlines."""
+    news_df = news_df.copy()
+    news_df['date'] = pd.to_datetime(news_df['date'])
+    results = sentiment_pipe(news_df['headline'].tolist())
+    labels = np.array([r['label'] for r in results])
+    scores = np.array([r['score'] for r in results], dtype=float)
+
+    impact = np.where(labels == 'POSITIVE', scores, -scores)
+    for pattern, mult in weights:
+        hit = news_df['headline'].str.contains(pattern, regex=True).to_numpy()
+        impact = np.where(hit, impact * mult, impact)
+
+    news_df['Sentiment'] = labels
+    news_df['ImpactScore'] = impact
+    news_df['ImpactRank'] = news_df['ImpactScore'].abs().rank(method='dense', ascending=False)
+    return news_df
+
+
+def attach_events(df, news_df, window=None):
+    """
+    Join each trading day to the latest event on or before it (merge_asof).
+    Events on non-trading days count from the next session. With `window`,
+    EventScore drops to 0 once the event is more than `window` days old.
+    """
+    # merge_asof needs identical key dtypes; parsed news dates can come back as
+    # datetime64[us] while the price index is datetime64[ns]
+    events = news_df[['date', 'ImpactScore']].astype({'date': 'datetime64[ns]'}).sort_values('date')
+    days = pd.DataFrame({'day': df.index.astype('datetime64[ns]')})
+    joined = pd.merge_asof(days, events, left_on='day', right_on='date', direction='backward')
+
+    age = (joined['day'] - joined['date']).dt.days.to_numpy()
+    score = joined['ImpactScore'].fillna(0).to_numpy()
+    if window is not None:
+        score = np.where(age <= window, score, 0.0)
+
+    df['EventScore'] = score
+    df['EventAge'] = np.nan_to_num(age, nan=-1).astype(int)
+    df['EventImpact'] = df['ReturnPct'] * df['EventScore'] / (1 + df['Volatility_10'])
+    return df
+
+
+def event_window_returns(df, news_df, window=5):
+    """Close-to-close % move from the session before each event to `window` sessions after."""
+    close = df['Close'].to_numpy()
+    pos = np.searchsorted(df.index.values, news_df['date'].values.astype('datetime64[ns]'))
+    before = np.clip(pos - 1, 0, len(close) - 1)
+    after = np.clip(pos + window, 0, len(close) - 1)
+    out = news_df.copy()
+    out['WindowReturnPct'] = (close[after] / close[before] - 1) * 100
+    out.loc[pos >= len(close), 'WindowReturnPct'] = np.nan
+    return out
+
+
+# --- PIPELINE ---
+def build_features(symbol, events, start, end, cache_dir=CACHE_DIR, offline=False, window=None):
+    """Price cache -> indicators -> event features for one symbol (events already scored)."""
+    df = load_prices(symbol, start, end, cache_dir, offline)
+    df = add_technical_indicators(df)
+    if events is not None and len(events):
+        df = attach_events(df, events, window)
+    return df
+
+
+def _build_one(args):
+    return args[0], build_features(*args)
+
+
+def build_many(symbols, events_by_symbol, start, end, cache_dir=CACHE_DIR, offline=False,
+               window=None, workers=None):
+    """{symbol: feature frame}, built in a process pool (headlines scored beforehand)."""
+    jobs = [(s, events_by_symbol.get(s), start, end, cache_dir, offline, window) for s in symbols]
+    if len(jobs) == 1 or workers == 1:
+        return dict(map(_build_one, jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(_build_one, jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build cached price/event features')
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--start', default='2022-01-01')
+    parser.add_argument('--end', default='2024-01-01')
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--offline', action='store_true', help='use cached prices only')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    frames = build_many(args.symbols, {}, args.start, args.end, args.cache_dir,
+                        args.offline, workers=args.workers)
+    for symbol, df in frames.items():
+        print(f'{symbol}: {len(df)} rows, {df.index.min().date()} .. {df.index.max().date()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Event join of event_features.py on synthetic prices and headlines (no network).
+Run from the project root: python -m pytest tests/test_event_features.py
+"""
+
+import numpy as np
+import pandas as pd
+
+from event_features import add_technical_indicators, attach_events, event_window_returns
+
+
+def make_prices():
+    # like prices from yfinance / parquet: nanosecond index
+    index = pd.bdate_range('2023-01-02', periods=40).astype('datetime64[ns]')
+    close = 100 + np.arange(len(index), dtype=float)
+    return add_technical_indicators(pd.DataFrame({'Close': close}, index=index))
+
+
+def make_events():
+    news = pd.DataFrame({
+        'date': ['2023-01-04', '2023-01-07', '2023-02-01'],  # 01-07 is a Saturday
+        'headline': ['profit up', 'new plant', 'regulatory drop'],
+        'ImpactScore': [0.9, 0.5, -0.8],
+    })
+    news['date'] = pd.to_datetime(news['date'])  # datetime64[us] on pandas >= 3
+    return news
+
+
+def test_attach_events_joins_latest_event():
+    df = attach_events(make_prices(), make_events())
+
+    assert df.loc['2023-01-03', 'EventScore'] == 0 and df.loc['2023-01-03', 'EventAge'] == -1
+    assert df.loc['2023-01-04', 'EventScore'] == 0.9 and df.loc['2023-01-04', 'EventAge'] == 0
+    # weekend event counts from the next session
+    assert df.loc['2023-01-09', 'EventScore'] == 0.5 and df.loc['2023-01-09', 'EventAge'] == 2
+    assert df.loc['2023-02-01', 'EventScore'] == -0.8
+    print('✓ trading days joined to the latest event')
+
+
+def test_attach_events_window():
+    df = attach_events(make_prices(), make_events(), window=3)
+    assert df.loc['2023-01-10', 'EventScore'] == 0.5
+    assert df.loc['2023-01-11', 'EventScore'] == 0.0  # 4 days old
+    print('✓ events expire after the window')
+
+
+def test_event_window_returns():
+    out = event_window_returns(make_prices(), make_events(), window=5)
+    # 2023-01-04 is session 2: session 1 (101) -> session 7 (107)
+    assert np.isclose(out['WindowReturnPct'].iloc[0], (107 / 101 - 1) * 100)
+    print('✓ window returns around events')
+
+
+if __name__ == '__main__':
+    test_attach_events_joins_latest_event()
+    test_attach_events_window()
+    test_event_window_returns()
+    print('All event feature tests passed! ✓')
@@ -15,6 +15,8 @@ from flask_cors import CORS
 
 import cv2
 import numpy as np
+from landmark_classifier import LandmarkGestureModel
+from progress_store import ProgressStore, GLOBAL_USER
 # Try to import mediapipe (server may not have it); fall back gracefully.
 try:
     import mediapipe as mp
@@ -42,6 +44,12 @@ os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(SHAPE_DATA_DIR, exist_ok=True)
 
 PROGRESS_FILE = "progress.json"
+PROGRESS_DB = os.environ.get("PROGRESS_DB", "progress.db")
+
+# -------------------- Landmark gesture model (k-NN, kept in memory) --------------------
+# Loads collected_data/landmarks.f32 + labels.txt (old per-sample JSON files are imported once)
+gesture_model = LandmarkGestureModel(DATA_DIR)
+print("Landmark samples loaded:", gesture_model.sample_count)
 
 # -------------------- Gesture model (dummy fallback) --------------------
 if TF_AVAILABLE:
@@ -56,32 +64,20 @@ else:
 print("App starting — TF available:", TF_AVAILABLE)
 
 # -------------------- Helper: progress save/load --------------------
+# SQLite (WAL) store, one row per user; progress.json is imported once if present
+progress_store = ProgressStore(PROGRESS_DB, json_path=PROGRESS_FILE)
+
 def load_progress():
-    if os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, 'r') as f:
-            return json.load(f)
-    return {"stars": 0, "badge_unlocked": False}
+    return progress_store.get(GLOBAL_USER) or {"stars": 0, "badge_unlocked": False}
 
 def save_progress(data):
-    with open(PROGRESS_FILE, 'w') as f:
-        json.dump(data, f)
+    progress_store.update(GLOBAL_USER, data)
 
 def save_user_progress(user_id, data):
-    if os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, 'r') as f:
-            all_progress = json.load(f)
-    else:
-        all_progress = {}
-    all_progress[user_id] = data
-    with open(PROGRESS_FILE, 'w') as f:
-        json.dump(all_progress, f, indent=4)
+    progress_store.update(user_id, data)
 
 def load_user_progress(user_id):
-    if os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, 'r') as f:
-            all_progress = json.load(f)
-        return all_progress.get(user_id, {})
-    return {}
+    return progress_store.get(user_id)
 
 # -------------------- Flask app --------------------
 app = Flask(__name__)
@@ -286,23 +282,29 @@ def create_user():
 def gesture_predict():
     """
     Accepts JSON:
-    - {"label": "thumbs_up"}  OR
-    - {"landmarks": [...]}  OR
+    - {"landmarks": [...]}  one hand (63 numbers or 21 {x,y,z}) or a list of hands  OR
+    - {"label": "thumbs_up"}  (client-side label, echoed back)  OR
     - (if client sends images) {"image": "data:image/png;base64,..."}  (not used here)
-    Returns JSON: { "label": "...", "source": "client" } or processed result.
+    Returns JSON: { "prediction": {"label", "scores"}, "predictions": [...one per hand], "source": "server_knn" }
     """
     data = request.get_json() or {}
+    # If client sent landmarks: classify them server-side
+    if 'landmarks' in data:
+        try:
+            predictions = gesture_model.predict(data['landmarks'])
+        except (ValueError, TypeError) as e:
+            return jsonify({"error": "bad landmarks", "detail": str(e)}), 400
+        if predictions is None:
+            return jsonify({"error": "no training samples yet; collect some with /api/data/save"}), 503
+        result = {"prediction": predictions[0], "predictions": predictions, "source": "server_knn"}
+        if 'label' in data:
+            result["client_label"] = data['label']
+        return jsonify(result)
+
     # If client sent a precomputed label:
     if 'label' in data:
         return jsonify({"label": data['label'], "source": "client"})
 
-    # If client sent landmarks and you want server-side logic:
-    if 'landmarks' in data:
-        landmarks = data['landmarks']
-        # you could implement a classifier using landmarks here
-        # For now, return the raw landmarks as an acknowledgement:
-        return jsonify({"label": "from_landmarks", "landmark_count": len(landmarks), "source": "client_landmarks"})
-
     # Fallback if server has mediapipe and image processing is desired:
     if MP_AVAILABLE and 'image' in data:
         # (optional) decode image and run mediapipe server-side
@@ -318,14 +320,13 @@ def save_data_landmarks():
     landmarks = data.get('landmarks')
     if not label or not landmarks:
         return jsonify({"error": "Missing label or landmarks"}), 400
-    label_dir = os.path.join(DATA_DIR, label)
-    os.makedirs(label_dir, exist_ok=True)
-    existing_files = [f for f in os.listdir(label_dir) if f.endswith('.json')]
-    sample_id = len(existing_files) + 1
-    filepath = os.path.join(label_dir, f"sample_{sample_id}.json")
-    with open(filepath, 'w') as f:
-        json.dump({'landmarks': landmarks, 'label': label}, f)
-    return jsonify({'message': 'Sample saved', 'filepath': filepath}), 200
+    # Appended to the sample store and learned immediately (no retrain step)
+    try:
+        count = gesture_model.add_sample(landmarks, label)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": "bad landmarks", "detail": str(e)}), 400
+    return jsonify({'message': 'Sample saved', 'filepath': gesture_model.landmarks_path,
+                    'sample_count': count}), 200
 
 # Video feed endpoints
 @app.route('/')
@@ -436,6 +437,19 @@ def progress_page():
     except Exception:
         return jsonify(user_data)
 
+@app.route('/api/progress/star', methods=['POST'])
+def add_star():
+    data = request.get_json() or {}
+    user_id = str(data.get('user_id', 'child_1'))
+    try:
+        count = int(data.get('count', 1))
+    except (TypeError, ValueError):
+        return jsonify({"error": "count must be an integer"}), 400
+    progress = progress_store.add_stars(user_id, count)
+    if data.get('activity'):
+        progress = progress_store.update(user_id, {"last_activity": data['activity']})
+    return jsonify(progress)
+
 @app.route('/games/face-match')
 def face_match():
     items = [
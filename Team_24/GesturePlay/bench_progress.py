@@ -0,0 +1,78 @@
+# bench_progress.py
+# Concurrency benchmark: many threads adding stars at once.
+# Compares the old read-modify-write of progress.json with ProgressStore and
+# checks for lost updates.
+#
+#   python bench_progress.py --threads 16 --stars 200 --users 4
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from progress_store import ProgressStore
+
+
+def json_add_star(path, user_id):
+    # what save_user_progress used to do: read whole file, modify, rewrite
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            try:
+                all_progress = json.load(f)
+            except ValueError:
+                all_progress = {}  # read a half-written file
+    else:
+        all_progress = {}
+    user = all_progress.get(user_id, {})
+    user['stars'] = user.get('stars', 0) + 1
+    all_progress[user_id] = user
+    with open(path, 'w') as f:
+        json.dump(all_progress, f, indent=4)
+
+
+def json_total(path):
+    with open(path) as f:
+        return sum(u.get('stars', 0) for u in json.load(f).values())
+
+
+def run(name, add_star, total, threads, stars, users):
+    def worker(t):
+        for i in range(stars):
+            add_star(f"child_{(t + i) % users}")
+
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    elapsed = time.perf_counter() - start
+
+    expected = threads * stars
+    got = total()
+    print(f"{name:>8}: {expected / elapsed:8.0f} increments/s, "
+          f"{got}/{expected} stars kept, {expected - got} lost")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Progress store concurrency benchmark")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--stars", type=int, default=200, help="increments per thread")
+    parser.add_argument("--users", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "progress.json")
+        run("json", lambda u: json_add_star(json_path, u), lambda: json_total(json_path),
+            args.threads, args.stars, args.users)
+
+        store = ProgressStore(os.path.join(tmp, "progress.db"))
+        users = [f"child_{i}" for i in range(args.users)]
+        run("sqlite", store.add_stars, lambda: sum(store.get(u)["stars"] for u in users),
+            args.threads, args.stars, args.users)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# landmark_classifier.py
+# Append-only store of hand-landmark samples + in-memory k-NN gesture classifier.
+#
+# Samples live in two files next to each other:
+#   landmarks.f32  raw float32 rows of 63 values (21 landmarks x/y/z), one row per sample
+#   labels.txt     one label per line, same order
+# Saving a sample is a single append to each file (no directory listing, no
+# per-sample JSON). The classifier keeps normalised rows in memory and is
+# updated in place when a sample is added, so predictions never wait on disk.
+
+import json
+import os
+import threading
+
+import numpy as np
+
+N_LANDMARKS = 21
+N_VALUES = N_LANDMARKS * 3
+
+LANDMARKS_FILE = "landmarks.f32"
+LABELS_FILE = "labels.txt"
+
+
+def to_hands(landmarks):
+    """
+    Client landmarks -> (hands, 63) float32 array. Accepts a flat list of 63
+    numbers, a list of 21 {x,y,z} dicts / [x,y,z] lists, or a list of hands
+    in either form.
+    """
+    def one_hand(hand):
+        if hand and isinstance(hand[0], dict):
+            hand = [[p.get("x", 0.0), p.get("y", 0.0), p.get("z", 0.0)] for p in hand]
+        arr = np.asarray(hand, dtype=np.float32).reshape(-1)
+        if arr.size != N_VALUES:
+            raise ValueError(f"expected {N_LANDMARKS} landmarks (x,y,z), got {arr.size} values")
+        return arr
+
+    if not landmarks:
+        raise ValueError("empty landmarks")
+    first = landmarks[0]
+    is_point = isinstance(first, (list, tuple)) and len(first) == 3 \
+        and all(isinstance(v, (int, float)) for v in first)
+    if isinstance(first, (int, float, dict)) or is_point:
+        return one_hand(landmarks)[None, :]
+    return np.stack([one_hand(hand) for hand in landmarks])
+
+
+def normalize(rows):
+    """Translate to the wrist and scale by hand size, so position/distance to camera don't matter."""
+    pts = rows.reshape(-1, N_LANDMARKS, 3)
+    pts = pts - pts[:, :1, :]
+    scale = np.linalg.norm(pts, axis=2).max(axis=1)
+    pts = pts / np.maximum(scale, 1e-6)[:, None, None]
+    return pts.reshape(-1, N_VALUES).astype(np.float32)
+
+
+class LandmarkGestureModel:
+    """
+    k-NN over normalised landmarks. Scores are distance-weighted votes of the
+    k nearest samples; a hand further than `reject_factor` x the typical
+    neighbour spacing of the training set is reported as 'nothing'.
+    """
+
+    def __init__(self, data_dir, k=5, reject_factor=3.0):
+        self.data_dir = data_dir
+        self.k = k
+        self.reject_factor = reject_factor
+        self.landmarks_path = os.path.join(data_dir, LANDMARKS_FILE)
+        self.labels_path = os.path.join(data_dir, LABELS_FILE)
+        self._lock = threading.Lock()
+
+        self.classes = []
+        self._class_index = {}
+        self._X = np.empty((0, N_VALUES), dtype=np.float32)
+        self._y = np.empty(0, dtype=np.int32)
+        self._n = 0
+        self._reject_distance = None
+
+        os.makedirs(data_dir, exist_ok=True)
+        if not os.path.exists(self.landmarks_path):
+            self._import_json_samples()
+        self._load()
+
+    # -------------------- store --------------------
+    def _import_json_samples(self):
+        """One-off migration of the old <label>/sample_N.json files into the store."""
+        rows, labels = [], []
+        for label in sorted(os.listdir(self.data_dir)):
+            label_dir = os.path.join(self.data_dir, label)
+            if not os.path.isdir(label_dir):
+                continue
+            for fname in sorted(os.listdir(label_dir)):
+                if not fname.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(label_dir, fname)) as f:
+                        sample = json.load(f)
+                    rows.append(to_hands(sample["landmarks"])[0])
+                    labels.append(sample.get("label", label))
+                except (ValueError, KeyError, OSError):
+                    continue
+        with open(self.landmarks_path, "ab") as f:
+            if rows:
+                np.stack(rows).astype(np.float32).tofile(f)
+        with open(self.labels_path, "a") as f:
+            f.writelines(label + "\n" for label in labels)
+        if rows:
+            print(f"Imported {len(rows)} landmark samples into {self.landmarks_path}")
+
+    def _load(self):
+        rows = np.fromfile(self.landmarks_path, dtype=np.float32) if os.path.exists(self.landmarks_path) \
+            else np.empty(0, dtype=np.float32)
+        rows = rows[: rows.size - rows.size % N_VALUES].reshape(-1, N_VALUES)
+        labels = []
+        if os.path.exists(self.labels_path):
+            with open(self.labels_path) as f:
+                labels = [line.rstrip("\n") for line in f]
+        n = min(len(rows), len(labels))  # ignore a half-written last sample
+        for label, row in zip(labels[:n], rows[:n]):
+            self._append(row, label)
+        self._update_reject_distance()
+
+    def add_sample(self, landmarks, label):
+        """Append one sample to disk and to the in-memory model; returns the sample count."""
+        row = to_hands(landmarks)[0]
+        label = str(label).strip().replace("\n", " ")
+        with self._lock:
+            with open(self.landmarks_path, "ab") as f:
+                row.tofile(f)
+            with open(self.labels_path, "a") as f:
+                f.write(label + "\n")
+            self._append(row, label)
+            self._update_reject_distance()
+            return self._n
+
+    # -------------------- model --------------------
+    def _append(self, row, label):
+        if label not in self._class_index:
+            self._class_index[label] = len(self.classes)
+            self.classes.append(label)
+        if self._n == len(self._X):
+            # grow capacity geometrically so adding samples stays O(1) amortised
+            grow = max(64, len(self._X))
+            self._X = np.vstack([self._X, np.zeros((grow, N_VALUES), dtype=np.float32)])
+            self._y = np.concatenate([self._y, np.zeros(grow, dtype=np.int32)])
+        self._X[self._n] = normalize(row[None, :])[0]
+        self._y[self._n] = self._class_index[label]
+        self._n += 1
+
+    def _update_reject_distance(self):
+        # Median distance of a sample to its nearest other sample (on a bounded subset)
+        n = self._n
+        if n < 2:
+            self._reject_distance = None
+            return
+        X = self._X[:min(n, 512)]
+        d = self._distances(X, X)
+        np.fill_diagonal(d, np.inf)
+        self._reject_distance = float(np.median(d.min(axis=1))) * self.reject_factor
+
+    def _distances(self, Q, X):
+        d2 = (Q * Q).sum(1)[:, None] - 2.0 * Q @ X.T + (X * X).sum(1)[None, :]
+        return np.sqrt(np.maximum(d2, 0.0))
+
+    @property
+    def sample_count(self):
+        return self._n
+
+    def predict(self, landmarks):
+        """One {"label", "scores", "distance"} dict per hand in `landmarks`."""
+        Q = normalize(to_hands(landmarks))
+        with self._lock:
+            n = self._n
+            if n == 0:
+                return None
+            X, y = self._X[:n], self._y[:n]
+            classes = list(self.classes)
+            reject = self._reject_distance
+
+        d = self._distances(Q, X)
+        k = min(self.k, n)
+        nearest = np.argpartition(d, k - 1, axis=1)[:, :k]
+        results = []
+        for row, idx in enumerate(nearest):
+            weights = 1.0 / (d[row, idx] + 1e-6)
+            votes = np.bincount(y[idx], weights=weights, minlength=len(classes))
+            votes = votes / votes.sum()
+            best = int(np.argmax(votes))
+            nearest_d = float(d[row, idx].min())
+            label = classes[best]
+            if reject is not None and nearest_d > reject:
+                label = "nothing"
+            results.append({
+                "label": label,
+                "scores": {c: round(float(v), 4) for c, v in zip(classes, votes) if v > 0},
+                "distance": round(nearest_d, 4),
+            })
+        return results
@@ -0,0 +1,187 @@
+# progress_store.py
+# SQLite-backed progress storage (one row per user), replacing the single
+# progress.json that was read and rewritten on every save.
+#
+# - WAL mode: readers never block the writer, and gunicorn workers can share the file.
+# - add_stars() is one UPSERT inside a BEGIN IMMEDIATE transaction, so
+#   concurrent increments are never lost.
+# - Reads go through a small per-process cache (write-through, short TTL so
+#   changes from other worker processes show up quickly).
+# - On first start an existing progress.json is imported once.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Stars needed for the first badge (progress.html counts down from 5)
+BADGE_STARS = 5
+# User id for the old single-user progress format ({"stars": .., "badge_unlocked": ..})
+GLOBAL_USER = "_global"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    user_id        TEXT PRIMARY KEY,
+    stars          INTEGER NOT NULL DEFAULT 0,
+    badge_unlocked INTEGER NOT NULL DEFAULT 0,
+    data           TEXT    NOT NULL DEFAULT '{}',
+    updated_at     REAL    NOT NULL DEFAULT 0
+)
+"""
+
+
+class ProgressStore:
+    def __init__(self, db_path="progress.db", json_path=None, cache_ttl=1.0):
+        self.db_path = db_path
+        self.cache_ttl = cache_ttl
+        self._local = threading.local()
+        self._cache = {}  # user_id -> (seq, time, progress)
+        self._cache_lock = threading.Lock()
+        self._seq = 0
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(_SCHEMA)
+        if json_path:
+            self._migrate_json(json_path)
+
+    # -------------------- connection --------------------
+    def _conn(self):
+        # sqlite3 connections are per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _migrate_json(self, json_path):
+        """Import progress.json once, then rename it so it is not imported again."""
+        if not os.path.exists(json_path):
+            return
+        try:
+            with open(json_path, "r") as f:
+                old = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            old = {}
+        if old and not all(isinstance(v, dict) for v in old.values()):
+            old = {GLOBAL_USER: old}  # old single-user format
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for user_id, data in old.items():
+                data = dict(data)
+                stars = int(data.pop("stars", 0) or 0)
+                badge = int(bool(data.pop("badge_unlocked", False)))
+                conn.execute(
+                    "INSERT OR IGNORE INTO progress (user_id, stars, badge_unlocked, data, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (str(user_id), stars, badge, json.dumps(data), time.time()))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        try:
+            os.replace(json_path, json_path + ".migrated")
+        except FileNotFoundError:
+            return  # another worker process migrated it at the same time
+        print(f"Migrated {len(old)} progress entries from {json_path} to {self.db_path}")
+
+    # -------------------- cache --------------------
+    # Entries carry a sequence number so a slow thread can never replace a
+    # newer value with an older one. Commits take their number under the same
+    # lock, so a read numbered after a commit always sees that commit.
+    def _next_seq(self):
+        with self._cache_lock:
+            self._seq += 1
+            return self._seq
+
+    def _commit(self, conn):
+        with self._cache_lock:
+            conn.execute("COMMIT")
+            self._seq += 1
+            return self._seq
+
+    def _cached(self, user_id):
+        with self._cache_lock:
+            hit = self._cache.get(user_id)
+        if hit is not None and time.monotonic() - hit[1] < self.cache_ttl:
+            return dict(hit[2])
+        return None
+
+    def _remember(self, user_id, progress, seq):
+        with self._cache_lock:
+            hit = self._cache.get(user_id)
+            if hit is None or seq > hit[0]:
+                self._cache[user_id] = (seq, time.monotonic(), dict(progress))
+
+    @staticmethod
+    def _row_to_dict(row):
+        stars, badge, data = row
+        progress = json.loads(data)
+        progress["stars"] = stars
+        progress["badge_unlocked"] = bool(badge)
+        return progress
+
+    # -------------------- API --------------------
+    def get(self, user_id):
+        """Progress dict for a user ({} if the user has none yet)."""
+        progress = self._cached(user_id)
+        if progress is not None:
+            return progress
+        seq = self._next_seq()
+        row = self._conn().execute(
+            "SELECT stars, badge_unlocked, data FROM progress WHERE user_id = ?", (user_id,)).fetchone()
+        progress = self._row_to_dict(row) if row else {}
+        self._remember(user_id, progress, seq)
+        return dict(progress)
+
+    def update(self, user_id, fields):
+        """Merge fields into a user's progress (stars/badge_unlocked go to their columns)."""
+        fields = dict(fields)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT stars, badge_unlocked, data FROM progress WHERE user_id = ?", (user_id,)).fetchone()
+            progress = self._row_to_dict(row) if row else {"stars": 0, "badge_unlocked": False}
+            progress.update(fields)
+            data = {k: v for k, v in progress.items() if k not in ("stars", "badge_unlocked")}
+            conn.execute(
+                "INSERT INTO progress (user_id, stars, badge_unlocked, data, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET stars = excluded.stars, "
+                "badge_unlocked = excluded.badge_unlocked, data = excluded.data, updated_at = excluded.updated_at",
+                (user_id, int(progress.get("stars") or 0), int(bool(progress.get("badge_unlocked"))),
+                 json.dumps(data), time.time()))
+            seq = self._commit(conn)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._remember(user_id, progress, seq)
+        return progress
+
+    def add_stars(self, user_id, count=1):
+        """Atomically add stars (unlocking the badge at BADGE_STARS); returns the new progress."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO progress (user_id, stars, badge_unlocked, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET stars = stars + excluded.stars, "
+                "badge_unlocked = MAX(badge_unlocked, stars + excluded.stars >= ?), "
+                "updated_at = excluded.updated_at",
+                (user_id, count, int(count >= BADGE_STARS), time.time(), BADGE_STARS))
+            row = conn.execute(
+                "SELECT stars, badge_unlocked, data FROM progress WHERE user_id = ?", (user_id,)).fetchone()
+            seq = self._commit(conn)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        progress = self._row_to_dict(row)
+        self._remember(user_id, progress, seq)
+        return progress
@@ -19,3 +19,35 @@ def client():
 def test_homepage(client):
     res = client.get("/")
     assert res.status_code == 200
+
+def test_gesture_save_and_predict(client, tmp_path, monkeypatch):
+    import app as app_module
+    from landmark_classifier import LandmarkGestureModel
+
+    monkeypatch.setattr(app_module, "gesture_model", LandmarkGestureModel(str(tmp_path)))
+    fist = [[0.5, 0.5, 0.0]] + [[0.5 + 0.01 * i, 0.45, 0.0] for i in range(20)]
+    flat = [[0.5, 0.5, 0.0]] + [[0.5, 0.5 - 0.02 * i, 0.0] for i in range(20)]
+
+    for hand, label in [(fist, "fist"), (flat, "stop")]:
+        res = client.post("/api/data/save", json={"label": label, "landmarks": hand})
+        assert res.status_code == 200
+
+    res = client.post("/api/gesture/predict", json={"landmarks": [flat, fist]})
+    assert res.status_code == 200
+    labels = [p["label"] for p in res.get_json()["predictions"]]
+    assert labels == ["stop", "fist"]
+
+def test_progress_store_concurrent_stars(tmp_path):
+    import threading
+    from progress_store import ProgressStore
+
+    store = ProgressStore(str(tmp_path / "progress.db"))
+    threads = [threading.Thread(target=lambda: [store.add_stars("child_1") for _ in range(25)])
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    progress = ProgressStore(str(tmp_path / "progress.db")).get("child_1")
+    assert progress["stars"] == 200
+    assert progress["badge_unlocked"] is True
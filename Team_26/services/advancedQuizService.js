@@ -4,6 +4,7 @@ const fs = require('fs').promises;
 const Content = require('../models/Content');
 const mongoose = require('mongoose');
 const fsSync = require('fs');
+const workerPool = require('./pythonWorkerPool');
 
 class AdvancedQuizService {
     constructor() {
@@ -87,6 +88,28 @@ class AdvancedQuizService {
         });
     }
 
+    /**
+     * Run advanced_quiz_generator on a content payload; uses the persistent
+     * worker pool (models stay loaded) unless QUIZ_WORKERS=0
+     */
+    async runGenerator(payload, maxQs) {
+        if (workerPool.enabled()) {
+            return workerPool.request('advanced', { ...payload, max: maxQs });
+        }
+
+        const pythonPath = await this.checkPythonEnvironment();
+        process.env.PYTHONUTF8 = '1';
+        process.env.PYTHONIOENCODING = 'utf-8';
+        const { stdout, stderr } = await this.executePythonScript(pythonPath, [this.pythonScriptPath, '--max', String(maxQs)], payload);
+        if (stderr && stderr.trim()) console.warn('advanced_quiz_generator stderr:', stderr.trim());
+        try {
+            return JSON.parse(stdout.trim() || '[]');
+        } catch (e) {
+            console.error('Generator stdout:', stdout);
+            throw e;
+        }
+    }
+
     /**
      * Generate cold-start quiz from topics
      */
@@ -139,21 +162,14 @@ class AdvancedQuizService {
             const combined = contents.map(c => c.transcript || (c.chunks && c.chunks.join(' ')) || c.description || '').join('\n\n');
             const payload = { transcript: combined, chunks: contents.flatMap(c => c.chunks || []) };
 
-            const pythonPath = await this.checkPythonEnvironment();
-            process.env.PYTHONUTF8 = '1';
-            process.env.PYTHONIOENCODING = 'utf-8';
-
             // Ask generator for up to topics.length * perTopicQuestions (cap to reasonable limit)
             const maxQs = Math.min(200, Math.max(perTopicQuestions * topics.length, perTopicQuestions));
-            const { stdout, stderr } = await this.executePythonScript(pythonPath, [this.pythonScriptPath, '--max', String(maxQs)], payload);
-            if (stderr && stderr.trim()) console.warn('advanced_quiz_generator stderr:', stderr.trim());
 
             let parsed = [];
             try {
-                parsed = JSON.parse(stdout.trim() || '[]');
+                parsed = await this.runGenerator(payload, maxQs);
             } catch (e) {
-                console.error('Failed to parse generator output:', e.message);
-                console.error('Generator stdout:', stdout);
+                console.error('Failed to get generator output:', e.message);
                 // fallback
                 const fallback = [];
                 for (const t of topics) fallback.push(...this._generateEnhancedQuestions(t, perTopicQuestions));
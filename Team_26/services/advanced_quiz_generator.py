@@ -38,6 +38,7 @@ except Exception:
 
 try:
     from sentence_transformers import SentenceTransformer, util
+    from embeddings import get_encoder
     ST_AVAILABLE = True
     # lazy-load model when needed
     _st_model = None
@@ -131,7 +132,7 @@ def generate_distractors(answer: str, pool: List[str], max_d=3) -> List[str]:
     # If sentence-transformers available, rank by embedding similarity (closer -> better distractor)
     if ST_AVAILABLE and _st_model is None:
         try:
-            _st_model = SentenceTransformer('all-MiniLM-L6-v2')
+            _st_model = get_encoder()  # resident model shared with quiz_generator (embeddings.py)
         except Exception:
             _st_model = None
 
@@ -230,7 +231,7 @@ def generate_questions_from_text(text: str, max_questions: int = 10) -> List[dic
             answer = None
             if ST_AVAILABLE and _st_model is None:
                 try:
-                    _st_model = SentenceTransformer('all-MiniLM-L6-v2')
+                    _st_model = get_encoder()
                 except Exception:
                     _st_model = None
 
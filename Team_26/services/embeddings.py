@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+embeddings.py
+
+Shared sentence-embedding helpers for the quiz services.
+
+- get_encoder(): one resident SentenceTransformer per process (quiz_generator,
+  advanced_quiz_generator and semantic_similarity all use it).
+- EmbeddingCache: text -> L2-normalised vector, filled with one batched
+  encode call for all texts not seen before; lives as long as the generator,
+  so terms repeated across chunks and topics are encoded once.
+- rank_distractors(): ranks candidate terms for many answers with one matrix
+  multiply + top-k.
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+EMB_MODEL_NAME = "all-MiniLM-L6-v2"
+
+_encoders: Dict[str, object] = {}
+_encoders_lock = threading.Lock()
+
+
+def get_encoder(model_name: str = EMB_MODEL_NAME):
+    """Resident SentenceTransformer for model_name (loaded on first use)."""
+    with _encoders_lock:
+        if model_name not in _encoders:
+            from sentence_transformers import SentenceTransformer
+            _encoders[model_name] = SentenceTransformer(model_name)
+        return _encoders[model_name]
+
+
+class EmbeddingCache:
+    """Normalised embeddings of every text encoded so far, stored as rows of one matrix."""
+
+    def __init__(self, encoder, max_items: int = 200_000, batch_size: int = 64):
+        self.encoder = encoder
+        self.max_items = max_items
+        self.batch_size = batch_size
+        self._index: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _append(self, vecs: np.ndarray):
+        if self._matrix is None:
+            self._matrix = np.empty((max(1024, len(vecs)), vecs.shape[1]), dtype=np.float32)
+        needed = self._size + len(vecs)
+        if needed > len(self._matrix):
+            grown = np.empty((max(needed, 2 * len(self._matrix)), self._matrix.shape[1]), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+        self._matrix[self._size:needed] = vecs
+        self._size = needed
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), dim) normalised matrix; only unseen texts hit the model, in one batch."""
+        missing = list(dict.fromkeys(t for t in texts if t not in self._index))
+        if missing:
+            if self._size + len(missing) > self.max_items:
+                self._index.clear()
+                self._size = 0
+                missing = list(dict.fromkeys(texts))
+            vecs = self.encoder.encode(missing, batch_size=self.batch_size, convert_to_numpy=True,
+                                       normalize_embeddings=True, show_progress_bar=False)
+            vecs = np.asarray(vecs, dtype=np.float32).reshape(len(missing), -1)
+            start = self._size
+            self._append(vecs)
+            for i, text in enumerate(missing):
+                self._index[text] = start + i
+        rows = [self._index[t] for t in texts]
+        if self._matrix is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._matrix[rows]
+
+
+def rank_distractors(cache: EmbeddingCache, answers: List[str], terms: List[str],
+                     top_k: int = 6, min_len: int = 2, max_len: int = 30) -> List[List[str]]:
+    """
+    For each answer, the top_k terms most similar to it (cosine), excluding
+    the answer itself and terms outside [min_len, max_len] characters.
+    """
+    pool = [t for t in dict.fromkeys(terms) if min_len <= len(t) <= max_len]
+    if not answers:
+        return []
+    if not pool:
+        return [[] for _ in answers]
+
+    emb = cache.encode(list(answers) + pool)
+    sims = emb[:len(answers)] @ emb[len(answers):].T  # (answers, pool)
+
+    lower_pool = np.array([t.lower() for t in pool])
+    for i, ans in enumerate(answers):
+        sims[i, lower_pool == ans.lower()] = -np.inf
+
+    k = min(top_k, len(pool))
+    top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    ranked = []
+    for i, ans in enumerate(answers):
+        if not ans.strip():
+            ranked.append([])
+            continue
+        idx = top[i][np.argsort(-sims[i, top[i]], kind="stable")]
+        ranked.append([pool[j] for j in idx if np.isfinite(sims[i, j])])
+    return ranked
@@ -1,6 +1,7 @@
 const { spawn } = require('child_process');
 const path = require('path');
 const fs = require('fs').promises;
+const workerPool = require('./pythonWorkerPool');
 
 class EnhancedQuizService {
     constructor() {
@@ -16,8 +17,6 @@ class EnhancedQuizService {
         try {
             console.log('🎯 Generating high-quality questions with Bloom\'s taxonomy');
             
-            const pythonPath = await this.checkPythonEnvironment();
-            
             const inputData = {
                 topics: topics,
                 difficulty: difficulty,
@@ -30,33 +29,11 @@ class EnhancedQuizService {
                     educational_value: 0.9
                 }
             };
-            
-            const tempInputPath = path.join(__dirname, 'temp_enhanced_input.json');
-            await fs.writeFile(tempInputPath, JSON.stringify(inputData));
-            
-            // Force UTF-8 for Python execution
-            process.env.PYTHONUTF8 = '1';
-            process.env.PYTHONIOENCODING = 'utf-8';
-            const result = await this.executePythonScript(pythonPath, [
-                this.pythonScriptPath,
-                tempInputPath
-            ]);
-            
-            await fs.unlink(tempInputPath).catch(() => {});
-            
-            // Extract pure JSON from stdout (strip any accidental logs)
-            const out = result.toString('utf8');
-            
-            // Find the start of actual JSON array (handle Windows line endings)
-            const jsonStart = out.indexOf('[\r\n');
-            
-            if (jsonStart === -1) {
-                throw new Error('No JSON array found in Python output');
-            }
-            
-            // Extract from the start of JSON array to the end
-            const jsonPayload = out.slice(jsonStart);
-            const questions = JSON.parse(jsonPayload);
+
+            // Persistent worker keeps the generator loaded between requests
+            const questions = workerPool.enabled()
+                ? await workerPool.request('enhanced', inputData)
+                : await this.runScriptOnce(inputData);
             console.log(`✅ Generated ${questions.length} high-quality questions`);
             return questions;
             
@@ -360,6 +337,30 @@ class EnhancedQuizService {
         }
     }
 
+    /**
+     * One-off run of enhanced_quiz_generator.py (used when QUIZ_WORKERS=0)
+     */
+    async runScriptOnce(inputData) {
+        const pythonPath = await this.checkPythonEnvironment();
+        const tempInputPath = path.join(__dirname, `temp_enhanced_input_${process.pid}_${Date.now()}.json`);
+        await fs.writeFile(tempInputPath, JSON.stringify(inputData));
+
+        // Force UTF-8 for Python execution
+        process.env.PYTHONUTF8 = '1';
+        process.env.PYTHONIOENCODING = 'utf-8';
+        try {
+            const out = (await this.executePythonScript(pythonPath, [this.pythonScriptPath, tempInputPath])).toString('utf8');
+            // Extract pure JSON from stdout (strip any accidental logs)
+            const jsonStart = out.indexOf('[');
+            if (jsonStart === -1) {
+                throw new Error('No JSON array found in Python output');
+            }
+            return JSON.parse(out.slice(jsonStart));
+        } finally {
+            await fs.unlink(tempInputPath).catch(() => {});
+        }
+    }
+
     async checkPythonEnvironment() {
         try {
             await fs.access(this.pythonEnvPath);
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+material_cache.py
+
+Learning-material pipeline for the cold-start quiz bank (quiz_generator.py).
+
+- MaterialCache: on-disk JSON cache keyed by topic and entry (one file per
+  source, plus the summary and generated MCQs), with a TTL on fetched text.
+  Summaries and MCQs are tagged with a hash of the material they were built
+  from, so they are reused for as long as that material does not change.
+- MaterialPipeline: fetches every (topic, source) pair that is missing or
+  stale concurrently on a thread pool, with an overall timeout. A fetch that
+  fails or times out falls back to the stale cached text, if any.
+- Fetchers are plain callables topic -> text, so they can be swapped out;
+  fixture_fetchers() reads local files instead of the network
+  (set QUIZ_MATERIAL_FIXTURES=<dir> to use it from QuizGenerator).
+
+Layout:  <cache_dir>/<topic-slug>-<hash>/<entry>.json
+         {"topic": ..., "saved_at": <unix time>, "value": ..., "material_hash": ...}
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "QUIZ_MATERIAL_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "material_cache"))
+DEFAULT_TTL = float(os.environ.get("QUIZ_MATERIAL_TTL_HOURS", "24")) * 3600
+
+Fetcher = Callable[[str], str]
+
+
+def material_hash(sources: Dict[str, str]) -> str:
+    """Stable hash of a topic's fetched material (all sources)."""
+    h = hashlib.sha1()
+    for name in sorted(sources):
+        h.update(name.encode("utf-8") + b"\0" + (sources[name] or "").encode("utf-8") + b"\0")
+    return h.hexdigest()
+
+
+def _topic_key(topic: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-")[:40] or "topic"
+    return f"{slug}-{hashlib.sha1(topic.strip().lower().encode('utf-8')).hexdigest()[:10]}"
+
+
+class MaterialCache:
+    """JSON files per topic/entry; writes are atomic (tmp file + rename)."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_TTL):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.ttl = ttl
+
+    def _path(self, topic: str, entry: str) -> str:
+        return os.path.join(self.cache_dir, _topic_key(topic), f"{entry}.json")
+
+    def load(self, topic: str, entry: str) -> Optional[Dict]:
+        """Raw cache record (or None); callers decide whether it is still usable."""
+        try:
+            with open(self._path(topic, entry), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, record: Optional[Dict]) -> bool:
+        return record is not None and time.time() - record.get("saved_at", 0) < self.ttl
+
+    def save(self, topic: str, entry: str, value, material_hash: Optional[str] = None):
+        path = self._path(topic, entry)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = {"topic": topic, "saved_at": time.time(), "value": value}
+        if material_hash is not None:
+            record["material_hash"] = material_hash
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def get_derived(self, topic: str, entry: str, mhash: str):
+        """Summary / MCQs built from material with hash `mhash`, or None."""
+        record = self.load(topic, entry)
+        if record is not None and record.get("material_hash") == mhash:
+            return record["value"]
+        return None
+
+
+class MaterialPipeline:
+    """Fetches material for many topics at once, through a MaterialCache."""
+
+    def __init__(self, fetchers: Dict[str, Fetcher], cache: Optional[MaterialCache] = None,
+                 max_workers: int = 8, timeout: float = 60.0):
+        self.fetchers = dict(fetchers)
+        self.cache = cache
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    def _fetch_one(self, name: str, topic: str) -> str:
+        text = self.fetchers[name](topic) or ""
+        if self.cache is not None and text.strip():
+            self.cache.save(topic, f"source_{name}", text)
+        return text
+
+    def fetch_all(self, topics: List[str]) -> Dict[str, Dict[str, str]]:
+        """{topic: {source: text}}; only missing/stale sources are fetched."""
+        result = {topic: {} for topic in topics}
+        stale = {}
+        todo = []
+        for topic in result:
+            for name in self.fetchers:
+                record = self.cache.load(topic, f"source_{name}") if self.cache is not None else None
+                if self.cache is not None and self.cache.is_fresh(record):
+                    result[topic][name] = record["value"]
+                else:
+                    if record is not None:
+                        stale[(topic, name)] = record["value"]
+                    todo.append((topic, name))
+        if not todo:
+            return result
+
+        logger.info(f"Fetching {len(todo)} source(s) for {len(topics)} topic(s)")
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(todo)))
+        futures = {pool.submit(self._fetch_one, name, topic): (topic, name) for topic, name in todo}
+        done, not_done = wait(futures, timeout=self.timeout)
+        # don't block on fetchers that are still hanging; their results are dropped
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        for future, (topic, name) in futures.items():
+            text = ""
+            if future in done:
+                try:
+                    text = future.result()
+                except Exception as e:
+                    logger.warning(f"{name} fetch error for {topic}: {e}")
+            else:
+                logger.warning(f"{name} fetch for {topic} timed out after {self.timeout}s")
+            if not text.strip() and (topic, name) in stale:
+                logger.info(f"Using stale {name} material for {topic}")
+                text = stale[(topic, name)]
+            result[topic][name] = text
+        return result
+
+
+def fixture_fetchers(fixture_dir: str, sources=("wiki", "arxiv", "web")) -> Dict[str, Fetcher]:
+    """
+    Fetchers that read <fixture_dir>/<topic-slug>.<source>.txt (missing file -> "").
+    Topic slug: lower case, runs of non-alphanumerics replaced by '-'.
+    """
+    def make(source):
+        def fetch(topic: str) -> str:
+            slug = re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-")
+            try:
+                with open(os.path.join(fixture_dir, f"{slug}.{source}.txt"), "r", encoding="utf-8") as f:
+                    return f.read()
+            except OSError:
+                return ""
+        return fetch
+    return {source: make(source) for source in sources}
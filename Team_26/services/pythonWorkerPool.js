@@ -0,0 +1,144 @@
+const { spawn } = require('child_process');
+const path = require('path');
+const fs = require('fs');
+const readline = require('readline');
+
+const WORKER_SCRIPT = path.join(__dirname, 'quiz_worker.py');
+
+/**
+ * Pool of long-lived quiz_worker.py processes.
+ *
+ * Models are loaded once per worker instead of once per quiz request. Requests
+ * are JSON lines tagged with an id, so several can be in flight on one worker;
+ * each request goes to the worker with the fewest pending requests. A worker
+ * that exits is restarted on the next request and its pending requests fail.
+ * quiz_worker.py handles one request at a time, so a worker whose request
+ * times out is killed (the hung job would block everything queued behind it).
+ */
+class PythonWorkerPool {
+    constructor(size = parseInt(process.env.QUIZ_WORKERS || '2', 10), timeoutMs = parseInt(process.env.QUIZ_WORKER_TIMEOUT_MS || '300000', 10)) {
+        this.size = Math.max(1, size);
+        this.timeoutMs = timeoutMs;
+        this.workers = [];
+        this.nextId = 1;
+        this.pythonPath = null;
+    }
+
+    /**
+     * Venv python first (Windows / POSIX layout), then 'python', then 'python3'
+     */
+    resolvePython() {
+        if (this.pythonPath) return this.pythonPath;
+        const venv = path.join(__dirname, '..', 'venv');
+        const candidates = [
+            process.env.QUIZ_PYTHON,
+            path.join(venv, 'Scripts', 'python.exe'),
+            path.join(venv, 'bin', 'python')
+        ].filter(Boolean);
+        this.pythonPath = candidates.find(p => fs.existsSync(p)) || (process.platform === 'win32' ? 'python' : 'python3');
+        return this.pythonPath;
+    }
+
+    _startWorker() {
+        const proc = spawn(this.resolvePython(), [WORKER_SCRIPT], {
+            stdio: ['pipe', 'pipe', 'pipe'],
+            cwd: __dirname,
+            env: { ...process.env, PYTHONUTF8: '1', PYTHONIOENCODING: 'utf-8', PYTHONUNBUFFERED: '1' }
+        });
+        const worker = { proc, pending: new Map(), alive: true };
+
+        readline.createInterface({ input: proc.stdout }).on('line', (line) => {
+            let msg;
+            try {
+                msg = JSON.parse(line);
+            } catch (e) {
+                console.warn('quiz_worker: ignoring non-JSON output:', line.slice(0, 200));
+                return;
+            }
+            const entry = worker.pending.get(msg.id);
+            if (!entry) return;
+            worker.pending.delete(msg.id);
+            clearTimeout(entry.timer);
+            if (msg.ok) entry.resolve(msg.result);
+            else entry.reject(new Error(`quiz_worker ${entry.task} failed: ${msg.error}`));
+        });
+
+        proc.stderr.on('data', (data) => {
+            const text = data.toString().trim();
+            if (text) console.log(text);
+        });
+
+        const fail = (reason) => {
+            if (!worker.alive) return;
+            worker.alive = false;
+            this.workers = this.workers.filter(w => w !== worker);
+            for (const entry of worker.pending.values()) {
+                clearTimeout(entry.timer);
+                entry.reject(new Error(`quiz_worker ${reason}`));
+            }
+            worker.pending.clear();
+        };
+        worker.fail = fail;
+        proc.on('exit', (code) => fail(`exited with code ${code}`));
+        proc.on('error', (error) => fail(`failed to start: ${error.message}`));
+        proc.stdin.on('error', () => fail('stdin closed'));
+
+        this.workers.push(worker);
+        return worker;
+    }
+
+    _pickWorker() {
+        if (this.workers.length < this.size) {
+            // grow lazily up to `size` whenever every existing worker is busy
+            if (!this.workers.length || this.workers.every(w => w.pending.size > 0)) {
+                return this._startWorker();
+            }
+        }
+        return this.workers.reduce((best, w) => (w.pending.size < best.pending.size ? w : best));
+    }
+
+    /**
+     * Take a worker out of rotation, fail its queued requests and kill the process
+     */
+    _kill(worker, reason) {
+        worker.fail(reason);
+        try { worker.proc.kill(); } catch (e) { /* already gone */ }
+    }
+
+    /**
+     * Send one task to a worker; resolves with the task's result
+     */
+    request(task, params = {}, timeoutMs = this.timeoutMs) {
+        return new Promise((resolve, reject) => {
+            const worker = this._pickWorker();
+            const id = this.nextId++;
+            const timer = setTimeout(() => {
+                worker.pending.delete(id);
+                reject(new Error(`quiz_worker ${task} timed out after ${timeoutMs} ms`));
+                this._kill(worker, `killed after ${task} timed out`);
+            }, timeoutMs);
+            worker.pending.set(id, { resolve, reject, timer, task });
+            try {
+                worker.proc.stdin.write(JSON.stringify({ id, task, params }) + '\n');
+            } catch (e) {
+                worker.pending.delete(id);
+                clearTimeout(timer);
+                reject(e);
+            }
+        });
+    }
+
+    shutdown() {
+        for (const w of this.workers) {
+            try { w.proc.stdin.end(); } catch (e) { /* already closed */ }
+        }
+        this.workers = [];
+    }
+}
+
+const pool = new PythonWorkerPool();
+process.on('exit', () => pool.shutdown());
+
+module.exports = pool;
+module.exports.PythonWorkerPool = PythonWorkerPool;
+module.exports.enabled = () => process.env.QUIZ_WORKERS !== '0';
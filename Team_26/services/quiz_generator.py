@@ -26,6 +26,8 @@ from duckduckgo_search import DDGS
 import arxiv
 import wikipediaapi
 from sentence_transformers import SentenceTransformer, util
+from embeddings import EmbeddingCache, get_encoder, rank_distractors
+from material_cache import MaterialCache, MaterialPipeline, fixture_fetchers, material_hash
 from transformers import pipeline, AutoTokenizer
 from sklearn.cluster import KMeans
 
@@ -60,19 +62,36 @@ np.random.seed(42)
 STOP = set(stopwords.words("english"))
 
 class QuizGenerator:
-    def __init__(self):
-        """Initialize the quiz generator with ML models"""
+    def __init__(self, fetchers: Optional[Dict] = None, material_cache: Optional[MaterialCache] = None):
+        """
+        Initialize the quiz generator with ML models.
+        fetchers: {source: callable(topic) -> text}; defaults to Wikipedia/arXiv/web,
+        or to local fixture files when QUIZ_MATERIAL_FIXTURES is set.
+        """
         self.embedder = None
+        self.emb_cache = None
         self.summarizer = None
         self.qg = None
         self.qg_mode = None
         self._initialize_models()
+        self.material = MaterialPipeline(
+            fetchers or self._default_fetchers(),
+            material_cache if material_cache is not None else MaterialCache())
+    
+    def _default_fetchers(self) -> Dict:
+        fixture_dir = os.environ.get("QUIZ_MATERIAL_FIXTURES")
+        if fixture_dir:
+            return {name: (lambda topic, f=f: self.clean_text(f(topic)))
+                    for name, f in fixture_fetchers(fixture_dir).items()}
+        return {"wiki": self.fetch_wiki, "arxiv": self.fetch_arxiv, "web": self.fetch_web_snippets}
     
     def _initialize_models(self):
         """Initialize ML models with error handling and fallbacks"""
         try:
             # Initialize sentence transformer
-            self.embedder = SentenceTransformer(EMB_MODEL_NAME)
+            self.embedder = get_encoder(EMB_MODEL_NAME)
+            # Term/answer embeddings reused across chunks and topics
+            self.emb_cache = EmbeddingCache(self.embedder)
             logger.info(f"Initialized embedder: {EMB_MODEL_NAME}")
         except Exception as e:
             logger.error(f"Failed to initialize embedder: {e}")
@@ -166,9 +185,13 @@ class QuizGenerator:
     
     def fetch_learning_material(self, topic: str) -> Tuple[str, str]:
         """Fetch learning material from multiple sources"""
-        wiki_text = self.fetch_wiki(topic)
-        arxiv_text = self.fetch_arxiv(topic)
-        web_text = self.fetch_web_snippets(topic)
+        return self.combine_material(self.material.fetch_all([topic])[topic])
+    
+    def combine_material(self, sources: Dict[str, str]) -> Tuple[str, str]:
+        """Join per-source texts into (combined text, source tag)"""
+        wiki_text = sources.get("wiki", "")
+        arxiv_text = sources.get("arxiv", "")
+        web_text = sources.get("web", "")
         
         combined = " ".join([wiki_text, arxiv_text, web_text]).strip()
         
@@ -247,30 +270,17 @@ class QuizGenerator:
         freq = Counter([w.lower() for w in cands])
         return [w for w, _ in freq.most_common(top_k)]
     
-    def candidate_distractors(self, answer: str, terms: List[str], embeddings_cache: Dict) -> List[str]:
+    def candidate_distractors(self, answer: str, terms: List[str], embeddings_cache: Dict = None) -> List[str]:
         """Generate candidate distractors using embeddings"""
-        pool = [t for t in terms if t.lower() != answer.lower() and 2 <= len(t) <= 30]
-        if not pool or not answer.strip():
-            return []
-        
+        return self.candidate_distractors_batch([answer], terms)[0]
+
+    def candidate_distractors_batch(self, answers: List[str], terms: List[str]) -> List[List[str]]:
+        """Distractor candidates for many answers: one batched encode, one matrix multiply"""
         try:
-            if answer not in embeddings_cache:
-                embeddings_cache[answer] = self.embedder.encode(answer, convert_to_tensor=True)
-            ans_emb = embeddings_cache[answer]
-            
-            vecs, keep = [], []
-            for t in pool:
-                if t not in embeddings_cache:
-                    embeddings_cache[t] = self.embedder.encode(t, convert_to_tensor=True)
-                vecs.append(embeddings_cache[t])
-                keep.append(t)
-            
-            sims = [float(util.pytorch_cos_sim(ans_emb, v)[0]) for v in vecs]
-            ranked = [keep[i] for i in np.argsort(sims)[::-1]]
-            return ranked[:6]
+            return rank_distractors(self.emb_cache, answers, terms, top_k=6)
         except Exception as e:
-            logger.warning(f"Embedding error for '{answer}': {e}")
-            return []
+            logger.warning(f"Embedding error for {answers}: {e}")
+            return [[] for _ in answers]
     
     def make_mcqs_from_chunk(self, chunk: str, topic_label: str, subtopic: str, source_tag: str, max_q: int = 5) -> List[Dict]:
         """Generate MCQs from a text chunk"""
@@ -281,15 +291,19 @@ class QuizGenerator:
         if not qa_pairs:
             return []
         
-        terms, emb_cache = self.key_terms_from_chunk(chunk, top_k=20), {}
+        terms = self.key_terms_from_chunk(chunk, top_k=20)
         mcqs = []
         
+        pairs = []
         for qa in qa_pairs[:max_q]:
             question, answer = qa.get("question", "").strip(), qa.get("answer", "").strip()
-            if not question or not answer or len(answer.split()) > 6:
-                continue
-            
-            dist_cands = self.candidate_distractors(answer, terms, emb_cache)
+            if question and answer and len(answer.split()) <= 6:
+                pairs.append((question, answer))
+        
+        # Rank distractors for every answer of the chunk at once
+        all_cands = self.candidate_distractors_batch([a for _, a in pairs], terms)
+        
+        for (question, answer), dist_cands in zip(pairs, all_cands):
             if len(dist_cands) < 3:
                 words = [w for w in self.safe_word_tokenize(chunk) if w.isalpha()]
                 rng.shuffle(words)
@@ -351,28 +365,48 @@ class QuizGenerator:
         
         return [names[l] for l in labels]
     
+    def topic_mcqs(self, topic: str, sources: Dict[str, str]) -> List[Dict]:
+        """All MCQs for one topic; summary and MCQs are reused while its material is unchanged"""
+        raw, src_tag = self.combine_material(sources)
+        if not raw.strip():
+            logger.warning(f"No material found for: {topic}")
+            return []
+        
+        cache = self.material.cache
+        mhash = material_hash(sources)
+        mcq_key = f"{mhash}:{self.qg_mode}"
+        if cache is not None:
+            cached = cache.get_derived(topic, "mcqs", mcq_key)
+            if cached is not None:
+                logger.info(f"Using cached MCQs for: {topic}")
+                return cached
+        
+        cleaned = cache.get_derived(topic, "summary", mhash) if cache is not None else None
+        if cleaned is None:
+            cleaned = self.summarize_text(raw)
+            if cache is not None:
+                cache.save(topic, "summary", cleaned, material_hash=mhash)
+        chunks = self.chunk_text(cleaned, target_tokens=140)
+        
+        mcqs = []
+        if chunks:
+            subs = self.subtopic_labels(chunks, topic, k=min(4, max(1, len(chunks) // 2)))
+            for chunk, sub in zip(chunks, subs):
+                mcqs.extend(self.make_mcqs_from_chunk(chunk, topic_label=topic, subtopic=sub, source_tag=src_tag, max_q=3))
+        
+        if cache is not None:
+            cache.save(topic, "mcqs", mcqs, material_hash=mcq_key)
+        return mcqs
+    
     def build_cold_start_quiz(self, selected_topics: List[str], per_topic_q: int = 8) -> List[Dict]:
         """Build a quiz from scratch using web content"""
         all_mcqs = []
+        # Sources for every topic are fetched concurrently (cached ones are skipped)
+        materials = self.material.fetch_all(selected_topics)
         
         for topic in selected_topics:
             logger.info(f"Processing topic: {topic}")
-            raw, src_tag = self.fetch_learning_material(topic)
-            
-            if not raw.strip():
-                logger.warning(f"No material found for: {topic}")
-                continue
-            
-            cleaned = self.summarize_text(raw)
-            chunks = self.chunk_text(cleaned, target_tokens=140)
-            
-            if not chunks:
-                continue
-            
-            subs = self.subtopic_labels(chunks, topic, k=min(4, max(1, len(chunks) // 2)))
-            
-            for chunk, sub in zip(chunks, subs):
-                all_mcqs.extend(self.make_mcqs_from_chunk(chunk, topic_label=topic, subtopic=sub, source_tag=src_tag, max_q=3))
+            all_mcqs.extend(self.topic_mcqs(topic, materials[topic]))
             
             # Limit questions per topic
             topic_mcqs = [q for q in all_mcqs if q["topic"] == topic]
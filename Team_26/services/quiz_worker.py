@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+quiz_worker.py
+
+Long-lived quiz generation worker. Generator modules and their models are
+loaded once per process, and requests are served as JSON lines on
+stdin/stdout, so Node does not pay the import/model-loading cost per quiz.
+
+Request  (one line):  {"id": 1, "task": "advanced", "params": {...}}
+Response (one line):  {"id": 1, "ok": true, "result": [...]}
+                      {"id": 1, "ok": false, "error": "..."}
+
+Tasks:
+  advanced    params: text | transcript | chunks, max       -> advanced_quiz_generator
+  enhanced    params: topics, difficulty, question_count    -> enhanced_quiz_generator
+  cold_start  params: topics, per_topic_q                   -> quiz_generator.QuizGenerator
+  adaptive    params: mcq_bank, student_perf, total_q, difficulty_mix
+  similarity  params: source_passages, queries              -> semantic_similarity
+  ping        -> "pong" (also reports which generators are loaded)
+
+Logs go to stderr; anything a generator prints while handling a request is
+redirected to stderr too, so stdout carries only responses.
+
+Usage (normally started by services/pythonWorkerPool.js):
+  python services/quiz_worker.py
+  echo '{"id": 1, "task": "enhanced", "params": {"topics": ["Cybersecurity"]}}' | python services/quiz_worker.py
+"""
+
+import contextlib
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+_generators = {}
+
+
+def log(msg: str):
+    print(f"[quiz_worker {os.getpid()}] {msg}", file=sys.stderr, flush=True)
+
+
+def _get(name):
+    """Import / construct a generator the first time it is needed, then reuse it."""
+    if name not in _generators:
+        log(f"Loading {name} generator...")
+        if name == "advanced":
+            import advanced_quiz_generator
+            _generators[name] = advanced_quiz_generator
+        elif name == "enhanced":
+            from enhanced_quiz_generator import MLQuestionEnhancer
+            _generators[name] = MLQuestionEnhancer()
+        elif name == "full":
+            from quiz_generator import QuizGenerator
+            _generators[name] = QuizGenerator()
+        log(f"{name} generator ready")
+    return _generators[name]
+
+
+def _raw_text(params):
+    # same keys advanced_quiz_generator.py accepts on stdin
+    for key in ("text", "content", "transcript"):
+        if isinstance(params.get(key), str) and params[key].strip():
+            return params[key]
+    chunks = params.get("chunks")
+    if isinstance(chunks, list):
+        return " ".join(c for c in chunks if isinstance(c, str))
+    return ""
+
+
+def handle(task, params):
+    if task == "ping":
+        return {"pong": True, "loaded": sorted(_generators)}
+    if task == "advanced":
+        raw = _raw_text(params)
+        if not raw.strip():
+            return []
+        return _get("advanced").generate_questions_from_text(raw, max_questions=int(params.get("max", 10)))
+    if task == "enhanced":
+        return _get("enhanced").generate_questions(
+            params.get("topics", ["Artificial Intelligence"]),
+            params.get("difficulty", "medium"),
+            int(params.get("question_count", 10)))
+    if task == "cold_start":
+        return _get("full").build_cold_start_quiz(params.get("topics", []), int(params.get("per_topic_q", 8)))
+    if task == "adaptive":
+        return _get("full").build_adaptive_quiz(
+            params.get("mcq_bank", []), params.get("student_perf", {}),
+            int(params.get("total_q", 12)), tuple(params.get("difficulty_mix", (0.3, 0.5, 0.2))))
+    if task == "similarity":
+        from semantic_similarity import similarities
+        sims, fallback = similarities(params.get("source_passages") or [], params.get("queries") or [])
+        return {"similarities": sims, "fallback": fallback}
+    raise ValueError(f"unknown task: {task}")
+
+
+def main():
+    out = sys.stdout
+    preload = [name for name in os.environ.get("QUIZ_WORKER_PRELOAD", "").split(",") if name]
+    with contextlib.redirect_stdout(sys.stderr):
+        for name in preload:
+            try:
+                _get(name)
+            except Exception as e:
+                log(f"Preloading {name} failed: {e}")
+    log("ready")
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        req_id = None
+        try:
+            req = json.loads(line)
+            req_id = req.get("id")
+            with contextlib.redirect_stdout(sys.stderr):
+                result = handle(req.get("task"), req.get("params") or {})
+            resp = {"id": req_id, "ok": True, "result": result}
+        except Exception as e:
+            log(f"Request {req_id} failed: {e}")
+            resp = {"id": req_id, "ok": False, "error": str(e)}
+        out.write(json.dumps(resp, ensure_ascii=False, default=str) + "\n")
+        out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,15 +10,19 @@ similarity between the query and any source passage (0.0-1.0). If sentence-trans
 is not available, the script will fall back to simple substring matching (1.0 if substring,
 0.0 otherwise) and include a `fallback` flag in the output.
 
-Requires: sentence-transformers (optional, recommended). Model used: all-MiniLM-L6-v2
+Requires: sentence-transformers (optional, recommended). Model used: all-MiniLM-L6-v2,
+loaded through embeddings.get_encoder(); quiz_worker.py also serves this as its
+"similarity" task so the model stays resident between calls.
 """
 
 import sys
 import json
-import math
+
+import numpy as np
 
 try:
-    from sentence_transformers import SentenceTransformer, util
+    import sentence_transformers  # noqa: F401
+    from embeddings import get_encoder
     ST = True
 except Exception:
     ST = False
@@ -31,38 +35,22 @@ def log(msg: str):
         pass
 
 
-def main():
-    try:
-        payload = json.load(sys.stdin)
-    except Exception as e:
-        print(json.dumps({"error": f"failed to parse stdin: {e}"}))
-        return
-
-    sources = payload.get('source_passages') or []
-    queries = payload.get('queries') or []
-
-    if not isinstance(sources, list) or not isinstance(queries, list):
-        print(json.dumps({"error": "source_passages and queries must be lists"}))
-        return
-
+def similarities(sources, queries):
+    """
+    Max cosine similarity of each query to any source passage (0.0-1.0).
+    Returns (similarities, fallback).
+    """
     if ST:
         try:
-            log('Loading sentence-transformers model all-MiniLM-L6-v2')
-            model = SentenceTransformer('all-MiniLM-L6-v2')
-            # Encode in batches
-            src_emb = model.encode(sources, convert_to_tensor=True, show_progress_bar=False)
-            qry_emb = model.encode(queries, convert_to_tensor=True, show_progress_bar=False)
-            sims = util.cos_sim(qry_emb, src_emb)  # shape: (len(queries), len(sources))
-            out = []
-            for i in range(sims.shape[0]):
-                row = sims[i]
-                # convert to python floats and take max
-                max_sim = float(row.max().cpu().item()) if hasattr(row, 'cpu') else float(max(row))
-                # clamp between 0 and 1
-                max_sim = max(0.0, min(1.0, max_sim))
-                out.append(max_sim)
-            print(json.dumps({"similarities": out, "fallback": False}))
-            return
+            # resident model: loaded once per process, shared with the quiz generators
+            model = get_encoder()
+            if not sources:
+                return [0.0] * len(queries), False
+            src_emb = model.encode(sources, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+            qry_emb = model.encode(queries, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+            # normalised rows -> one matrix multiply gives every cosine similarity
+            sims = np.clip((qry_emb @ src_emb.T).max(axis=1), 0.0, 1.0)
+            return [float(v) for v in sims], False
         except Exception as e:
             # fall through to fallback mode
             log(f"Model-based similarity failed: {e}")
@@ -82,8 +70,25 @@ def main():
                 out.append(0.0)
         except Exception:
             out.append(0.0)
+    return out, True
+
+
+def main():
+    try:
+        payload = json.load(sys.stdin)
+    except Exception as e:
+        print(json.dumps({"error": f"failed to parse stdin: {e}"}))
+        return
+
+    sources = payload.get('source_passages') or []
+    queries = payload.get('queries') or []
+
+    if not isinstance(sources, list) or not isinstance(queries, list):
+        print(json.dumps({"error": "source_passages and queries must be lists"}))
+        return
 
-    print(json.dumps({"similarities": out, "fallback": True}))
+    out, fallback = similarities(sources, queries)
+    print(json.dumps({"similarities": out, "fallback": fallback}))
 
 
 if __name__ == '__main__':
@@ -5,34 +5,38 @@ from langgraph.graph import StateGraph, END
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 import time
+import threading
 import requests
 import json
 from face.face_recognition_voice import face_services
 import os
 from dotenv import load_dotenv
 load_dotenv()
-from elevenlabs.client import ElevenLabs
-from elevenlabs import play
+from tts_cache import get_speaker
+from camera import camera
 
-client = ElevenLabs(
-    api_key=os.getenv("ELEVEN_LABS_API_KEY")
-)
+# Fixed prompts rendered ahead of time so the first command doesn't wait on TTS
+COMMON_PHRASES = [
+    "Voice Agent initialized and ready to help!",
+    "Listening...",
+    "Sorry, I did not understand. Please repeat.",
+    "Invalid command. Please say 'start' or 'stop'.",
+    "Welcome to text Recognition",
+    "Please say 'start' to recognize text or 'stop' to exit.",
+    "Welcome to currency Recognition",
+    "Please say 'start'  or 'stop'",
+    "Please say 'start' to analyze a scene or 'stop' to exit.",
+    "Get ready for photo in 3 seconds.",
+    "3", "2", "1",
+]
 
 def speak_llm(text, pause=0.7):
-    audio = client.text_to_speech.convert(
-        text=text,
-        voice_id="JBFqnCBsd6RMkjVDRZzb",
-        model_id="eleven_multilingual_v2",
-        output_format="mp3_44100_128",
-    )
-    play(audio)
+    # ElevenLabs audio for repeated phrases is cached on disk (tts_cache.py)
+    get_speaker("elevenlabs").speak(text)
 
 def speak_google(text):
     try:
-        import pyttsx3
-        engine = pyttsx3.init()
-        engine.say(text)
-        engine.runAndWait()
+        get_speaker("pyttsx3").speak(text)
     except Exception as e:
         print(f"TTS Error: {e}")
 
@@ -338,6 +342,10 @@ if __name__ == "__main__":
     # Make sure temp directory exists
     os.makedirs("temp", exist_ok=True)
     
+    # Open the camera now so it has settled before the first command
+    threading.Thread(target=camera.start, daemon=True).start()
+    get_speaker("pyttsx3").prewarm(COMMON_PHRASES)
+    
     # Initialize agent with speak_llm (can also use speak_google)
     agent = VoiceAgent(speak_function=speak_google)
     agent.run()
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Shared camera capture service.
+
+Opening cv2.VideoCapture(0) for every command costs camera initialisation plus
+auto-exposure settling. FrameGrabber keeps the camera open in a background
+thread and holds the most recent frames in a small ring buffer; OCR, currency,
+face and scene services all read from the same grabber.
+
+    from camera import capture
+    ok, frame = capture('temp/captured_image.jpg')
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class FrameGrabber:
+    def __init__(self, index=0, buffer_size=5):
+        self.index = index
+        self.frames = deque(maxlen=buffer_size)  # (timestamp, frame), newest last
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._cap = None
+
+    # -------------------- lifecycle --------------------
+    def start(self, timeout=5.0):
+        """Open the camera and start grabbing (no-op if already running); True once a frame is available."""
+        with self._cond:
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+                self._thread.start()
+            return self._cond.wait_for(lambda: bool(self.frames) or not self._running, timeout) \
+                and bool(self.frames)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.index)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # don't let the driver queue stale frames
+        return cap
+
+    def _run(self):
+        failures = 0
+        while self._running:
+            if self._cap is None:
+                self._cap = self._open()
+                if self._cap is None:
+                    print(f"[ERROR] Could not open camera {self.index}; retrying.")
+                    time.sleep(1.0)
+                    continue
+            ret, frame = self._cap.read()
+            if not ret:
+                failures += 1
+                if failures >= 30:  # camera unplugged / stuck: reopen it
+                    self._cap.release()
+                    self._cap = None
+                    failures = 0
+                time.sleep(0.03)
+                continue
+            failures = 0
+            with self._cond:
+                self.frames.append((time.monotonic(), frame))
+                self._cond.notify_all()
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    # -------------------- frames --------------------
+    def read(self, fresh=True, timeout=3.0):
+        """
+        (ok, frame) with the newest frame. fresh=True waits for a frame captured
+        after this call, so the picture matches what is in front of the camera now.
+        """
+        requested = time.monotonic()
+        if not self.start(timeout=timeout):
+            return False, None
+        with self._cond:
+            ok = self._cond.wait_for(
+                lambda: self.frames and (not fresh or self.frames[-1][0] >= requested), timeout)
+            if not ok:
+                return False, None
+            return True, self.frames[-1][1].copy()
+
+    def recent(self):
+        """Copies of the frames in the ring buffer, oldest first."""
+        with self._cond:
+            return [frame.copy() for _, frame in self.frames]
+
+
+camera = FrameGrabber(int(os.getenv("CAMERA_INDEX", "0")))
+
+
+def capture(path=None, fresh=True):
+    """Latest frame from the shared camera, optionally saved to `path`; returns (ok, frame)."""
+    ret, frame = camera.read(fresh=fresh)
+    if ret and path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        cv2.imwrite(path, frame)
+    return ret, frame
@@ -17,15 +17,14 @@ import os
 import cv2
 import time
 import speech_recognition as sr
+from camera import capture
+from tts_cache import get_speaker
 
 
 def speak(text, pause=0.7):
     print(text)
     try:
-        import pyttsx3
-        engine = pyttsx3.init()
-        engine.say(text)
-        engine.runAndWait()
+        get_speaker("pyttsx3").speak(text)
         time.sleep(pause)
     except Exception as e:
         print(f"[TTS ERROR] {e}")
@@ -111,11 +110,7 @@ def currency_services(speak):
         elif 'start' in command:
             speak("Get ready to show the currency to the webcam. Capturing in 3 seconds.")
             time.sleep(3)
-            cap = cv2.VideoCapture(0)
-            ret, frame = cap.read()
-            cv2.imwrite('temp/captured_image.jpg', frame)
-            
-            cap.release()
+            ret, frame = capture('temp/captured_image.jpg')
             if not ret:
                 speak("Failed to capture image from webcam.")
                 continue
@@ -1,20 +1,21 @@
 
 import cv2
-import insightface
 import numpy as np
 import sqlite3
 import os
-import pyttsx3
+import sys
 import speech_recognition as sr
 import time
-# Initialize InsightFace for detection and embedding
-embedder = insightface.app.FaceAnalysis(name='buffalo_l')
-embedder.prepare(ctx_id=0, det_size=(640, 640))
+# project root, so this also works when run directly from the face/ directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from face.face_service import face_service
+from camera import camera
+from tts_cache import get_speaker
+# Resident InsightFace model for detection and embedding (shared with scene_describe)
+embedder = face_service.detector
 
 def speak(text):
-    tts_engine = pyttsx3.init()
-    tts_engine.say(text)
-    tts_engine.runAndWait()
+    get_speaker("pyttsx3").speak(text)
 
 def listen_command():
     recognizer = sr.Recognizer()
@@ -37,34 +38,15 @@ def create_db():
     conn.close()
 
 def save_face(name, embedding):
-    conn = sqlite3.connect('faces.db')
-    c = conn.cursor()
-    c.execute('INSERT INTO faces (name, embedding) VALUES (?, ?)', (name, embedding.tobytes()))
-    conn.commit()
-    conn.close()
-
-def load_faces():
-    conn = sqlite3.connect('faces.db')
-    c = conn.cursor()
-    c.execute('SELECT name, embedding FROM faces')
-    data = c.fetchall()
-    conn.close()
-    faces = []
-    for name, emb_blob in data:
-        emb = np.frombuffer(emb_blob, dtype=np.float32)
-        faces.append((name, emb))
-    return faces
-
-def cosine_similarity(a, b):
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+    # also appends the face to the in-memory gallery
+    face_service.save_face(name, embedding)
 
 def face_services(speak):
     create_db()
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
+    if not camera.start():
         print("[ERROR] Could not open webcam.")
         return
-    print("[DEBUG] Webcam opened successfully.")
+    print("[DEBUG] Webcam ready.")
     instructions = (
         "Welcome! You can say one of the following commands:\n"
         "- 'train' to enroll a new face,\n"
@@ -87,8 +69,8 @@ def face_services(speak):
                 print(f"Capturing photo in {i}...")
                 speak(str(i))
                 time.sleep(1)
-            ret, frame = cap.read()
-            faces = embedder.get(frame)
+            ret, frame = camera.read()
+            faces = embedder.get(frame) if ret else []
             if len(faces) == 0:
                 speak("No face detected. Try again.")
             else:
@@ -106,24 +88,17 @@ def face_services(speak):
                 print(f"Capturing photo in {i}...")
                 speak(str(i))
                 time.sleep(1)
-            ret, frame = cap.read()
-            faces = embedder.get(frame)
+            ret, frame = camera.read()
+            faces = embedder.get(frame) if ret else []
             if len(faces) == 0:
                 speak("No face detected. Try again.")
             else:
-                known_faces = load_faces()
-                if not known_faces:
+                # match() picks up faces saved since the last call
+                matches = face_service.match(np.stack([face.embedding for face in faces]), top_k=1)
+                if not len(face_service):
                     speak("No known faces in database.")
                 else:
-                    results = []
-                    for i, face in enumerate(faces):
-                        emb = face.embedding.astype(np.float32)
-                        sims = [cosine_similarity(emb, k[1]) for k in known_faces]
-                        best_idx = np.argmax(sims)
-                        if sims[best_idx] > 0.5:
-                            results.append(known_faces[best_idx][0])
-                        else:
-                            results.append("Unknown person")
+                    results = [m[0][0] if m else "Unknown person" for m in matches]
                     for idx, name in enumerate(results):
                         print(f"Face {idx+1}: {name}")
                         speak(f"Face {idx+1}: {name}")
@@ -131,9 +106,8 @@ def face_services(speak):
         else:
             speak("Unknown command. Please say 'train', 'identify', or 'stop'.")
     # No repeating of full instructions after the first time
-    cap.release()
+    # the shared camera stays open for the other services
     cv2.destroyAllWindows()
-    print("[DEBUG] Webcam and windows released.")
 def main():
     face_services(speak=speak)
 if __name__ == "__main__":
@@ -0,0 +1,201 @@
+"""
+Shared face service: one resident InsightFace detector and an in-memory face gallery.
+
+- The FaceAnalysis('buffalo_l') model is loaded once per process (on first use)
+  instead of on every request.
+- The gallery is kept as an L2-normalised float32 matrix, memory-mapped from a
+  cache file next to faces.db (<db>.gallery.f32 + <db>.gallery.json). Only rows
+  inserted since the last refresh (by rowid) are read from SQLite and appended.
+- All detected faces are matched against the whole gallery with one matrix
+  product + top-k, instead of a Python loop per face and per stored embedding.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+MATCH_THRESHOLD = 0.5
+DET_SIZE = (640, 640)
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class FaceService:
+    def __init__(self, db_path='faces.db', providers=('CPUExecutionProvider',), det_size=DET_SIZE):
+        self.db_path = db_path
+        self.providers = list(providers)
+        self.det_size = det_size
+        self.matrix_path = db_path + '.gallery.f32'
+        self.meta_path = db_path + '.gallery.json'
+
+        self._detector = None
+        self._detector_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+        self.names = []
+        self.last_rowid = 0
+        self.dim = None
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._loaded = False
+
+    # -------------------- detector --------------------
+    @property
+    def detector(self):
+        """Resident FaceAnalysis model (loaded once)."""
+        if self._detector is None:
+            with self._detector_lock:
+                if self._detector is None:
+                    from insightface.app import FaceAnalysis
+                    app = FaceAnalysis(name='buffalo_l', providers=self.providers)
+                    app.prepare(ctx_id=0, det_size=self.det_size)
+                    self._detector = app
+        return self._detector
+
+    def detect(self, img):
+        return self.detector.get(img)
+
+    # -------------------- database --------------------
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE IF NOT EXISTS faces (name TEXT, embedding BLOB)')
+        return conn
+
+    def save_face(self, name, embedding):
+        """Insert a face into faces.db and add it to the gallery."""
+        conn = self._connect()
+        try:
+            conn.execute('INSERT INTO faces (name, embedding) VALUES (?, ?)',
+                         (name, np.asarray(embedding, dtype=np.float32).tobytes()))
+            conn.commit()
+        finally:
+            conn.close()
+        self.refresh()
+
+    # -------------------- gallery --------------------
+    def _load_cache(self):
+        """Open the memory-mapped gallery cache; returns False if it is missing or inconsistent."""
+        try:
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+            names, dim = meta['names'], meta['dim']
+            size = os.path.getsize(self.matrix_path)
+        except (OSError, ValueError, KeyError):
+            return False
+        if dim is None or size != len(names) * dim * 4:
+            return False
+        self.names, self.dim, self.last_rowid = names, dim, meta['last_rowid']
+        self._map()
+        return True
+
+    def _map(self):
+        if self.names:
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode='r',
+                                     shape=(len(self.names), self.dim))
+        else:
+            self._matrix = np.empty((0, self.dim or 0), dtype=np.float32)
+
+    def _unmap(self):
+        # Windows refuses to resize a file while a mapping of it is open
+        self._matrix = np.empty((0, self.dim or 0), dtype=np.float32)
+
+    def _write_meta(self):
+        tmp = self.meta_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'names': self.names, 'dim': self.dim, 'last_rowid': self.last_rowid}, f)
+        os.replace(tmp, self.meta_path)
+
+    def _rebuild(self):
+        self._unmap()
+        self.names, self.dim, self.last_rowid = [], None, 0
+        open(self.matrix_path, 'wb').close()
+        self._write_meta()
+        self._map()
+
+    def refresh(self):
+        """Append rows inserted into faces.db since the last refresh (full rebuild if rows were deleted)."""
+        with self._lock:
+            if not self._loaded:
+                if not self._load_cache():
+                    self._rebuild()
+                self._loaded = True
+
+            conn = self._connect()
+            try:
+                count, max_rowid = conn.execute('SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM faces').fetchone()
+                if max_rowid < self.last_rowid or count < len(self.names):
+                    self._rebuild()  # database was edited or replaced
+                rows = conn.execute('SELECT rowid, name, embedding FROM faces WHERE rowid > ? ORDER BY rowid',
+                                    (self.last_rowid,)).fetchall()
+            finally:
+                conn.close()
+            if not rows:
+                return
+
+            embeddings = [np.frombuffer(blob, dtype=np.float32) for _, _, blob in rows]
+            if self.dim is None:
+                self.dim = embeddings[0].size
+            keep = [i for i, e in enumerate(embeddings) if e.size == self.dim]
+            if keep:
+                self._unmap()
+                with open(self.matrix_path, 'ab') as f:
+                    _normalize(np.stack([embeddings[i] for i in keep])).tofile(f)
+                self.names.extend(rows[i][1] for i in keep)
+            self.last_rowid = rows[-1][0]
+            self._write_meta()
+            self._map()
+
+    def __len__(self):
+        return len(self.names)
+
+    # -------------------- matching --------------------
+    def match(self, embeddings, top_k=3, threshold=MATCH_THRESHOLD):
+        """
+        Match face embeddings against the gallery.
+
+        Returns one list per embedding of up to top_k (name, similarity) pairs,
+        best first, one entry per person, filtered by threshold.
+        """
+        self.refresh()
+        queries = _normalize(embeddings)
+        with self._lock:
+            gallery, names = self._matrix, list(self.names)
+        if not names or queries.shape[1] != gallery.shape[1]:
+            return [[] for _ in range(len(queries))]
+
+        sims = queries @ gallery.T  # (faces, gallery) cosine similarities
+        # a person can have several records: take a few extra candidates so top_k distinct names survive
+        k = min(len(names), top_k * 4)
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        results = []
+        for row, idx in enumerate(top):
+            idx = idx[np.argsort(-sims[row, idx])]
+            seen, matches = set(), []
+            for j in idx:
+                sim = float(sims[row, j])
+                if sim <= threshold or len(matches) == top_k:
+                    break
+                if names[j] not in seen:
+                    seen.add(names[j])
+                    matches.append((names[j], sim))
+            results.append(matches)
+        return results
+
+    def recognize(self, img, threshold=MATCH_THRESHOLD, top_k=3):
+        """Detect faces in a BGR image and match them; returns [(face, matches)]."""
+        faces = self.detect(img)
+        if not faces:
+            return []
+        matches = self.match(np.stack([f.embedding for f in faces]), top_k=top_k, threshold=threshold)
+        return list(zip(faces, matches))
+
+
+face_service = FaceService()
@@ -0,0 +1,143 @@
+"""
+GPIO backends for the smart stick (sensor.py).
+
+- RPiBackend: the real HC-SR04 / flame / water sensors and buzzer through RPi.GPIO.
+- SimulatedBackend: replays a recorded sensor trace (CSV) in real time, so the
+  sensor pipeline and reaction-time benchmarks run on a normal Linux box.
+
+Both return logical readings: distance in cm (999 = nothing / invalid),
+fire/water True when detected (the real sensors are active LOW).
+
+Trace format (CSV with header), values hold until the next row:
+    t,distance,fire,water
+    0.0,180,0,0
+    2.5,45,0,0
+"""
+
+import csv
+import threading
+import time
+
+NO_ECHO = 999  # "nothing in range" / invalid reading
+
+# ---------------------------
+# PIN SETUP
+# ---------------------------
+TRIG = 23      # Pin 16
+ECHO = 24      # Pin 18 (with voltage divider)
+FLAME = 17
+WATER = 27
+BUZZER = 18    # Pin 12 (IO pin)
+# Power pins (5V, GND) are directly wired, no code needed
+
+
+class RPiBackend:
+    def __init__(self):
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setwarnings(False)
+        GPIO.setup(TRIG, GPIO.OUT)
+        GPIO.setup(ECHO, GPIO.IN)
+        GPIO.setup(FLAME, GPIO.IN)
+        GPIO.setup(WATER, GPIO.IN)
+        GPIO.setup(BUZZER, GPIO.OUT)
+        # Initialize buzzer to OFF state
+        GPIO.output(BUZZER, False)
+        GPIO.output(TRIG, False)
+
+    def read_distance(self):
+        """One ultrasonic ping in cm (NO_ECHO on timeout or out of range)."""
+        GPIO = self.GPIO
+        GPIO.output(TRIG, True)
+        time.sleep(0.00001)
+        GPIO.output(TRIG, False)
+
+        pulse_start = pulse_end = time.time()
+        timeout = time.time() + 0.03  # 30ms: echo for 4m takes ~24ms
+
+        while GPIO.input(ECHO) == 0:
+            pulse_start = time.time()
+            if pulse_start > timeout:
+                return NO_ECHO
+        while GPIO.input(ECHO) == 1:
+            pulse_end = time.time()
+            if pulse_end > timeout:
+                return NO_ECHO
+
+        distance = round((pulse_end - pulse_start) * 17150, 2)
+        # Filter out invalid readings
+        if distance > 400 or distance < 2:
+            return NO_ECHO
+        return distance
+
+    def read_fire(self):
+        return self.GPIO.input(FLAME) == 0  # Active LOW
+
+    def read_water(self):
+        return self.GPIO.input(WATER) == 0  # Active LOW
+
+    def buzzer(self, on):
+        self.GPIO.output(BUZZER, bool(on))
+
+    def cleanup(self):
+        self.GPIO.output(BUZZER, False)
+        self.GPIO.cleanup()
+
+
+def load_trace(path):
+    """[(t, distance, fire, water)] sorted by t."""
+    rows = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            rows.append((float(row["t"]), float(row["distance"]),
+                         row["fire"].strip() not in ("0", "", "false", "False"),
+                         row["water"].strip() not in ("0", "", "false", "False")))
+    rows.sort(key=lambda r: r[0])
+    return rows
+
+
+class SimulatedBackend:
+    """Replays a trace against the wall clock; records buzzer changes as (t, on)."""
+
+    def __init__(self, trace, speed=1.0):
+        self.trace = load_trace(trace) if isinstance(trace, str) else list(trace)
+        self.speed = speed
+        self.start_time = time.monotonic()
+        self.buzzer_events = []
+        self._lock = threading.Lock()
+
+    def now(self):
+        """Seconds into the trace."""
+        return (time.monotonic() - self.start_time) * self.speed
+
+    @property
+    def duration(self):
+        return self.trace[-1][0] if self.trace else 0.0
+
+    def _current(self):
+        t = self.now()
+        current = (0.0, NO_ECHO, False, False)
+        for row in self.trace:
+            if row[0] > t:
+                break
+            current = row
+        return current
+
+    def read_distance(self):
+        time.sleep(0.002)  # roughly the time a real ping takes at short range
+        return self._current()[1]
+
+    def read_fire(self):
+        return self._current()[2]
+
+    def read_water(self):
+        return self._current()[3]
+
+    def buzzer(self, on):
+        with self._lock:
+            if not self.buzzer_events or self.buzzer_events[-1][1] != bool(on):
+                self.buzzer_events.append((self.now(), bool(on)))
+
+    def cleanup(self):
+        self.buzzer(False)
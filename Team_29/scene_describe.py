@@ -10,30 +10,18 @@ import cv2
 import numpy as np
 import base64
 import requests
-import sqlite3
 import os
 import time
 import speech_recognition as sr
-from insightface.app import FaceAnalysis
-
-from elevenlabs.client import ElevenLabs
-from elevenlabs import play
-
-client = ElevenLabs(
-    api_key=os.getenv("ELEVEN_LABS_API_KEY")
-)
+from face.face_service import face_service
+from camera import capture
+from tts_cache import get_speaker
 
 def speak(text, pause=0.7):
-    """Text-to-speech using ElevenLabs"""
+    """Text-to-speech using ElevenLabs (repeated phrases come from the audio cache)"""
     print(f"🔊 {text}")
     try:
-        audio = client.text_to_speech.convert(
-            text=text,
-            voice_id="JBFqnCBsd6RMkjVDRZzb",
-            model_id="eleven_multilingual_v2",
-            output_format="mp3_44100_128",
-        )
-        play(audio)
+        get_speaker("elevenlabs").speak(text)
         time.sleep(pause)
     except Exception as e:
         print(f"[TTS ERROR] {e}")
@@ -66,18 +54,14 @@ def get_faces_in_scene(image_path):
         List of recognized people with their positions and confidence scores
     """
     try:
-        # Initialize InsightFace
-        app = FaceAnalysis(name='buffalo_l', providers=['CPUExecutionProvider'])
-        app.prepare(ctx_id=0, det_size=(640, 640))
-        
         # Load image
         img = cv2.imread(image_path)
         if img is None:
             print("❌ Failed to load image")
             return []
         
-        # Detect faces
-        faces = app.get(img)
+        # Detect faces (resident detector, loaded once per process)
+        faces = face_service.detect(img)
         
         if len(faces) == 0:
             print("ℹ️ No faces detected in the scene")
@@ -85,37 +69,17 @@ def get_faces_in_scene(image_path):
         
         print(f"👤 Detected {len(faces)} face(s)")
         
-        # Connect to face database
-        conn = sqlite3.connect('faces.db')
-        c = conn.cursor()
-        c.execute('SELECT name, embedding FROM faces')
-        stored_faces = c.fetchall()
-        conn.close()
-        
-        if not stored_faces:
+        # Match all faces against the gallery at once (match() picks up newly saved faces)
+        matches = face_service.match(np.stack([face.embedding for face in faces]), top_k=1)
+        if not len(face_service):
             print("ℹ️ No faces in database to compare")
             return []
         
         recognized_people = []
         img_height, img_width = img.shape[:2]
         
-        for idx, face in enumerate(faces):
-            detected_embedding = face.embedding.astype(np.float32)
-            best_match = None
-            best_similarity = 0.0
-            
-            # Compare with stored faces
-            for name, stored_embedding_blob in stored_faces:
-                stored_embedding = np.frombuffer(stored_embedding_blob, dtype=np.float32)
-                
-                # Cosine similarity
-                similarity = np.dot(detected_embedding, stored_embedding) / (
-                    np.linalg.norm(detected_embedding) * np.linalg.norm(stored_embedding)
-                )
-                
-                if similarity > best_similarity and similarity > 0.5:
-                    best_similarity = similarity
-                    best_match = name
+        for idx, (face, face_matches) in enumerate(zip(faces, matches)):
+            best_match, best_similarity = face_matches[0] if face_matches else (None, 0.0)
             
             if best_match:
                 # Get face bounding box
@@ -145,7 +109,7 @@ def get_faces_in_scene(image_path):
                 
                 print(f"✅ Recognized: {best_match} (confidence: {best_similarity:.2f}) at {position} {vertical_pos}")
             else:
-                print(f"❓ Face {idx+1} not recognized (best similarity: {best_similarity:.2f})")
+                print(f"❓ Face {idx+1} not recognized")
         
         return recognized_people
         
@@ -315,20 +279,14 @@ def scene_describe_service(speak_func):
             speak_func("Get ready to show the scene to the camera. Capturing in 3 seconds.")
             time.sleep(3)
             
-            # Capture image
-            cap = cv2.VideoCapture(0)
-            ret, frame = cap.read()
-            cap.release()
+            # Capture image from the shared camera and save it
+            image_path = 'temp/enhanced_scene.jpg'
+            ret, frame = capture(image_path)
             
             if not ret:
                 speak_func("Failed to capture image from webcam.")
                 continue
             
-            # Save image
-            image_path = 'temp/enhanced_scene.jpg'
-            os.makedirs('temp', exist_ok=True)
-            cv2.imwrite(image_path, frame)
-            
             # Get enhanced description
             description = enhanced_scene_description(image_path)
             
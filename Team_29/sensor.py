@@ -1,198 +1,361 @@
-import RPi.GPIO as GPIO
+"""
+Smart stick: obstacle / water / fire alerts.
+
+Pipeline (each stage on its own thread, so speaking never stops the sensing):
+    Sampler  -> reads the sensors at SAMPLE_HZ, median-filters the ultrasonic distance
+    SmartStick.on_reading -> turns readings into alerts (priority, buzzer pattern, sentence)
+    Buzzer   -> plays the current pattern in a loop; a new pattern pre-empts it immediately
+    Speaker  -> priority queue of sentences; a more urgent alert interrupts a less urgent one,
+                superseded and stale sentences are dropped
+
+Run on the Raspberry Pi:          python sensor.py
+Replay a recorded trace instead:  python sensor.py --simulate traces/sample_walk.csv
+(the simulation prints buzzer/speech reaction times when the trace ends)
+"""
+
+import argparse
+import heapq
+import statistics
+import threading
 import time
-import pyttsx3
+from collections import deque
 
-# Initialize Text-to-Speech
-engine = pyttsx3.init()
-engine.setProperty('rate', 150)  # Speed of speech
-engine.setProperty('volume', 1.0)  # Volume (0.0 to 1.0)
+from gpio_backend import RPiBackend, SimulatedBackend
 
-GPIO.setmode(GPIO.BCM)
-GPIO.setwarnings(False)
+SAMPLE_HZ = 20         # sensor reads per second
+MEDIAN_WINDOW = 5      # ultrasonic readings in the median filter
+OBSTACLE_CM = 50
+ALERT_COOLDOWN = 3     # seconds between repeated voice alerts for the same situation
+SPEECH_TTL = 2.0       # sentences not started within this many seconds are dropped
 
 # ---------------------------
-# PIN SETUP (Updated)
+# BUZZER PATTERNS
 # ---------------------------
+obstacle_pattern = [(0.1, 0.2)]
+water_pattern = [(0.3, 0.3)]
+fire_pattern = [(0.1, 0.1)] * 5
+fire_water_pattern = [(0.1, 0.1), (0.1, 0.1), (0.3, 0.2)]
+fire_water_obstacle_pattern = [(0.5, 0.1)]
 
-# Ultrasonic
-TRIG = 23      # Pin 16
-ECHO = 24      # Pin 18 (with voltage divider)
-
-# Sensors (same as before, change if needed)
-FLAME = 17
-WATER = 27
+CLEAR_PRIORITY = 9
+
+
+def classify(dist, fire, water):
+    """(priority, state, pattern, sentence) for a reading; lower priority = more urgent."""
+    obstacle = dist < OBSTACLE_CM
+    if fire and water and obstacle:
+        return 0, "fire+water+obstacle", fire_water_obstacle_pattern, \
+            "Critical alert! Fire, water, and obstacle detected ahead. Stop immediately!"
+    if fire and water:
+        return 1, "fire+water", fire_water_pattern, "Warning! Fire and water detected. Danger ahead!"
+    if fire and obstacle:
+        return 2, "fire+obstacle", fire_pattern, \
+            f"Fire detected with obstacle at {int(dist)} centimeters. Move carefully!"
+    if fire:
+        return 3, "fire", fire_pattern, "Fire detected! Danger ahead!"
+    if water and obstacle:
+        return 4, "water+obstacle", water_pattern, f"Water and obstacle detected at {int(dist)} centimeters ahead."
+    if water:
+        return 5, "water", water_pattern, "Water detected on the ground."
+    if obstacle:
+        return 6, "obstacle", obstacle_pattern, f"Obstacle detected at {int(dist)} centimeters ahead."
+    return CLEAR_PRIORITY, "clear", None, "Path is clear"
 
-# Buzzer
-BUZZER = 18    # Pin 12 (IO pin)
 
-# Power pins (5V, GND) are directly wired, no code needed
+# ---------------------------
+# SAMPLING
+# ---------------------------
 
-GPIO.setup(TRIG, GPIO.OUT)
-GPIO.setup(ECHO, GPIO.IN)
-GPIO.setup(FLAME, GPIO.IN)
-GPIO.setup(WATER, GPIO.IN)
-GPIO.setup(BUZZER, GPIO.OUT)
+class Sampler(threading.Thread):
+    """Reads all sensors at a fixed rate and hands (distance, fire, water) to a callback."""
+
+    def __init__(self, backend, callback, rate=SAMPLE_HZ, window=MEDIAN_WINDOW):
+        super().__init__(name="sampler", daemon=True)
+        self.backend = backend
+        self.callback = callback
+        self.period = 1.0 / rate
+        self.distances = deque(maxlen=window)
+        self.running = threading.Event()
+        self.running.set()
+
+    def run(self):
+        next_tick = time.monotonic()
+        while self.running.is_set():
+            self.distances.append(self.backend.read_distance())
+            # the median drops single echo glitches (e.g. one NO_ECHO among real readings)
+            dist = statistics.median(self.distances)
+            self.callback(dist, self.backend.read_fire(), self.backend.read_water())
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()  # fell behind: don't try to catch up in a burst
+
+    def stop(self):
+        self.running.clear()
 
-# Initialize buzzer to OFF state
-GPIO.output(BUZZER, False)
-GPIO.output(TRIG, False)
 
 # ---------------------------
-# BUZZER PATTERNS
+# OUTPUT WORKERS
 # ---------------------------
 
-def speak(text):
-    """Text-to-speech output"""
-    print(f"🔊 {text}")
-    engine.say(text)
-    engine.runAndWait()
+class Buzzer(threading.Thread):
+    """Loops the current pattern; set_pattern() takes effect immediately."""
+
+    def __init__(self, backend):
+        super().__init__(name="buzzer", daemon=True)
+        self.backend = backend
+        self.pattern = None
+        self.changed = threading.Event()
+        self.running = True
+
+    def set_pattern(self, pattern):
+        if pattern is not self.pattern:
+            self.pattern = pattern
+            self.changed.set()
+
+    def run(self):
+        while self.running:
+            pattern = self.pattern
+            self.changed.clear()
+            if pattern is None:
+                self.backend.buzzer(False)
+                self.changed.wait()
+                continue
+            for on, off in pattern:
+                self.backend.buzzer(True)
+                if self.changed.wait(on):
+                    break
+                self.backend.buzzer(False)
+                if self.changed.wait(off):
+                    break
+        self.backend.buzzer(False)
+
+    def stop(self):
+        self.running = False
+        self.changed.set()
+
+
+class Speaker(threading.Thread):
+    """
+    Speaks queued sentences, most urgent first. A new alert drops queued
+    sentences that are no more urgent than itself, and interrupts the sentence
+    being spoken if that one is less urgent.
+    """
+
+    def __init__(self, speak, interrupt=None, clock=time.monotonic, on_start=None):
+        super().__init__(name="speaker", daemon=True)
+        self.speak = speak
+        self.interrupt = interrupt
+        self.clock = clock
+        self.on_start = on_start
+        self.queue = []  # (priority, seq, created, text)
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.speaking = None  # priority of the sentence being spoken
+        self.running = True
+
+    def say(self, text, priority):
+        with self.cond:
+            self.queue = [item for item in self.queue if item[0] < priority]
+            heapq.heapify(self.queue)
+            self.seq += 1
+            heapq.heappush(self.queue, (priority, self.seq, self.clock(), text))
+            preempt = self.speaking is not None and priority < self.speaking
+            self.cond.notify()
+        if preempt and self.interrupt is not None:
+            try:
+                self.interrupt()
+            except Exception as e:
+                print(f"[TTS ERROR] could not interrupt: {e}")
+
+    def run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.queue or not self.running)
+                if not self.running:
+                    return
+                priority, _, created, text = heapq.heappop(self.queue)
+                if self.clock() - created > SPEECH_TTL:
+                    continue  # the situation has likely changed since
+                self.speaking = priority
+            if self.on_start is not None:
+                self.on_start(text)
+            try:
+                self.speak(text)
+            except Exception as e:
+                print(f"[TTS ERROR] {e}")
+            with self.cond:
+                self.speaking = None
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+
+
+def pyttsx3_voice():
+    """(speak, interrupt) using pyttsx3; the engine is created on the speaker thread that uses it."""
+    local = threading.local()
+    engines = []
+
+    def engine():
+        if not hasattr(local, "engine"):
+            import pyttsx3
+            local.engine = pyttsx3.init()
+            local.engine.setProperty('rate', 150)  # Speed of speech
+            local.engine.setProperty('volume', 1.0)  # Volume (0.0 to 1.0)
+            engines.append(local.engine)
+        return local.engine
+
+    def speak(text):
+        print(f"🔊 {text}")
+        e = engine()
+        e.say(text)
+        e.runAndWait()
+
+    def interrupt():
+        for e in engines:
+            e.stop()
+
+    return speak, interrupt
+
+
+def printed_voice(words_per_second=2.5):
+    """(speak, interrupt) that prints and takes about as long as speaking would (simulation)."""
+    interrupted = threading.Event()
+
+    def speak(text):
+        print(f"🔊 {text}")
+        interrupted.clear()
+        interrupted.wait(len(text.split()) / words_per_second)
+
+    return speak, interrupted.set
 
-def beep(pattern):
-    for on, off in pattern:
-        GPIO.output(BUZZER, True)
-        time.sleep(on)
-        GPIO.output(BUZZER, False)
-        time.sleep(off)
-
-obstacle_pattern = [(0.1, 0.2)]
-water_pattern = [(0.3, 0.3)]
-fire_pattern = [(0.1, 0.1)] * 5
-fire_water_pattern = [(0.1, 0.1), (0.1, 0.1), (0.3, 0.2)]
-fire_water_obstacle_pattern = [(0.5, 0.1)]
 
 # ---------------------------
-# Measure Ultrasonic Distance
+# ALERT ARBITRATION
 # ---------------------------
 
-def get_distance():
-    GPIO.output(TRIG, False)
-    time.sleep(0.01)
-
-    GPIO.output(TRIG, True)
-    time.sleep(0.00001)
-    GPIO.output(TRIG, False)
-
-    pulse_start = time.time()
-    pulse_end = time.time()
-    timeout = time.time() + 0.1  # 100ms timeout
-
-    while GPIO.input(ECHO) == 0:
-        pulse_start = time.time()
-        if time.time() > timeout:
-            return 999  # Return large distance on timeout
-
-    while GPIO.input(ECHO) == 1:
-        pulse_end = time.time()
-        if time.time() > timeout:
-            return 999  # Return large distance on timeout
-
-    duration = pulse_end - pulse_start
-    distance = duration * 17150
-    distance = round(distance, 2)
-    
-    # Filter out invalid readings
-    if distance > 400 or distance < 2:
-        return 999  # Return large distance for invalid readings
-    
-    return distance
+class SmartStick:
+    def __init__(self, backend, speak, interrupt=None, clock=time.monotonic):
+        self.backend = backend
+        self.clock = clock
+        self.state = "clear"
+        self.last_alert_time = 0.0
+        self.state_log = []   # (time, state)
+        self.speech_log = []  # (time, sentence)
+        self.buzzer = Buzzer(backend)
+        self.speaker = Speaker(speak, interrupt, clock=clock,
+                               on_start=lambda text: self.speech_log.append((self.clock(), text)))
+        self.sampler = Sampler(backend, self.on_reading)
+
+    def on_reading(self, dist, fire, water):
+        priority, state, pattern, sentence = classify(dist, fire, water)
+        now = self.clock()
+        changed = state != self.state
+        if changed:
+            print(f"Distance: {dist}cm  Fire: {fire}  Water: {water}  -> {state}")
+            self.state_log.append((now, state))
+            self.buzzer.set_pattern(pattern)
+
+        if state == "clear":
+            if changed:
+                self.speaker.say(sentence, priority)
+                self.last_alert_time = now
+        elif changed or now - self.last_alert_time >= ALERT_COOLDOWN:
+            self.speaker.say(sentence, priority)
+            self.last_alert_time = now
+        self.state = state
+
+    def start(self):
+        self.buzzer.start()
+        self.speaker.start()
+        self.sampler.start()
+        self.speaker.say("System Ready", CLEAR_PRIORITY)
+
+    def stop(self):
+        self.sampler.stop()
+        self.buzzer.stop()
+        self.speaker.stop()
+        self.sampler.join(timeout=1.0)
+        self.buzzer.join(timeout=1.0)
+
+
+def reaction_report(trace, state_log, speech_log):
+    """Delay from each hazard onset in the trace to its detection (buzzer pattern switch) and first speech."""
+    onsets = []
+    previous = "clear"
+    for t, dist, fire, water in trace:
+        state = classify(dist, fire, water)[1]
+        if state != previous and state != "clear":
+            onsets.append((t, state))
+        previous = state
+
+    detect_delays, speech_delays = [], []
+    for t, state in onsets:
+        detected = [lt for lt, logged in state_log if logged == state and lt >= t]
+        spoken = [st for st, _ in speech_log if st >= t]
+        if detected:
+            detect_delays.append(detected[0] - t)
+        if spoken:
+            speech_delays.append(spoken[0] - t)
+        print(f"  t={t:6.2f}s {state:<20} buzzer +{(detected[0] - t) * 1000 if detected else float('nan'):6.0f} ms"
+              f"  speech +{(spoken[0] - t) * 1000 if spoken else float('nan'):6.0f} ms")
+    for name, delays in (("buzzer", detect_delays), ("speech", speech_delays)):
+        if delays:
+            print(f"{name}: median {statistics.median(delays) * 1000:.0f} ms, max {max(delays) * 1000:.0f} ms "
+                  f"over {len(delays)} hazard onsets")
+
 
 # ---------------------------
-# MAIN LOOP
+# MAIN
 # ---------------------------
 
-speak("Smart Stick System Starting")
-print("⏳ Warming up sensors...")
-time.sleep(2)  # Give sensors time to stabilize
-GPIO.output(BUZZER, False)  # Ensure buzzer is off
-speak("System Ready")
-print("✅ System Ready!\n")
-
-# State tracking for coordinated alerts
-last_alert_time = 0
-alert_cooldown = 3  # seconds between voice alerts
-previous_state = {"obstacle": False, "water": False, "fire": False}
-
-try:
-    while True:
-        dist = get_distance()
-        fire = GPIO.input(FLAME) == 0  # Active LOW
-        water = GPIO.input(WATER) == 0  # Active LOW
-        obstacle = dist < 50
-
-        current_time = time.time()
-        current_state = {"obstacle": obstacle, "water": water, "fire": fire}
-        
-        # Check if state changed
-        state_changed = current_state != previous_state
-        can_alert = (current_time - last_alert_time) >= alert_cooldown
-
-        print(f"Distance: {dist}cm  Fire: {fire}  Water: {water}  Obstacle: {obstacle}")
-
-        # Coordinated priority alerts with voice
-        if fire and water and obstacle:
-            print("🔥💧🚧 MULTIPLE DANGERS")
-            beep(fire_water_obstacle_pattern)
-            if state_changed or can_alert:
-                speak("Critical alert! Fire, water, and obstacle detected ahead. Stop immediately!")
-                last_alert_time = current_time
-
-        elif fire and water:
-            print("🔥💧 FIRE + WATER")
-            beep(fire_water_pattern)
-            if state_changed or can_alert:
-                speak("Warning! Fire and water detected. Danger ahead!")
-                last_alert_time = current_time
-
-        elif fire and obstacle:
-            print("🔥🚧 FIRE + OBSTACLE")
-            beep(fire_pattern)
-            if state_changed or can_alert:
-                speak(f"Fire detected with obstacle at {int(dist)} centimeters. Move carefully!")
-                last_alert_time = current_time
-
-        elif water and obstacle:
-            print("💧🚧 WATER + OBSTACLE")
-            beep(water_pattern)
-            if state_changed or can_alert:
-                speak(f"Water and obstacle detected at {int(dist)} centimeters ahead.")
-                last_alert_time = current_time
-
-        elif fire:
-            print("🔥 FIRE DETECTED")
-            beep(fire_pattern)
-            if state_changed or can_alert:
-                speak("Fire detected! Danger ahead!")
-                last_alert_time = current_time
-
-        elif water:
-            print("💧 WATER DETECTED")
-            beep(water_pattern)
-            if state_changed or can_alert:
-                speak("Water detected on the ground.")
-                last_alert_time = current_time
-
-        elif obstacle:
-            print("🚧 OBSTACLE DETECTED")
-            beep(obstacle_pattern)
-            if state_changed or can_alert:
-                speak(f"Obstacle detected at {int(dist)} centimeters ahead.")
-                last_alert_time = current_time
-
+def main():
+    parser = argparse.ArgumentParser(description="Smart stick sensor alerts")
+    parser.add_argument("--simulate", metavar="TRACE", help="replay a recorded sensor trace (CSV) instead of GPIO")
+    parser.add_argument("--speed", type=float, default=1.0, help="trace replay speed (simulation only)")
+    args = parser.parse_args()
+
+    if args.simulate:
+        backend = SimulatedBackend(args.simulate, speed=args.speed)
+        speak, interrupt = printed_voice()
+        clock = backend.now
+    else:
+        backend = RPiBackend()
+        speak, interrupt = pyttsx3_voice()
+        clock = time.monotonic
+
+    stick = SmartStick(backend, speak, interrupt, clock=clock)
+    if not args.simulate:
+        speak("Smart Stick System Starting")
+        print("⏳ Warming up sensors...")
+        time.sleep(2)  # Give sensors time to stabilize
+    stick.start()
+    print("✅ System Ready!\n")
+
+    try:
+        if args.simulate:
+            while backend.now() < backend.duration + 1.0:
+                time.sleep(0.1)
         else:
-            # Explicitly turn off buzzer when nothing detected
-            GPIO.output(BUZZER, False)
-            # Announce clear path occasionally
-            if previous_state != current_state and any(previous_state.values()):
-                speak("Path is clear")
-                last_alert_time = current_time
-
-        previous_state = current_state.copy()
-        time.sleep(0.5)  # Increased to 0.5s for better voice coordination
-
-except KeyboardInterrupt:
-    print("\n⏹️  Stopping Smart Stick System...")
-    speak("Stopping Smart Stick System")
-    GPIO.output(BUZZER, False)  # Turn off buzzer before cleanup
-    GPIO.cleanup()
-    print("✅ System stopped. Goodbye!")
-    speak("Goodbye")
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping Smart Stick System...")
+    finally:
+        stick.stop()
+        backend.cleanup()
+        print("✅ System stopped. Goodbye!")
+        if not args.simulate:
+            speak("Goodbye")
+
+    if args.simulate:
+        print("\nReaction times:")
+        reaction_report(backend.trace, stick.state_log, stick.speech_log)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Phrase-level text-to-speech cache.
+
+Most prompts ("Listening...", "Please say 'start' or 'stop'", countdowns, ...)
+are the same sentence every time, but were re-synthesised through ElevenLabs /
+pyttsx3 on every call. PhraseCache renders each phrase once and keeps the audio
+on disk, keyed by a hash of engine + voice + text; later calls just play the
+file. Long, one-off texts (e.g. Gemini answers) are rendered without caching.
+
+Engines:
+  elevenlabs  ElevenLabs API (mp3), voice/model as used by agent.speak_llm
+  pyttsx3     local offline engine (wav)
+  stub        writes silent wav files and records what was "played"; no audio
+              device or network needed (set TTS_BACKEND=stub, e.g. for tests)
+
+    from tts_cache import get_speaker
+    get_speaker("pyttsx3").speak("Listening...")
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import wave
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join("temp", "tts_cache"))
+MAX_CACHED_CHARS = 200
+
+ELEVENLABS_VOICE_ID = "JBFqnCBsd6RMkjVDRZzb"
+ELEVENLABS_MODEL_ID = "eleven_multilingual_v2"
+
+
+def play_wav(path):
+    """Play a wav file with whatever the platform has (winsound / aplay / afplay / ffplay)."""
+    if sys.platform == "win32":
+        import winsound
+        winsound.PlaySound(path, winsound.SND_FILENAME)
+        return
+    for cmd in (["aplay", "-q"], ["afplay"], ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"]):
+        if shutil.which(cmd[0]):
+            subprocess.run(cmd + [path], check=True)
+            return
+    raise RuntimeError("no audio player found (aplay/afplay/ffplay)")
+
+
+class ElevenLabsRenderer:
+    name = "elevenlabs"
+    ext = ".mp3"
+
+    def __init__(self, voice_id=ELEVENLABS_VOICE_ID, model_id=ELEVENLABS_MODEL_ID,
+                 output_format="mp3_44100_128"):
+        from elevenlabs.client import ElevenLabs
+        self.client = ElevenLabs(api_key=os.getenv("ELEVEN_LABS_API_KEY"))
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self.output_format = output_format
+        self.voice = f"{voice_id}/{model_id}/{output_format}"
+
+    def render(self, text, path):
+        audio = self.client.text_to_speech.convert(
+            text=text,
+            voice_id=self.voice_id,
+            model_id=self.model_id,
+            output_format=self.output_format,
+        )
+        with open(path, "wb") as f:
+            for chunk in audio:
+                f.write(chunk)
+
+    def play(self, path):
+        from elevenlabs import play
+        with open(path, "rb") as f:
+            play(f.read())
+
+
+class Pyttsx3Renderer:
+    name = "pyttsx3"
+    ext = ".wav"
+
+    def __init__(self, rate=None):
+        import pyttsx3
+        self.engine = pyttsx3.init()
+        if rate:
+            self.engine.setProperty("rate", rate)
+        self.voice = f"{self.engine.getProperty('voice')}/{self.engine.getProperty('rate')}"
+
+    def render(self, text, path):
+        self.engine.save_to_file(text, path)
+        self.engine.runAndWait()
+
+    def play(self, path):
+        play_wav(path)
+
+
+class StubRenderer:
+    """Local stand-in: silent wav (length grows with the text); play() only records the path."""
+    name = "stub"
+    ext = ".wav"
+    voice = "silent"
+
+    def __init__(self):
+        self.played = []
+        self.rendered = 0
+
+    def render(self, text, path):
+        self.rendered += 1
+        with wave.open(path, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(8000)
+            w.writeframes(b"\0\0" * 80 * len(text))
+
+    def play(self, path):
+        self.played.append(path)
+
+
+class PhraseCache:
+    def __init__(self, renderer, cache_dir=TTS_CACHE_DIR, max_chars=MAX_CACHED_CHARS):
+        self.renderer = renderer
+        self.cache_dir = cache_dir
+        self.max_chars = max_chars
+        # engines like pyttsx3 are not thread-safe; also stops two threads rendering one phrase
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, text):
+        key = f"{self.renderer.name}\0{self.renderer.voice}\0{text}".encode("utf-8")
+        return os.path.join(self.cache_dir, hashlib.sha1(key).hexdigest() + self.renderer.ext)
+
+    def audio_for(self, text):
+        """Path of the cached audio for `text`, rendering it first if needed."""
+        path = self.path_for(text)
+        if not os.path.exists(path):
+            with self._lock:
+                if not os.path.exists(path):
+                    # keep the extension: some engines pick the output format from it
+                    tmp = f"{path[:-len(self.renderer.ext)]}.{threading.get_ident()}.tmp{self.renderer.ext}"
+                    self.renderer.render(text, tmp)
+                    os.replace(tmp, path)
+        return path
+
+    def speak(self, text):
+        text = (text or "").strip()
+        if not text:
+            return
+        if len(text) <= self.max_chars:
+            self.renderer.play(self.audio_for(text))
+            return
+        # one-off long text: render to a temp file and drop it afterwards
+        fd, tmp = tempfile.mkstemp(suffix=self.renderer.ext, dir=self.cache_dir)
+        os.close(fd)
+        try:
+            with self._lock:
+                self.renderer.render(text, tmp)
+            self.renderer.play(tmp)
+        finally:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def prewarm(self, phrases, background=False):
+        """
+        Render phrases ahead of time so their first use is already cached.
+        Only use background=True with thread-safe engines (ElevenLabs): pyttsx3
+        drivers must be used from the thread that created them.
+        """
+        def run():
+            for phrase in phrases:
+                try:
+                    self.audio_for(phrase)
+                except Exception as e:
+                    print(f"[TTS CACHE] could not pre-render '{phrase}': {e}")
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="tts-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+
+_speakers = {}
+_speakers_lock = threading.Lock()
+
+
+def get_speaker(engine):
+    """Shared PhraseCache for an engine ('elevenlabs' / 'pyttsx3'); TTS_BACKEND=stub overrides it."""
+    engine = os.getenv("TTS_BACKEND", engine)
+    with _speakers_lock:
+        if engine not in _speakers:
+            renderer = {"elevenlabs": ElevenLabsRenderer, "pyttsx3": Pyttsx3Renderer,
+                        "stub": StubRenderer}[engine]()
+            _speakers[engine] = PhraseCache(renderer)
+        return _speakers[engine]
@@ -1,4 +1,7 @@
-from flask import Flask, jsonify, request
+import dataclasses
+import json
+
+from flask import Flask, Response, jsonify, request, stream_with_context
 from models import GraphDatabase, GNN
 
 app = Flask(__name__)
@@ -13,13 +16,39 @@ if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001)
 
 graph_database = GraphDatabase()
-gnn_model = GNN(graph_database.graph)
+gnn_model = GNN(graph_database.graph, graph_database.store)
+
+
+def _page_args():
+    offset = request.args.get("offset", default=0, type=int)
+    limit = request.args.get("limit", type=int)
+    return max(offset, 0), (None if limit is None else max(limit, 0))
+
+
+def _json_array(items, headers=None):
+    # Stream the array item by item instead of building the whole list and
+    # its JSON document in memory first
+    def generate():
+        yield "["
+        for i, item in enumerate(items):
+            yield ("," if i else "") + json.dumps(dataclasses.asdict(item), default=str)
+        yield "]"
+
+    return Response(stream_with_context(generate()), mimetype="application/json", headers=headers)
 
 
 @app.route("/accounts")
 def get_accounts():
-    accounts = graph_database.get_accounts()
-    return jsonify(accounts)
+    customer_id = request.args.get("customer_id")
+    if customer_id:
+        account = graph_database.get_account_by_customer_id(customer_id)
+        if account is None:
+            return jsonify({"error": f"Customer {customer_id} not found"}), 404
+        return jsonify([account])
+
+    offset, limit = _page_args()
+    accounts = graph_database.iter_accounts(offset, limit)
+    return _json_array(accounts, headers={"X-Total-Count": str(graph_database.count_accounts())})
 
 
 @app.route("/transactions")
@@ -30,10 +59,13 @@ def get_transactions(sender_id=None, receiver_id=None):
     if sender_id is None and receiver_id is None:
         return "Please provide sender_id or receiver_id as query parameter", 400
 
-    transactions = graph_database.get_transactions(
-        filters={"sender_id": sender_id, "receiver_id": receiver_id}
+    offset, limit = _page_args()
+    transactions = graph_database.iter_transactions(
+        filters={"sender_id": sender_id, "receiver_id": receiver_id},
+        offset=offset,
+        limit=limit,
     )
-    return jsonify(transactions)
+    return _json_array(transactions)
 
 
 @app.route("/transactions/new", methods=["POST"])
@@ -45,20 +77,13 @@ def get_transactions_by_sender_receiver():
 
     # Update graph with new transaction
     try:
-        graph = graph_database.graph
         graph_database.create_new_transaction(sender_id, receiver_id, total_amount)
 
-        predicitons = gnn_model.predict(graph)
-
-        # Find Pair prediction
-        node_list = list(graph.nodes)
-        node_indices = {node: idx for idx, node in enumerate(node_list)}
-
-        node_a_ix = node_indices[str(sender_id)]
-        node_b_ix = node_indices[str(receiver_id)]
+        # Score only the pair, on their neighbourhood of the graph
+        scores = gnn_model.predict_nodes([sender_id, receiver_id])
 
-        a_fraud = float(predicitons.flatten()[node_a_ix])
-        b_fraud = float(predicitons.flatten()[node_b_ix])
+        a_fraud = scores[str(sender_id)]
+        b_fraud = scores[str(receiver_id)]
 
         return jsonify(
             {
@@ -72,5 +97,6 @@ def get_transactions_by_sender_receiver():
 
 @app.route("/graphml")
 def get_graphml():
-    # Return the graph in GraphML format
-    return graph_database.get_graphml()
+    # Return the graph in GraphML format; only edges changed since the last
+    # request are re-rendered
+    return Response(graph_database.get_graphml(), mimetype="application/xml")
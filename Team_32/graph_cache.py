@@ -0,0 +1,121 @@
+import os
+import pickle
+import re
+from xml.sax.saxutils import escape, unescape
+
+import networkx as nx
+
+_EDGE_RE = re.compile(r'<edge source="([^"]*)" target="([^"]*)"')
+_EDGE_KEY_RE = re.compile(r'<key id="([^"]+)" for="edge" attr.name="([^"]+)"')
+_DATA_RE = re.compile(r'(<data key="([^"]+)">)(.*?)(</data>)')
+
+
+def load_graph(graphml_path: str, snapshot_path: str = None) -> nx.DiGraph:
+    """
+    Load the graph from a pickle snapshot next to the GraphML file, which is
+    much faster than parsing XML. The snapshot is (re)written whenever it is
+    missing or older than the GraphML file.
+    """
+    snapshot_path = snapshot_path or os.path.splitext(graphml_path)[0] + ".pickle"
+    if os.path.exists(snapshot_path) and os.path.getmtime(snapshot_path) >= os.path.getmtime(graphml_path):
+        try:
+            with open(snapshot_path, "rb") as f:
+                print(f"Loading graph snapshot {snapshot_path}")
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Could not read snapshot {snapshot_path} ({e}), parsing GraphML")
+
+    with open(graphml_path, "r") as f:
+        graph = nx.read_graphml(f)
+    try:
+        tmp = snapshot_path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(graph, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, snapshot_path)
+    except OSError as e:
+        print(f"Could not write snapshot {snapshot_path}: {e}")
+    return graph
+
+
+class GraphMLCache:
+    """
+    GraphML document of the graph, generated once and kept as one text
+    fragment per edge. Updating an edge only marks it dirty; its <data>
+    values are rewritten on the next request instead of regenerating the
+    whole document.
+    """
+
+    def __init__(self, graph: nx.DiGraph):
+        self.graph = graph
+        self.fragments = None
+        self.edge_fragment = {}
+        self.edge_keys = {}
+        self.dirty = set()
+        self._shape = None
+
+    def _build(self):
+        fragments, current = [], []
+        edge_fragment = {}
+        edge_keys = {}
+        in_edge = None
+
+        for line in nx.generate_graphml(self.graph):
+            key = _EDGE_KEY_RE.search(line)
+            if key:
+                edge_keys[key.group(1)] = key.group(2)
+            edge = _EDGE_RE.search(line)
+            if edge:
+                # everything before this edge is one fragment, the edge another
+                fragments.append("".join(current))
+                current = []
+                in_edge = (unescape(edge.group(1)), unescape(edge.group(2)))
+            current.append(line + "\n")
+            closes = line.strip().startswith("</edge>") or (edge and line.rstrip().endswith("/>"))
+            if in_edge is not None and closes:
+                edge_fragment[in_edge] = len(fragments)
+                fragments.append("".join(current))
+                current = []
+                in_edge = None
+        fragments.append("".join(current))
+
+        self.fragments, self.edge_fragment, self.edge_keys = fragments, edge_fragment, edge_keys
+        self.dirty.clear()
+        self._shape = (self.graph.number_of_nodes(), self.graph.number_of_edges())
+
+    def invalidate_edge(self, source, target):
+        self.dirty.add((str(source), str(target)))
+
+    def invalidate(self):
+        self.fragments = None
+
+    def _patch(self, edge):
+        idx = self.edge_fragment.get(edge)
+        if idx is None:
+            self.fragments = None  # edge not in the document: rebuild everything
+            return
+        attrs = self.graph.edges[edge]
+
+        def repl(m):
+            name = self.edge_keys.get(m.group(2))
+            if name is None or name not in attrs:
+                return m.group(0)
+            return m.group(1) + escape(str(attrs[name])) + m.group(4)
+
+        self.fragments[idx] = _DATA_RE.sub(repl, self.fragments[idx])
+
+    def fragments_for_request(self):
+        """Up-to-date list of document fragments (join them or stream them)."""
+        if self._shape != (self.graph.number_of_nodes(), self.graph.number_of_edges()):
+            self.fragments = None
+        if self.fragments is not None:
+            for edge in list(self.dirty):
+                self._patch(edge)
+                if self.fragments is None:
+                    break
+            self.dirty.clear()
+        if self.fragments is None:
+            self._build()
+        return list(self.fragments)
+
+    def document(self) -> str:
+        return "".join(self.fragments_for_request())
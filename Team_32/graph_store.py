@@ -0,0 +1,140 @@
+import numpy as np
+import networkx as nx
+from scipy.sparse import coo_matrix
+
+
+class GraphStore:
+    """
+    Array-backed copy of the transaction graph for inference.
+
+    Edges are kept in CSR order (sorted by source, then target) together with
+    their total_amount / total_transactions, plus a reverse (CSC) index so
+    neighbourhoods can be walked in both directions. New transactions update
+    the arrays in place, and the statistics used to normalise edge features
+    (mean/std, min/max) are kept as running values, so nothing is rebuilt per
+    request.
+    """
+
+    def __init__(self, graph: nx.DiGraph):
+        self.node_list = list(graph.nodes)
+        self.node_index = {node: idx for idx, node in enumerate(self.node_list)}
+        num_nodes = len(self.node_list)
+
+        edges = list(graph.edges(data=True))
+        src = np.fromiter((self.node_index[u] for u, _, _ in edges), dtype=np.int64, count=len(edges))
+        dst = np.fromiter((self.node_index[v] for _, v, _ in edges), dtype=np.int64, count=len(edges))
+        amount = np.array([attrs["total_amount"] for _, _, attrs in edges], dtype=np.float64)
+        count = np.array([attrs["total_transactions"] for _, _, attrs in edges], dtype=np.float64)
+        label = np.array([0 if attrs.get("fraud_proportion", 0) == 0 else 1 for _, _, attrs in edges],
+                         dtype=np.int8)
+        # kept for graphs where all edges have the same total_transactions
+        weight = np.array([attrs.get("weight", 0.0) for _, _, attrs in edges], dtype=np.float64)
+
+        # CSR order
+        order = np.lexsort((dst, src))
+        self.src, self.dst = src[order], dst[order]
+        self.total_amount, self.total_transactions = amount[order], count[order]
+        self.edge_labels, self.static_weight = label[order], weight[order]
+        self.indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.src, minlength=num_nodes), out=self.indptr[1:])
+
+        # reverse index: incoming edges of each node (values are CSR edge positions)
+        in_order = np.argsort(self.dst, kind="stable")
+        self.in_edges = in_order
+        self.in_indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.dst, minlength=num_nodes), out=self.in_indptr[1:])
+
+        self.edge_pos = {(int(u), int(v)): i for i, (u, v) in enumerate(zip(self.src, self.dst))}
+
+        # running statistics for edge feature / weight normalisation
+        self._amount_sum = float(self.total_amount.sum())
+        self._amount_sumsq = float((self.total_amount ** 2).sum())
+        self._count_sum = float(self.total_transactions.sum())
+        self._count_sumsq = float((self.total_transactions ** 2).sum())
+        self._count_max = float(self.total_transactions.max()) if len(edges) else 0.0
+        self._count_min = float(self.total_transactions.min()) if len(edges) else 0.0
+        self._count_min_edges = int((self.total_transactions == self._count_min).sum())
+
+    @property
+    def num_nodes(self):
+        return len(self.node_list)
+
+    @property
+    def num_edges(self):
+        return len(self.src)
+
+    def add_transaction(self, sender, receiver, amount: float):
+        """Add one transaction to an existing edge (sender/receiver are graph node ids)."""
+        pos = self.edge_pos.get((self.node_index[sender], self.node_index[receiver]))
+        if pos is None:
+            raise KeyError(f"no edge {sender} -> {receiver}")
+
+        old_amount, old_count = self.total_amount[pos], self.total_transactions[pos]
+        new_amount, new_count = old_amount + float(amount), old_count + 1
+
+        self.total_amount[pos] = new_amount
+        self.total_transactions[pos] = new_count
+        self._amount_sum += new_amount - old_amount
+        self._amount_sumsq += new_amount ** 2 - old_amount ** 2
+        self._count_sum += new_count - old_count
+        self._count_sumsq += new_count ** 2 - old_count ** 2
+        self._count_max = max(self._count_max, new_count)
+        if old_count == self._count_min:
+            self._count_min_edges -= 1
+            if self._count_min_edges == 0:
+                # the last edge at the minimum moved up; the new minimum is one higher
+                self._count_min = old_count + 1
+                self._count_min_edges = int((self.total_transactions == self._count_min).sum())
+
+    # -------------------- features --------------------
+    def edge_features(self, positions):
+        """Standardised [total_amount, total_transactions] (same as StandardScaler over all edges)."""
+        n = self.num_edges
+        feats = []
+        for values, total, total_sq in ((self.total_amount, self._amount_sum, self._amount_sumsq),
+                                        (self.total_transactions, self._count_sum, self._count_sumsq)):
+            mean = total / n
+            std = np.sqrt(max(total_sq / n - mean ** 2, 0.0))
+            feats.append((values[positions] - mean) / (std if std > 0 else 1.0))
+        return np.stack(feats, axis=-1).astype(np.float32)
+
+    def edge_weights(self, positions):
+        """Min-max normalised total_transactions over all edges."""
+        span = self._count_max - self._count_min
+        if span == 0:
+            return self.static_weight[positions]
+        return (self.total_transactions[positions] - self._count_min) / span
+
+    # -------------------- neighbourhoods --------------------
+    def k_hop_nodes(self, seeds, k):
+        """Sorted indices of all nodes within k hops (either direction) of the seed nodes."""
+        visited = set(seeds)
+        frontier = np.fromiter(visited, dtype=np.int64)
+        for _ in range(k):
+            if not len(frontier):
+                break
+            out_nb = np.concatenate([self.dst[self.indptr[i]:self.indptr[i + 1]] for i in frontier])
+            in_nb = np.concatenate([self.src[self.in_edges[self.in_indptr[i]:self.in_indptr[i + 1]]]
+                                    for i in frontier])
+            new = set(np.concatenate([out_nb, in_nb]).tolist()) - visited
+            visited |= new
+            frontier = np.fromiter(new, dtype=np.int64)
+        return np.array(sorted(visited), dtype=np.int64)
+
+    def subgraph(self, nodes):
+        """
+        Induced subgraph on `nodes` (sorted global indices).
+        Returns (adjacency coo_matrix, edge positions in CSR order); rows/cols
+        are positions in `nodes`.
+        """
+        local = {int(n): i for i, n in enumerate(nodes)}
+        positions = []
+        for n in nodes:
+            start, end = self.indptr[n], self.indptr[n + 1]
+            keep = [p for p in range(start, end) if int(self.dst[p]) in local]
+            positions.extend(keep)
+        positions = np.array(positions, dtype=np.int64)
+        rows = np.array([local[int(u)] for u in self.src[positions]], dtype=np.int64)
+        cols = np.array([local[int(v)] for v in self.dst[positions]], dtype=np.int64)
+        adjacency = coo_matrix((self.edge_weights(positions), (rows, cols)), shape=(len(nodes), len(nodes)))
+        return adjacency, positions
@@ -1,3 +1,4 @@
+import itertools
 import pandas as pd
 import numpy as np
 import dataclasses
@@ -11,6 +12,14 @@ from spektral.data import SingleLoader, Dataset
 from spektral.layers import MessagePassing, EdgeConv
 from tensorflow.keras.models import Model
 from tensorflow.keras.layers import Dense, Concatenate, TFSMLayer
+from spektral.utils.sparse import sp_matrix_to_sp_tensor
+
+from graph_cache import GraphMLCache, load_graph
+from graph_store import GraphStore
+
+# EdgeNodeGCN does one round of message passing, so a node's score only
+# depends on its direct neighbours; predict_nodes() runs on this many hops.
+NUM_HOPS = 1
 
 
 @dataclasses.dataclass
@@ -32,67 +41,78 @@ class AggregatedTransactionBetweenSenderReceiver:
 
 class GraphDatabase:
 
-    def __init__(self):
+    def __init__(self, graphml_path="gnn/data/graph.graphml"):
         print("Loading graph...")
-        with open("gnn/data/graph.graphml", "r") as f:
-            self.graph = nx.read_graphml(f)
-            print("Graph loaded")
-            print(f"Nodes: {self.graph.number_of_nodes()}")
-            print(f"Edges: {self.graph.number_of_edges()}")
+        self.graph = load_graph(graphml_path)
+        print("Graph loaded")
+        print(f"Nodes: {self.graph.number_of_nodes()}")
+        print(f"Edges: {self.graph.number_of_edges()}")
+        self.store = GraphStore(self.graph)
+        self.graphml = GraphMLCache(self.graph)
+
+        # sender -> edges and receiver -> edges are the graph's own successor /
+        # predecessor adjacency; customer ids need their own index
+        self.customer_index = {
+            _customer_key(attrs["customer_id"]): node
+            for node, attrs in self.graph.nodes(data=True)
+        }
 
     def get_graphml(self):
-        return nx.generate_graphml(self.graph)
-
-    def get_accounts(self) -> list[Account]:
-        accounts = []
-        for node, attrs in self.graph.nodes(data=True):
-            is_fraud = attrs["is_fraud"]
-            customer_id = attrs["customer_id"]
-            account = Account(node, customer_id, is_fraud, 0.0)
-            accounts.append(account)
-        return accounts
-
-    def get_transactions(
-        self, filters: dict
-    ) -> list[AggregatedTransactionBetweenSenderReceiver]:
-        transactions = []
-        for sender_id, receiver_id, attrs in self.graph.edges(data=True):
-            is_filtered = False
-            is_pair_filtered = filters.get("sender_id") and filters.get("receiver_id")
-
-            if is_pair_filtered:
-                if (
-                    filters["sender_id"] == sender_id
-                    and filters["receiver_id"] == receiver_id
-                ):
-                    is_filtered = True
-            else:
-                if filters.get("sender_id") and filters["sender_id"] == sender_id:
-                    is_filtered = True
-
-                if filters.get("receiver_id") and filters["receiver_id"] != receiver_id:
-                    is_filtered = True
+        return self.graphml.fragments_for_request()
 
-            if not is_filtered:
-                continue
+    def count_accounts(self) -> int:
+        return self.graph.number_of_nodes()
 
-            sender = self.get_account(sender_id)
-            receiver = self.get_account(receiver_id)
+    def iter_accounts(self, offset: int = 0, limit: int = None):
+        stop = None if limit is None else offset + limit
+        for node, attrs in itertools.islice(self.graph.nodes(data=True), offset, stop):
+            yield Account(node, attrs["customer_id"], attrs["is_fraud"], 0.0)
 
-            sender_account = Account(sender_id, sender.customer_id, False, 0.0)
-            receiver_account = Account(receiver_id, receiver.customer_id, False, 0.0)
-            total_amount = attrs["total_amount"]
-            total_transactions = attrs["total_transactions"]
-            fraud_probability = 0.0
-            transaction = AggregatedTransactionBetweenSenderReceiver(
+    def get_accounts(self) -> list[Account]:
+        return list(self.iter_accounts())
+
+    def get_account_by_customer_id(self, customer_id: str) -> Account:
+        node = self.customer_index.get(_customer_key(customer_id))
+        if node is not None:
+            return self.get_account(node)
+
+    def _transaction_edges(self, filters: dict):
+        sender_id = filters.get("sender_id")
+        receiver_id = filters.get("receiver_id")
+        sender_id = str(sender_id) if sender_id else None
+        receiver_id = str(receiver_id) if receiver_id else None
+
+        if sender_id and receiver_id:
+            attrs = self.graph.get_edge_data(sender_id, receiver_id)
+            return [] if attrs is None else [(sender_id, receiver_id, attrs)]
+        if sender_id:
+            if not self.graph.has_node(sender_id):
+                return []
+            return self.graph.out_edges(sender_id, data=True)
+        if receiver_id:
+            if not self.graph.has_node(receiver_id):
+                return []
+            return self.graph.in_edges(receiver_id, data=True)
+        return []
+
+    def iter_transactions(self, filters: dict, offset: int = 0, limit: int = None):
+        stop = None if limit is None else offset + limit
+        edges = itertools.islice(self._transaction_edges(filters), offset, stop)
+        for sender_id, receiver_id, attrs in edges:
+            sender_account = Account(sender_id, self.graph.nodes[sender_id]["customer_id"], False, 0.0)
+            receiver_account = Account(receiver_id, self.graph.nodes[receiver_id]["customer_id"], False, 0.0)
+            yield AggregatedTransactionBetweenSenderReceiver(
                 sender_account,
                 receiver_account,
-                total_amount,
-                total_transactions,
-                fraud_probability,
+                attrs["total_amount"],
+                attrs["total_transactions"],
+                0.0,
             )
-            transactions.append(transaction)
-        return transactions
+
+    def get_transactions(
+        self, filters: dict
+    ) -> list[AggregatedTransactionBetweenSenderReceiver]:
+        return list(self.iter_transactions(filters))
 
     def get_account(self, id: int) -> Account:
         if self.graph.has_node(str(id)):
@@ -121,11 +141,18 @@ class GraphDatabase:
                 total_amount
             )
             self.graph.edges[pair]["total_transactions"] += 1
+            self.store.add_transaction(*pair, total_amount)
+            self.graphml.invalidate_edge(*pair)
         else:
             raise ValueError(
                 f"There is no existing learned transactions between accounts {sender_id} and {receiver_id}."
             )
 
+
+def _customer_key(customer_id) -> str:
+    # GNN strips the underscores from customer ids in place, accept both forms
+    return str(customer_id).replace("_", "")
+
 # Create a custom dataset class
 class SingleGraphDataset(Dataset):
     def __init__(self, graph, **kwargs):
@@ -157,7 +184,9 @@ class EdgeNodeGCN(Model):
         self.final_dense1 = Dense(32, activation='relu')
         self.final_dense2 = Dense(1, activation='sigmoid')
 
-    @tf.function
+    # predict_nodes() passes subgraphs of a different size every call: trace once
+    # with unknown dimensions instead of once per shape
+    @tf.function(reduce_retracing=True)
     def call(self, inputs):
         x, a, e = inputs
 
@@ -183,11 +212,13 @@ class EdgeNodeGCN(Model):
 
 class GNN:
 
-    def __init__(self, graph: nx.Graph):
+    def __init__(self, graph: nx.Graph, store: GraphStore = None, num_hops: int = NUM_HOPS):
         print("Loading GNN...")
 
         # Import TensorFlow model from exported file
         self.graph = graph
+        self.store = store if store is not None else GraphStore(graph)
+        self.num_hops = num_hops
         self.model = EdgeNodeGCN()
         sample_input = [
             tf.random.uniform((1, 4)),  # Sample node features
@@ -234,7 +265,22 @@ class GNN:
         predictions = self.model.predict(inputs, steps=loader.steps_per_epoch)
         return predictions
 
-        
+    def predict_nodes(self, node_ids) -> dict:
+        """
+        Fraud scores for a few nodes, computed on their k-hop neighbourhood
+        only (same result as predict() on the full graph for those nodes).
+        """
+        seeds = [self.store.node_index[str(node_id)] for node_id in node_ids]
+        nodes = self.store.k_hop_nodes(seeds, self.num_hops)
+        adjacency, positions = self.store.subgraph(nodes)
+
+        x = self.x[nodes]
+        a = sp_matrix_to_sp_tensor(adjacency)
+        e = self.store.edge_features(positions)
+        out = self.model([x, a, e]).numpy().flatten()
+
+        local = {int(n): i for i, n in enumerate(nodes)}
+        return {str(node_id): float(out[local[seed]]) for node_id, seed in zip(node_ids, seeds)}
 
     def _generate_adjency_matrix(self) -> pd.DataFrame:
         print("Generating adjency matrix...")
@@ -274,23 +320,12 @@ class GNN:
             [attrs["weight"] for _, _, attrs in self.graph.edges(data=True)]
         )
 
-        # Create Adjency matrix
-        adjency_matrix_coo_df = pd.DataFrame(
-            [], columns=["source", "target", "weight", "label"]
-        )
-        for ix, edge in enumerate(edge_indices):
-            adjency_matrix_coo_df.loc[len(adjency_matrix_coo_df)] = [
-                int(edge[0]),
-                int(edge[1]),
-                edge_weights[ix],
-                int(self.edge_labels[ix]),
-            ]
-
         num_nodes = len(self.graph.nodes)
 
-        source_nodes = adjency_matrix_coo_df["source"].apply(lambda x: int(x)).values
-        target_nodes = adjency_matrix_coo_df["target"].apply(lambda x: int(x)).values
-        weights = adjency_matrix_coo_df["weight"].values
+        # one vectorised COO build (edges were appended to a DataFrame row by row before)
+        source_nodes = edge_indices[:, 0].astype(int)
+        target_nodes = edge_indices[:, 1].astype(int)
+        weights = edge_weights
 
         return coo_matrix(
             (weights, (source_nodes, target_nodes)),
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark the text processing hot path on a corpus of saved policies
+
+Compares, per document:
+- chunking: previous chunk_text (re-joins the chunk after every word) vs the
+  single-pass chunk_text, and token-aware chunk_by_tokens
+- extraction: BeautifulSoup extract_clean_content_bs4 vs the lxml version
+
+Usage:
+    python bench_text_processing.py [corpus_dir] [--repeat 5] [--tokenizer facebook/bart-large-cnn]
+
+corpus_dir holds saved pages (.html / .htm) and/or cleaned policies (.txt);
+default: tests/fixtures. Text files are only used for the chunking benchmarks.
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import text_processing as tp
+
+
+def chunk_text_previous(text, max_length=1000):
+    """The previous implementation, kept here as the baseline"""
+    words = text.split()
+    chunks = []
+    current_chunk = []
+
+    for word in words:
+        current_chunk.append(word)
+        if len(' '.join(current_chunk)) > max_length:
+            chunks.append(' '.join(current_chunk[:-1]))
+            current_chunk = [word]
+
+    if current_chunk:
+        chunks.append(' '.join(current_chunk))
+
+    return chunks
+
+
+def timed(function, *args, repeat=5):
+    """(median seconds, last result)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def load_corpus(corpus_dir):
+    documents = []
+    for name in sorted(os.listdir(corpus_dir)):
+        extension = os.path.splitext(name)[1].lower()
+        if extension in (".html", ".htm", ".txt"):
+            with open(os.path.join(corpus_dir, name), "r", encoding="utf-8", errors="replace") as f:
+                documents.append((name, extension != ".txt", f.read()))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark policy chunking and content extraction")
+    parser.add_argument("corpus", nargs="?", default=os.path.join("tests", "fixtures"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tokenizer", default="facebook/bart-large-cnn",
+                        help="Hugging Face tokenizer for chunk_by_tokens (skipped if it can't be loaded)")
+    parser.add_argument("--max-tokens", type=int, default=256)
+    args = parser.parse_args()
+
+    tokenizer = None
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    except Exception as e:
+        print(f"[WARNING] Tokenizer {args.tokenizer} not available, skipping chunk_by_tokens: {str(e)[:80]}")
+
+    if tp.lxml is None:
+        print("[WARNING] lxml not installed, extraction comparison uses BeautifulSoup twice")
+
+    documents = load_corpus(args.corpus)
+    print(f"Corpus: {len(documents)} documents from {args.corpus}\n")
+    header = f"{'document':<32} {'chars':>9} {'extract bs4':>12} {'extract lxml':>13} {'chunk old':>10} {'chunk new':>10} {'tokens':>9}"
+    print(header)
+    print("-" * len(header))
+
+    totals = {"bs4": 0.0, "lxml": 0.0, "chunk_old": 0.0, "chunk_new": 0.0, "tokens": 0.0}
+    for name, is_html, content in documents:
+        text = content
+        bs4_time = lxml_time = None
+        if is_html:
+            bs4_time, text_bs4 = timed(tp.extract_clean_content_bs4, content, repeat=args.repeat)
+            lxml_time, text = timed(tp.extract_clean_content, content, repeat=args.repeat)
+            totals["bs4"] += bs4_time
+            totals["lxml"] += lxml_time
+            if text_bs4 != text:
+                print(f"  note: {name}: extracted text differs ({len(text_bs4 or '')} vs {len(text or '')} chars)")
+        text = text or ""
+
+        old_time, old_chunks = timed(chunk_text_previous, text, repeat=args.repeat)
+        new_time, new_chunks = timed(tp.chunk_text, text, repeat=args.repeat)
+        assert old_chunks == new_chunks, f"chunk_text output changed for {name}"
+        totals["chunk_old"] += old_time
+        totals["chunk_new"] += new_time
+
+        token_time = None
+        if tokenizer is not None:
+            token_time, _ = timed(tp.chunk_by_tokens, text, tokenizer, args.max_tokens, repeat=args.repeat)
+            totals["tokens"] += token_time
+
+        def ms(value):
+            return f"{value * 1000:.1f}ms" if value is not None else "-"
+
+        print(f"{name[:32]:<32} {len(content):>9} {ms(bs4_time):>12} {ms(lxml_time):>13} "
+              f"{ms(old_time):>10} {ms(new_time):>10} {ms(token_time):>9}")
+
+    print("-" * len(header))
+    if totals["lxml"]:
+        print(f"Extraction: {totals['bs4'] * 1000:.1f}ms -> {totals['lxml'] * 1000:.1f}ms "
+              f"({totals['bs4'] / totals['lxml']:.1f}x)")
+    if totals["chunk_new"]:
+        print(f"Chunking:   {totals['chunk_old'] * 1000:.1f}ms -> {totals['chunk_new'] * 1000:.1f}ms "
+              f"({totals['chunk_old'] / totals['chunk_new']:.1f}x)")
+    if tokenizer is not None:
+        print(f"Token-aware chunking ({args.max_tokens} tokens): {totals['tokens'] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Per-policy knowledge bases for the chatbot
+
+Every scraped policy (keyed by package name or URL) gets its own chunk
+embedding index, stored on disk as <key>.npy (normalised float32 embeddings)
+plus <key>.json (chunks and metadata). Indexes are built once, loaded lazily
+when a question about that policy comes in, and only the most recently used
+ones are kept in memory.
+
+Retrieval is one matrix product: embeddings are L2-normalised, so
+embeddings @ query is the cosine similarity against every chunk.
+
+Encoders (KB_ENCODER env var):
+- "tinyllama" (default): mean-pooled TinyLlama 1.1B hidden states, batched
+- "minilm": sentence-transformers all-MiniLM-L6-v2, much smaller and faster
+  (needs `pip install sentence-transformers`)
+Indexes remember which encoder built them and are rebuilt if it changes.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+KB_DIR = os.getenv("KB_DIR", "data/knowledge_bases")
+KB_ENCODER = os.getenv("KB_ENCODER", "tinyllama")
+MAX_LOADED_KBS = int(os.getenv("KB_MAX_LOADED", "8"))
+DEFAULT_KB = "default"
+
+# ============================================================================
+# ENCODERS
+# ============================================================================
+
+class TinyLlamaEncoder:
+    """Mean-pooled TinyLlama hidden states (CPU), encoded in padded batches"""
+    name = "tinyllama"
+
+    def __init__(self, model_name="TinyLlama/TinyLlama-1.1B-Chat-v1.0", batch_size=16, max_length=512):
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.model = AutoModel.from_pretrained(model_name, dtype=torch.float32)
+        self.model.eval()
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+    def encode(self, texts):
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            inputs = self.tokenizer(batch, return_tensors="pt", padding=True,
+                                    truncation=True, max_length=self.max_length)
+            with self.torch.no_grad():
+                hidden = self.model(**inputs).last_hidden_state
+            # Mean over real tokens only (padding would dilute short chunks)
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            embeddings.append(pooled.numpy())
+        return np.concatenate(embeddings).astype(np.float32)
+
+
+class SentenceEncoder:
+    """Small sentence-transformers model; batches internally"""
+    name = "minilm"
+
+    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2", batch_size=64):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.batch_size = batch_size
+
+    def encode(self, texts):
+        return np.asarray(self.model.encode(list(texts), batch_size=self.batch_size), dtype=np.float32)
+
+
+ENCODERS = {
+    TinyLlamaEncoder.name: TinyLlamaEncoder,
+    SentenceEncoder.name: SentenceEncoder,
+}
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+# ============================================================================
+# KNOWLEDGE BASES
+# ============================================================================
+
+def policy_key(package_name=None, url=None):
+    """File-safe key for a policy: the package name, or a slug + hash of the URL"""
+    if package_name:
+        return re.sub(r"[^A-Za-z0-9._-]", "_", package_name)
+    if url:
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", re.sub(r"^https?://", "", url)).strip("-")[:60]
+        return f"{slug}-{hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]}"
+    return DEFAULT_KB
+
+
+class KnowledgeBase:
+    """Chunks of one policy and their normalised embeddings"""
+
+    def __init__(self, key, chunks, embeddings, metadata=None):
+        self.key = key
+        self.chunks = chunks
+        self.embeddings = embeddings
+        self.metadata = metadata or {}
+
+    @property
+    def num_chunks(self):
+        return len(self.chunks)
+
+    def search(self, query_embedding, top_k=2):
+        """Top-k (chunks, scores) by cosine similarity"""
+        if not self.chunks:
+            return [], []
+        similarities = self.embeddings @ query_embedding
+        top_k = min(top_k, len(similarities))
+        top_indices = np.argpartition(-similarities, top_k - 1)[:top_k]
+        top_indices = top_indices[np.argsort(-similarities[top_indices])]
+        return [self.chunks[i] for i in top_indices], [float(similarities[i]) for i in top_indices]
+
+
+class KnowledgeBaseManager:
+    """Builds, persists and lazily loads per-policy knowledge bases (LRU in memory)"""
+
+    def __init__(self, chunker, store_dir=KB_DIR, encoder=KB_ENCODER, max_loaded=MAX_LOADED_KBS,
+                 query_cache_size=256):
+        """
+        Args:
+            chunker: Function splitting a policy text into chunks
+            store_dir: Directory for the persisted indexes
+            encoder: Encoder name (see ENCODERS) or an object with .name and .encode(texts)
+            max_loaded: Knowledge bases kept in memory at once
+            query_cache_size: Question embeddings kept for repeated questions
+        """
+        self.chunker = chunker
+        self.store_dir = store_dir
+        self.max_loaded = max_loaded
+        self.query_cache_size = query_cache_size
+        self._encoder = encoder if not isinstance(encoder, str) else None
+        self.encoder_name = encoder if isinstance(encoder, str) else encoder.name
+        self._loaded = OrderedDict()
+        self._query_cache = OrderedDict()
+        self._lock = threading.RLock()
+        self._encode_lock = threading.Lock()
+        os.makedirs(store_dir, exist_ok=True)
+
+    # -------------------- encoder --------------------
+    @property
+    def encoder(self):
+        """Loaded on first use, so starting the server doesn't load or run an embedding model"""
+        with self._encode_lock:
+            if self._encoder is None:
+                print(f"[KB] Loading {self.encoder_name} encoder...")
+                self._encoder = ENCODERS[self.encoder_name]()
+            return self._encoder
+
+    def _encode(self, texts):
+        encoder = self.encoder
+        with self._encode_lock:
+            return normalize(encoder.encode(texts))
+
+    def embed_query(self, query):
+        with self._lock:
+            if query in self._query_cache:
+                self._query_cache.move_to_end(query)
+                return self._query_cache[query]
+        embedding = self._encode([query])[0]
+        with self._lock:
+            self._query_cache[query] = embedding
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return embedding
+
+    # -------------------- storage --------------------
+    def _paths(self, key):
+        base = os.path.join(self.store_dir, key)
+        return base + ".npy", base + ".json"
+
+    def _remember(self, kb):
+        with self._lock:
+            self._loaded[kb.key] = kb
+            self._loaded.move_to_end(kb.key)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+
+    def _load(self, key):
+        embeddings_path, meta_path = self._paths(key)
+        if not (os.path.exists(embeddings_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("encoder") != self.encoder_name:
+                return None  # built with another encoder: needs a rebuild
+            embeddings = np.load(embeddings_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"[KB] Could not load {key}: {e}")
+            return None
+        return KnowledgeBase(key, meta["chunks"], embeddings, meta)
+
+    def get(self, key):
+        """Knowledge base for `key` from memory or disk, or None if it was never built"""
+        with self._lock:
+            kb = self._loaded.get(key)
+            if kb is not None:
+                self._loaded.move_to_end(key)
+                return kb
+        kb = self._load(key)
+        if kb is not None:
+            self._remember(kb)
+        return kb
+
+    def build(self, key, text, source_url=None):
+        """Chunk, embed (batched) and persist a policy; skipped if this exact text is already indexed"""
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        existing = self.get(key)
+        if existing is not None and existing.metadata.get("content_hash") == content_hash:
+            return existing
+
+        chunks = [chunk for chunk in self.chunker(text) if chunk.strip()]
+        print(f"[KB] Embedding {len(chunks)} chunks for {key}...")
+        embeddings = self._encode(chunks) if chunks else np.zeros((0, 0), dtype=np.float32)
+        meta = {
+            "encoder": self.encoder_name,
+            "content_hash": content_hash,
+            "source_url": source_url,
+            "chunks": chunks,
+        }
+
+        embeddings_path, meta_path = self._paths(key)
+        np.save(embeddings_path + ".tmp.npy", embeddings)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(embeddings_path + ".tmp.npy", embeddings_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        kb = KnowledgeBase(key, chunks, embeddings, meta)
+        self._remember(kb)
+        return kb
+
+    def get_or_build(self, key, load_text, source_url=None):
+        """get(key), building it from load_text() the first time"""
+        kb = self.get(key)
+        if kb is None:
+            kb = self.build(key, load_text(), source_url=source_url)
+        return kb
+
+    def retrieve(self, key, query, top_k=2):
+        kb = self.get(key)
+        if kb is None:
+            raise KeyError(key)
+        return kb.search(self.embed_query(query), top_k=top_k)
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Tiered cache of scraped policies and summaries in front of Firebase
+
+check_cache() / save_to_cache() go to the Realtime Database on every request,
+so even the most popular packages paid a network round trip each time.
+TieredPolicyCache looks a package up in:
+
+1. an in-memory LRU (this process)
+2. a local SQLite database (survives restarts)
+3. Firebase (shared between servers); hits are copied into the local tiers
+
+Saves are written to memory and SQLite right away and pushed to Firebase by a
+background writer (write-behind). Rows that haven't reached Firebase yet are
+marked unsynced in SQLite and pushed again after a restart.
+
+flight(package_name) de-duplicates concurrent work: the first request for a
+package leads (scrapes and summarises), later ones wait for it and then read
+the result from the cache.
+
+Configuration (env vars):
+    POLICY_CACHE_DB          SQLite file (default data/policy_cache.sqlite3)
+    POLICY_CACHE_SIZE        packages kept in memory (default 256)
+    POLICY_CACHE_TTL_HOURS   how long local copies are trusted before Firebase
+                             is asked again (default 24, 0 = forever)
+
+Usage:
+    from firebase_config import get_firebase_db
+    policy_cache = TieredPolicyCache(get_remote=get_firebase_db)
+    policy_cache.start()
+    cached = await policy_cache.get_async("com.example.app")
+"""
+
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+POLICY_CACHE_DB = os.getenv("POLICY_CACHE_DB", "data/policy_cache.sqlite3")
+POLICY_CACHE_SIZE = int(os.getenv("POLICY_CACHE_SIZE", "256"))
+POLICY_CACHE_TTL = float(os.getenv("POLICY_CACHE_TTL_HOURS", "24")) * 3600
+
+# ============================================================================
+# LOCAL TIERS
+# ============================================================================
+
+class MemoryLRU:
+    """{package: (entry, stored_at)}, least recently used evicted first"""
+
+    def __init__(self, max_entries=POLICY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                self._entries.move_to_end(key)
+            return item
+
+    def put(self, key, entry, stored_at=None):
+        with self._lock:
+            self._entries[key] = (entry, stored_at if stored_at is not None else time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteStore:
+    """Policies on local disk; `synced` = 0 until the row has reached Firebase"""
+
+    FIELDS = ("policy", "summary", "source_url", "cached_at")
+
+    def __init__(self, path=POLICY_CACHE_DB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS policies ("
+                " package_name TEXT PRIMARY KEY, policy TEXT, summary TEXT, source_url TEXT,"
+                " cached_at INTEGER, stored_at REAL, synced INTEGER)"
+            )
+
+    def get(self, key):
+        """(entry, stored_at) or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT policy, summary, source_url, cached_at, stored_at FROM policies WHERE package_name = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(self.FIELDS, row[:4])), row[4]
+
+    def put(self, key, entry, synced, stored_at=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO policies VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.get("policy"), entry.get("summary"), entry.get("source_url"),
+                 entry.get("cached_at"), stored_at if stored_at is not None else time.time(), int(synced))
+            )
+
+    def mark_synced(self, key, cached_at):
+        """Only if the row wasn't replaced by a newer save in the meantime"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE policies SET synced = 1 WHERE package_name = ? AND cached_at = ?", (key, cached_at)
+            )
+
+    def unsynced(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT package_name FROM policies WHERE synced = 0")]
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM policies WHERE package_name = ?", (key,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# ============================================================================
+# SINGLE FLIGHT
+# ============================================================================
+
+class Flight:
+    """One in-progress scrape/summarise of a package"""
+
+    def __init__(self, flights, key, leader):
+        self._flights = flights
+        self._done = flights[key]
+        self.key = key
+        self.leader = leader
+
+    async def wait(self):
+        """Followers: wait until the leader is done (successfully or not)"""
+        await self._done.wait()
+
+    def finish(self):
+        """Leader: release the followers (safe to call more than once)"""
+        if self.leader:
+            self.leader = False
+            del self._flights[self.key]
+            self._done.set()
+
+
+class SingleFlight:
+    """At most one leader per key; used from the event loop only"""
+
+    def __init__(self):
+        self._flights = {}
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._flights)
+
+    def join(self, key):
+        if key in self._flights:
+            self.coalesced += 1
+            return Flight(self._flights, key, leader=False)
+        self._flights[key] = asyncio.Event()
+        return Flight(self._flights, key, leader=True)
+
+# ============================================================================
+# TIERED CACHE
+# ============================================================================
+
+class TieredPolicyCache:
+    """Memory LRU -> SQLite -> Firebase, with write-behind saves (see module docstring)"""
+
+    def __init__(self, get_remote, db_path=POLICY_CACHE_DB, max_entries=POLICY_CACHE_SIZE,
+                 ttl=POLICY_CACHE_TTL, write_retries=3, retry_delay=1.0):
+        """
+        Args:
+            get_remote: Returns the Firebase database (get_cached_policy / save_policy /
+                        check_connection), or None; called when Firebase is needed
+            db_path: SQLite file of the disk tier
+            max_entries: Packages kept in memory
+            ttl: Seconds local copies are served without asking Firebase (0 = forever)
+            write_retries: Attempts per Firebase save before leaving it for the next start
+            retry_delay: Seconds before the first retry (doubles every attempt)
+        """
+        self.get_remote = get_remote
+        self.memory = MemoryLRU(max_entries)
+        self.disk = SQLiteStore(db_path)
+        self.ttl = ttl
+        self.write_retries = write_retries
+        self.retry_delay = retry_delay
+        self.flights = SingleFlight()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        self.stats_counts = {
+            "memory_hits": 0, "disk_hits": 0, "remote_hits": 0, "misses": 0,
+            "saves": 0, "remote_writes": 0, "remote_write_failures": 0,
+        }
+
+    # -------------------- lifecycle --------------------
+    def start(self):
+        """Start the write-behind thread and re-queue saves that never reached Firebase"""
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="policy-cache-writer", daemon=True)
+            self._writer.start()
+            for key in self.disk.unsynced():
+                item = self.disk.get(key)
+                if item is not None:
+                    self._enqueue(key, item[0])
+
+    def flush(self, timeout=None):
+        """Wait until queued Firebase saves are done; False if the timeout passed first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._pending_lock:
+                if not self._pending:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+    def close(self, timeout=10):
+        if self._writer is not None:
+            self.flush(timeout)
+            self._queue.put(None)
+            self._writer.join(timeout)
+            self._writer = None
+        self.disk.close()
+
+    # -------------------- reads --------------------
+    def _fresh(self, stored_at):
+        return not self.ttl or time.time() - stored_at < self.ttl
+
+    def _remote(self):
+        remote = self.get_remote()
+        return remote if remote is not None and remote.check_connection() else None
+
+    def get(self, package_name):
+        """Cached {'policy', 'summary', 'cached_at', 'source_url', 'tier'}, or None"""
+        item = self.memory.get(package_name)
+        if item is not None and self._fresh(item[1]):
+            self.stats_counts["memory_hits"] += 1
+            return dict(item[0], tier="memory")
+
+        item = self.disk.get(package_name)
+        if item is not None and self._fresh(item[1]):
+            self.stats_counts["disk_hits"] += 1
+            self.memory.put(package_name, item[0], item[1])
+            return dict(item[0], tier="disk")
+
+        with self._pending_lock:
+            pending = self._pending.get(package_name)
+        if pending is not None:  # saved here, not in Firebase yet
+            self.stats_counts["disk_hits"] += 1
+            self.memory.put(package_name, pending)
+            return dict(pending, tier="disk")
+
+        remote = self._remote()
+        entry = remote.get_cached_policy(package_name) if remote is not None else None
+        if entry:
+            self.stats_counts["remote_hits"] += 1
+            entry = {field: entry.get(field) for field in SQLiteStore.FIELDS}
+            self.memory.put(package_name, entry)
+            self.disk.put(package_name, entry, synced=True)
+            return dict(entry, tier="remote")
+
+        if item is not None:  # stale local copy, but Firebase has nothing better
+            self.stats_counts["disk_hits"] += 1
+            self.memory.put(package_name, item[0])
+            return dict(item[0], tier="disk")
+
+        self.stats_counts["misses"] += 1
+        return None
+
+    async def get_async(self, package_name):
+        """get() without blocking the event loop (memory hits are answered inline)"""
+        item = self.memory.get(package_name)
+        if item is not None and self._fresh(item[1]):
+            self.stats_counts["memory_hits"] += 1
+            return dict(item[0], tier="memory")
+        return await asyncio.to_thread(self.get, package_name)
+
+    # -------------------- writes --------------------
+    def put(self, package_name, policy, summary, source_url):
+        """Save locally now, to Firebase in the background"""
+        entry = {"policy": policy, "summary": summary, "source_url": source_url,
+                 "cached_at": int(time.time())}
+        self.memory.put(package_name, entry)
+        self.disk.put(package_name, entry, synced=False)
+        self.stats_counts["saves"] += 1
+        self._enqueue(package_name, entry)
+        return True
+
+    def delete(self, package_name):
+        """Drop local copies (Firebase is left alone)"""
+        self.memory.delete(package_name)
+        self.disk.delete(package_name)
+
+    def _enqueue(self, key, entry):
+        with self._pending_lock:
+            queued = key in self._pending
+            self._pending[key] = entry  # a newer save replaces one still waiting
+        if not queued:
+            self._queue.put(key)
+
+    def _write_loop(self):
+        while True:
+            key = self._queue.get()
+            if key is None:
+                return
+            with self._pending_lock:
+                entry = self._pending.get(key)
+            saved = entry is not None and self._write_remote(key, entry)
+            with self._pending_lock:
+                if self._pending.get(key) is entry:
+                    del self._pending[key]
+                elif key in self._pending:  # saved again while writing: write the newer one
+                    self._queue.put(key)
+            if saved:
+                self.disk.mark_synced(key, entry["cached_at"])
+
+    def _write_remote(self, key, entry):
+        delay = self.retry_delay
+        for attempt in range(self.write_retries):
+            try:
+                remote = self._remote()
+                if remote is None:
+                    break  # Firebase not configured: stays unsynced in SQLite
+                if remote.save_policy(key, entry["policy"], entry["summary"], entry["source_url"] or ""):
+                    self.stats_counts["remote_writes"] += 1
+                    return True
+            except Exception as e:
+                print(f"[CACHE] Firebase save failed for {key}: {str(e)}")
+            if attempt + 1 < self.write_retries:
+                time.sleep(delay)
+                delay *= 2
+        self.stats_counts["remote_write_failures"] += 1
+        return False
+
+    # -------------------- single flight / metrics --------------------
+    def flight(self, package_name):
+        """Join the in-progress scrape of a package, or lead a new one (see SingleFlight)"""
+        return self.flights.join(package_name)
+
+    def stats(self):
+        counts = dict(self.stats_counts)
+        hits = counts["memory_hits"] + counts["disk_hits"] + counts["remote_hits"]
+        lookups = hits + counts["misses"]
+        with self._pending_lock:
+            pending = len(self._pending)
+        counts.update({
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "pending_writes": pending,
+            "in_flight": len(self.flights),
+            "coalesced_requests": self.flights.coalesced,
+        })
+        return counts
+
+# ============================================================================
+# TEST DOUBLE
+# ============================================================================
+
+class FakeFirebaseDatabase:
+    """
+    Test double with FirebaseDatabase's cache interface, kept in a dict.
+    `latency` (seconds) is added to every call; calls are counted in `calls`.
+    """
+
+    def __init__(self, policies=None, latency=0.0, connected=True, fail_saves=0):
+        self.policies = dict(policies or {})
+        self.latency = latency
+        self.connected = connected
+        self.fail_saves = fail_saves  # the next N saves raise
+        self.calls = {"get": 0, "save": 0}
+        self._lock = threading.Lock()
+
+    def check_connection(self):
+        return self.connected
+
+    def get_cached_policy(self, package_name):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls["get"] += 1
+            data = self.policies.get(package_name)
+        if not data:
+            return None
+        return {field: data.get(field) for field in SQLiteStore.FIELDS}
+
+    def save_policy(self, package_name, policy_content, summary, source_url):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls["save"] += 1
+            if self.fail_saves:
+                self.fail_saves -= 1
+                raise ConnectionError("fake Firebase unavailable")
+            self.policies[package_name] = {
+                "policy": policy_content, "summary": summary,
+                "source_url": source_url, "cached_at": int(time.time()),
+            }
+        return True
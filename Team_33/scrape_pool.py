@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Pooled page fetching for the scrapers
+
+Starting Chrome for every JavaScript page (twice per Play Store package)
+dominated scrape latency. PageFetcher instead:
+
+1. serves recently fetched pages from a local HTML cache (TTL)
+2. tries a plain HTTP request first, even for "JavaScript" pages, and keeps
+   it when the HTML already has the content (most policy pages do)
+3. otherwise renders the page in one of a few warm headless browsers from
+   BrowserPool, which are reused across requests and recycled periodically
+4. limits concurrent requests per domain, so parallel scrapes don't hammer
+   one site (or get us rate limited by Play Store)
+
+fetch() is blocking; async handlers use fetch_async(), which runs it on the
+scrape thread pool instead of the event loop.
+
+Configuration (env vars):
+    SCRAPE_BROWSERS          warm browser instances (default 2)
+    SCRAPE_PER_DOMAIN        concurrent requests per domain (default 2)
+    SCRAPE_CACHE_DIR         HTML cache directory (default data/html_cache)
+    SCRAPE_CACHE_TTL_HOURS   HTML cache lifetime (default 24, 0 disables the cache)
+    SCRAPE_FIXTURES          serve saved HTML from this directory instead (tests / offline)
+
+Usage:
+    from scrape_pool import get_fetcher
+    html = get_fetcher().fetch(url, use_javascript=True, wait_time=15)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# A fast-path (plain HTTP) page counts as rendered when it has this much visible text
+MIN_STATIC_TEXT = 1000
+
+_TAG_RE = re.compile(r"<(script|style|noscript)\b.*?</\1>|<[^>]+>", re.IGNORECASE | re.DOTALL)
+
+
+def visible_text_length(html):
+    """Rough visible text length of an HTML document (tags, scripts and styles removed)"""
+    return len(" ".join(_TAG_RE.sub(" ", html).split()))
+
+
+def looks_rendered(html):
+    return visible_text_length(html) >= MIN_STATIC_TEXT
+
+# ============================================================================
+# BROWSER POOL
+# ============================================================================
+
+def chrome_driver(headless=True):
+    """New Chrome webdriver with the options the scrapers always used"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
+    return webdriver.Chrome(options=chrome_options)
+
+
+class BrowserPool:
+    """A few long-lived browsers handed out one request at a time"""
+
+    def __init__(self, size=2, driver_factory=chrome_driver, max_pages_per_browser=50):
+        """
+        Args:
+            size: Most browsers running at once
+            driver_factory: Creates a webdriver (called lazily, at most `size` live at a time)
+            max_pages_per_browser: Restart a browser after this many pages (Chrome slowly leaks memory)
+        """
+        self.size = size
+        self.driver_factory = driver_factory
+        self.max_pages_per_browser = max_pages_per_browser
+        self.idle = queue.LifoQueue()  # most recently used first: its caches are warm
+        self.created = 0
+        self.starts = 0
+        self.pages = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout=60):
+        """An idle browser, a new one if below `size`, or wait for one to be released"""
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            create = self.created < self.size
+            if create:
+                self.created += 1
+        if create:
+            try:
+                driver = self.driver_factory()
+            except Exception:
+                with self.lock:
+                    self.created -= 1
+                raise
+            self.starts += 1
+            self.pages[id(driver)] = 0
+            return driver
+        return self.idle.get(timeout=timeout)
+
+    def release(self, driver, broken=False):
+        """Return a browser to the pool; broken or worn-out browsers are closed instead"""
+        self.pages[id(driver)] = self.pages.get(id(driver), 0) + 1
+        if broken or self.pages[id(driver)] >= self.max_pages_per_browser:
+            self._quit(driver)
+            return
+        try:
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+        except Exception:
+            self._quit(driver)
+            return
+        self.idle.put(driver)
+
+    def _quit(self, driver):
+        self.pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self.lock:
+            self.created -= 1
+
+    def warm_up(self, count=1):
+        """Start browsers ahead of the first request (e.g. at server startup)"""
+        drivers = []
+        try:
+            for _ in range(min(count, self.size)):
+                drivers.append(self.acquire())
+        except Exception as e:
+            print(f"[SCRAPE] Could not start browser: {e}")
+        finally:
+            for driver in drivers:
+                self.idle.put(driver)
+
+    def close(self):
+        while True:
+            try:
+                self._quit(self.idle.get_nowait())
+            except queue.Empty:
+                break
+
+# ============================================================================
+# HTML CACHE
+# ============================================================================
+
+class HtmlCache:
+    """Fetched pages on disk, one file per (url, rendering mode), valid for `ttl` seconds"""
+
+    def __init__(self, cache_dir, ttl):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url, use_javascript):
+        digest = hashlib.sha1(f"{'js' if use_javascript else 'http'}:{url}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.html")
+
+    def get(self, url, use_javascript):
+        path = self._path(url, use_javascript)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, url, use_javascript, html):
+        path = self._path(url, use_javascript)
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8", newline="") as f:
+                f.write(html)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"[SCRAPE] Could not cache {url}: {e}")
+
+# ============================================================================
+# FETCHERS
+# ============================================================================
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="scrape")
+
+
+class BaseFetcher:
+    def fetch(self, url, use_javascript=False, wait_time=10, accept=None):
+        raise NotImplementedError
+
+    async def fetch_async(self, url, use_javascript=False, wait_time=10, accept=None):
+        """fetch() on the scrape thread pool, so the event loop keeps serving other requests"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _executor, lambda: self.fetch(url, use_javascript=use_javascript, wait_time=wait_time, accept=accept))
+
+
+class PageFetcher(BaseFetcher):
+    """HTML cache -> plain HTTP fast path -> pooled browser, with per-domain limits"""
+
+    def __init__(self, pool=None, cache=None, per_domain=2, settle_time=2.0):
+        """
+        Args:
+            pool: BrowserPool for JavaScript pages (None: JavaScript pages use the HTTP result only)
+            cache: HtmlCache or None
+            per_domain: Concurrent requests allowed per domain
+            settle_time: Longest wait for JavaScript content after the page has loaded
+        """
+        self.pool = pool
+        self.cache = cache
+        self.per_domain = per_domain
+        self.settle_time = settle_time
+        self.stats = {"cache_hits": 0, "http": 0, "browser": 0, "failures": 0}
+        self._domains = {}
+        self._domains_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _domain_limit(self, url):
+        domain = urlparse(url).netloc.lower()
+        with self._domains_lock:
+            if domain not in self._domains:
+                self._domains[domain] = threading.BoundedSemaphore(self.per_domain)
+            return self._domains[domain]
+
+    def _session(self):
+        # One keep-alive session per thread (requests.Session isn't guaranteed thread-safe)
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+            self._local.session.headers["User-Agent"] = USER_AGENT
+        return self._local.session
+
+    def fetch(self, url, use_javascript=False, wait_time=10, accept=None):
+        """
+        HTML of `url`, or None if it can't be fetched.
+
+        accept(html) decides whether the plain HTTP response is good enough for a
+        JavaScript page (default: it has a reasonable amount of visible text).
+        """
+        if self.cache is not None:
+            html = self.cache.get(url, use_javascript)
+            if html is not None:
+                self.stats["cache_hits"] += 1
+                return html
+
+        with self._domain_limit(url):
+            html = self._fetch_http(url)
+            cacheable = True
+            if use_javascript and self.pool is not None:
+                if html is None or not (accept or looks_rendered)(html):
+                    rendered = self._fetch_browser(url, wait_time)
+                    # Static HTML the browser was needed for is only a fallback for this
+                    # call: cached under the JavaScript key it would stand in for the TTL
+                    cacheable = rendered is not None
+                    html = rendered or html
+                else:
+                    print(f"[SCRAPE] Static HTML is enough for {url}, skipped the browser")
+
+        if html is None:
+            self.stats["failures"] += 1
+        elif self.cache is not None and cacheable:
+            self.cache.put(url, use_javascript, html)
+        return html
+
+    def _fetch_http(self, url):
+        try:
+            response = self._session().get(url, timeout=10)
+            response.raise_for_status()
+            self.stats["http"] += 1
+            return response.text
+        except requests.exceptions.RequestException as e:
+            print(f"Error scraping webpage with requests: {e}")
+            return None
+
+    def _fetch_browser(self, url, wait_time):
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.common.by import By
+
+        try:
+            driver = self.pool.acquire(timeout=wait_time + 60)
+        except Exception as e:
+            print(f"Error starting browser: {e}")
+            return None
+
+        broken = False
+        try:
+            driver.get(url)
+            WebDriverWait(driver, wait_time).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+            WebDriverWait(driver, wait_time).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+            # Content rendered by JavaScript often arrives after load: wait until the
+            # page text stops growing (at most settle_time, the old fixed sleep)
+            deadline = time.monotonic() + self.settle_time
+            last_length = -1
+            while time.monotonic() < deadline:
+                length = driver.execute_script("return document.body ? document.body.innerText.length : 0")
+                if length and length == last_length:
+                    break
+                last_length = length
+                time.sleep(0.25)
+            self.stats["browser"] += 1
+            return driver.page_source
+        except Exception as e:
+            print(f"Error scraping webpage with Selenium: {e}")
+            broken = True
+            return None
+        finally:
+            self.pool.release(driver, broken=broken)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+
+
+class FixtureFetcher(BaseFetcher):
+    """
+    Test double: serves saved HTML instead of touching the network.
+
+    `fixtures` is a {url: html file} dict, or a directory holding the HTML files
+    plus an index.json with the same mapping. Unknown URLs return None.
+    Every call is recorded in `requests` as (url, use_javascript).
+    """
+
+    def __init__(self, fixtures):
+        if isinstance(fixtures, str):
+            with open(os.path.join(fixtures, "index.json"), "r", encoding="utf-8") as f:
+                index = json.load(f)
+            fixtures = {url: os.path.join(fixtures, name) for url, name in index.items()}
+        self.fixtures = fixtures
+        self.requests = []
+
+    def fetch(self, url, use_javascript=False, wait_time=10, accept=None):
+        self.requests.append((url, use_javascript))
+        path = self.fixtures.get(url)
+        if path is None:
+            print(f"[SCRAPE] No fixture for {url}")
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def close(self):
+        pass
+
+# ============================================================================
+# SHARED FETCHER
+# ============================================================================
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def create_fetcher():
+    """Fetcher configured from the environment (see module docstring)"""
+    fixtures = os.getenv("SCRAPE_FIXTURES")
+    if fixtures:
+        return FixtureFetcher(fixtures)
+
+    ttl_hours = float(os.getenv("SCRAPE_CACHE_TTL_HOURS", "24"))
+    cache = HtmlCache(os.getenv("SCRAPE_CACHE_DIR", "data/html_cache"), ttl_hours * 3600) if ttl_hours > 0 else None
+    pool = BrowserPool(size=int(os.getenv("SCRAPE_BROWSERS", "2")))
+    return PageFetcher(pool=pool, cache=cache, per_domain=int(os.getenv("SCRAPE_PER_DOMAIN", "2")))
+
+
+def get_fetcher():
+    """The process-wide fetcher, created on first use"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = create_fetcher()
+        return _fetcher
+
+
+def set_fetcher(fetcher):
+    """Replace the shared fetcher (e.g. with a FixtureFetcher in tests); returns the previous one"""
+    global _fetcher
+    with _fetcher_lock:
+        previous, _fetcher = _fetcher, fetcher
+        return previous
@@ -1,16 +1,11 @@
-import requests
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-import time
 import google.generativeai as genai
 import os
 
+from scrape_pool import get_fetcher
 
-def scrape_webpage(url, use_javascript=False, wait_time=10, headless=True):
+
+def scrape_webpage(url, use_javascript=False, wait_time=10, headless=True, accept=None):
     """
     Scrapes content from a webpage.
     
@@ -24,13 +19,19 @@ def scrape_webpage(url, use_javascript=False, wait_time=10, headless=True):
     wait_time : int, optional
         Maximum time to wait for page elements to load in seconds (default: 10)
     headless : bool, optional
-        If True, runs browser in headless mode (no visible window). Only used when use_javascript=True (default: True)
+        Kept for compatibility; the pooled browsers are always headless
+    accept : callable, optional
+        accept(html) -> bool: whether the plain HTTP response already has what we need, so no
+        browser is needed for a JavaScript page (default: it has enough visible text)
     
     Returns:
     --------
     str : The HTML content of the webpage
     None : If scraping fails
     
+    Pages come from the shared fetcher in scrape_pool.py: local HTML cache, then plain
+    HTTP, then a warm pooled browser for JavaScript pages that need it.
+    
     Examples:
     ---------
     # Scrape a static webpage
@@ -41,55 +42,7 @@ def scrape_webpage(url, use_javascript=False, wait_time=10, headless=True):
     >>> content = scrape_webpage("https://example.com", use_javascript=True, wait_time=15)
     >>> print(content[:100])
     """
-    
-    if not use_javascript:
-        # Use requests for static HTML pages (faster and simpler)
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            return response.text
-        except requests.exceptions.RequestException as e:
-            print(f"Error scraping webpage with requests: {e}")
-            return None
-    
-    else:
-        # Use Selenium for JavaScript-rendered pages
-        try:
-            chrome_options = Options()
-            if headless:
-                chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-            
-            driver = webdriver.Chrome(options=chrome_options)
-            driver.get(url)
-            
-            # Wait for page to load
-            WebDriverWait(driver, wait_time).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Additional wait to allow JavaScript to execute
-            time.sleep(2)
-            
-            # Get page source
-            page_content = driver.page_source
-            driver.quit()
-            
-            return page_content
-        
-        except Exception as e:
-            print(f"Error scraping webpage with Selenium: {e}")
-            try:
-                driver.quit()
-            except:
-                pass
-            return None
+    return get_fetcher().fetch(url, use_javascript=use_javascript, wait_time=wait_time, accept=accept)
 
 
 def extract_text_from_html(html_content):
@@ -413,7 +366,13 @@ def scrape_play_store_privacy_policy(package_name, use_javascript=True, wait_tim
         print(f"[PLAY_STORE] Scraping Play Store page: {play_store_url}")
         
         # Step 2: Scrape Play Store page
-        play_store_html = scrape_webpage(play_store_url, use_javascript=use_javascript, wait_time=wait_time)
+        play_store_html = scrape_webpage(
+            play_store_url,
+            use_javascript=use_javascript,
+            wait_time=wait_time,
+            # The static page usually carries the policy link already; only render when it doesn't
+            accept=lambda html: extract_privacy_policy_url_from_play_store(html) is not None
+        )
         
         if not play_store_html:
             return {
@@ -5,36 +5,35 @@ Run this script directly with: python server.py
 Uses TinyLLama-based chatbot only (lightweight for 4GB VRAM)
 """
 
+import os
 import torch
-import requests
 import gc
 import time
 import json
 import asyncio
 import numpy as np
-from transformers import pipeline, AutoTokenizer, AutoModel, BitsAndBytesConfig
-from sklearn.metrics.pairwise import cosine_similarity
+from transformers import pipeline, BitsAndBytesConfig
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, AsyncGenerator
 import uvicorn
-from datasets import Dataset
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
 
 # Firebase imports
-from firebase_config import get_firebase_db, check_cache, save_to_cache
+from firebase_config import get_firebase_db
+
+from summary_worker import SummaryBatcher
+from scrape_pool import get_fetcher
+from knowledge_base import KnowledgeBaseManager, policy_key, DEFAULT_KB
+from text_processing import chunk_text, chunk_by_tokens, extract_clean_content
+from policy_cache import TieredPolicyCache
 
 # ============================================================================
 # SCRAPER FUNCTIONS
 # ============================================================================
 
-def scrape_webpage(url, use_javascript=False, wait_time=10, headless=True):
+def scrape_webpage(url, use_javascript=False, wait_time=10, headless=True, accept=None):
     """
     Scrapes content from a webpage.
     
@@ -48,13 +47,19 @@ def scrape_webpage(url, use_javascript=False, wait_time=10, headless=True):
     wait_time : int, optional
         Maximum time to wait for page elements to load in seconds (default: 10)
     headless : bool, optional
-        If True, runs browser in headless mode (no visible window). Only used when use_javascript=True (default: True)
+        Kept for compatibility; the pooled browsers are always headless
+    accept : callable, optional
+        accept(html) -> bool: whether the plain HTTP response already has what we need, so no
+        browser is needed for a JavaScript page (default: it has enough visible text)
     
     Returns:
     --------
     str : The HTML content of the webpage
     None : If scraping fails
     
+    Pages come from the shared fetcher in scrape_pool.py: local HTML cache, then plain
+    HTTP, then a warm pooled browser for JavaScript pages that need it.
+    
     Examples:
     ---------
     # Scrape a static webpage
@@ -65,55 +70,7 @@ def scrape_webpage(url, use_javascript=False, wait_time=10, headless=True):
     >>> content = scrape_webpage("https://example.com", use_javascript=True, wait_time=15)
     >>> print(content[:100])
     """
-    
-    if not use_javascript:
-        # Use requests for static HTML pages (faster and simpler)
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            return response.text
-        except requests.exceptions.RequestException as e:
-            print(f"Error scraping webpage with requests: {e}")
-            return None
-    
-    else:
-        # Use Selenium for JavaScript-rendered pages
-        try:
-            chrome_options = Options()
-            if headless:
-                chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-            
-            driver = webdriver.Chrome(options=chrome_options)
-            driver.get(url)
-            
-            # Wait for page to load
-            WebDriverWait(driver, wait_time).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Additional wait to allow JavaScript to execute
-            time.sleep(2)
-            
-            # Get page source
-            page_content = driver.page_source
-            driver.quit()
-            
-            return page_content
-        
-        except Exception as e:
-            print(f"Error scraping webpage with Selenium: {e}")
-            try:
-                driver.quit()
-            except:
-                pass
-            return None
+    return get_fetcher().fetch(url, use_javascript=use_javascript, wait_time=wait_time, accept=accept)
 
 
 def extract_text_from_html(html_content):
@@ -150,136 +107,6 @@ def extract_text_from_html(html_content):
         return None
 
 
-def extract_clean_content(html_content, article_tag=True, remove_extra_spans=True):
-    """
-    Extracts clean, readable content from HTML by removing redundant tags and formatting.
-    Useful for pages with excessive nested HTML like privacy policies.
-    
-    Parameters:
-    -----------
-    html_content : str
-        The HTML content to parse
-    article_tag : bool, optional
-        If True, tries to extract content from article or main content container first (default: True)
-    remove_extra_spans : bool, optional
-        If True, removes redundant nested span tags that don't add value (default: True)
-    
-    Returns:
-    --------
-    str : Clean, formatted text content
-    None : If extraction fails
-    
-    Example:
-    --------
-    >>> html = "<html><body><article><span><span><p>Privacy Policy</p></span></span></article></body></html>"
-    >>> content = extract_clean_content(html)
-    >>> print(content)
-    """
-    if not html_content:
-        return None
-    
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Remove script, style, noscript, and meta elements
-        for element in soup(["script", "style", "noscript", "meta", "link", "iframe"]):
-            element.decompose()
-        
-        # Try to find main content area with better specificity
-        content_area = None
-        if article_tag:
-            # Priority order for content detection:
-            # 1. article tag
-            # 2. main tag
-            # 3. div with specific content classes
-            # 4. Find the largest section/article
-            # 5. Find the largest div with significant text
-            
-            content_area = soup.find('article')
-            
-            if not content_area:
-                content_area = soup.find('main')
-            
-            if not content_area:
-                # Look for more specific content containers
-                for class_name in ['page-content', 'post-content', 'entry-content', 'content-main', 
-                                  'main-content', 'region-content', 'document-content', 'privacy-policy']:
-                    content_area = soup.find('div', class_=class_name)
-                    if content_area:
-                        break
-            
-            if not content_area:
-                # Try section tags
-                content_area = soup.find('section')
-            
-            if not content_area:
-                # Fall back to generic content div but ensure it's large enough
-                content_divs = soup.find_all('div', class_=lambda x: x and any(keyword in (x if isinstance(x, str) else ' '.join(x)) 
-                                           for keyword in ['content', 'body', 'main', 'article', 'post']))
-                if content_divs:
-                    # Find the largest content div (most likely the actual content)
-                    content_area = max(content_divs, key=lambda d: len(d.get_text()))
-            
-            if not content_area:
-                # Find the largest section by text content
-                all_sections = soup.find_all(['section', 'article', 'div'], class_=lambda x: True)
-                if all_sections:
-                    # Filter out tiny elements (likely navigation, ads, etc.) - only consider with significant content
-                    significant_elements = [e for e in all_sections if len(e.get_text(strip=True)) > 300]
-                    if significant_elements:
-                        content_area = max(significant_elements, key=lambda e: len(e.get_text()))
-            
-            if not content_area:
-                # Last resort: get all divs and find the largest one with substantial content
-                all_divs = soup.find_all('div')
-                if all_divs:
-                    # Find divs with substantial text content (avoid headers, footers, navs)
-                    large_divs = [d for d in all_divs if len(d.get_text(strip=True)) > 500 
-                                 and not any(skip in str(d.get('class', [])).lower() 
-                                           for skip in ['header', 'footer', 'nav', 'sidebar', 'ads', 'modal'])]
-                    if large_divs:
-                        content_area = max(large_divs, key=lambda d: len(d.get_text()))
-        
-        if not content_area:
-            # Use body as fallback
-            content_area = soup.find('body')
-        
-        if not content_area:
-            # Ultimate fallback: use entire document
-            content_area = soup
-        
-        # Remove navigation, header, footer, and sidebar elements that snuck through
-        for element in content_area.find_all(['nav', 'header', 'footer', 'aside', 'form'], recursive=True):
-            element.decompose()
-        
-        # Remove common ad/tracker containers
-        for element in content_area.find_all(['div', 'section'], class_=lambda x: x and any(skip in (x if isinstance(x, str) else ' '.join(x)).lower() 
-                                             for skip in ['ads', 'advertisement', 'tracker', 'modal', 'popup'])):
-            element.decompose()
-        
-        if remove_extra_spans:
-            # Remove redundant nested spans - keep only spans with meaningful attributes or content
-            for span in content_area.find_all('span'):
-                # If span has no class/id and only contains text or other spans, unwrap it
-                if not span.get('class') and not span.get('id') and not span.get('style'):
-                    span.unwrap()
-        
-        # Extract text with proper spacing
-        text = content_area.get_text(separator='\n', strip=True)
-        
-        # Clean up excessive whitespace and empty lines
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        cleaned_text = '\n'.join(lines)
-        
-        print(f"[DEBUG] Extracted {len(cleaned_text)} characters from page")
-        
-        return cleaned_text
-    
-    except Exception as e:
-        print(f"Error extracting clean content from HTML: {e}")
-        return None
-
-
 def scrape_and_extract(url, use_javascript=False, extract_text=True, wait_time=10):
     """
     Convenience function that scrapes a webpage and optionally extracts text.
@@ -464,7 +291,13 @@ def scrape_play_store_privacy_policy(package_name, use_javascript=True, wait_tim
         print(f"[PLAY_STORE] Scraping Play Store page: {play_store_url}")
         
         # Step 2: Scrape Play Store page
-        play_store_html = scrape_webpage(play_store_url, use_javascript=use_javascript, wait_time=wait_time)
+        play_store_html = scrape_webpage(
+            play_store_url,
+            use_javascript=use_javascript,
+            wait_time=wait_time,
+            # The static page usually carries the policy link already; only render when it doesn't
+            accept=lambda html: extract_privacy_policy_url_from_play_store(html) is not None
+        )
         
         if not play_store_html:
             return {
@@ -530,87 +363,35 @@ def scrape_play_store_privacy_policy(package_name, use_javascript=True, wait_tim
 # UTILITY FUNCTIONS
 # ============================================================================
 
-def chunk_text(text, max_length=1000):
-    """Split text into chunks"""
-    words = text.split()
-    chunks = []
-    current_chunk = []
-    
-    for word in words:
-        current_chunk.append(word)
-        if len(' '.join(current_chunk)) > max_length:
-            chunks.append(' '.join(current_chunk[:-1]))
-            current_chunk = [word]
-    
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
-    
-    return chunks
+# Summaries are built from chunks of this many BART tokens (about 1000 characters of policy text)
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "256"))
 
-def summarize_chunks_sequentially(chunks, summarizer):
-    """Summarize chunks using the BART summarizer with batch processing"""
-    if not chunks:
-        return []
-    
+def chunk_for_summary(text):
+    """Token-aware chunks that always fit the BART input window (no silent truncation)"""
+    return chunk_by_tokens(text, summarizer.tokenizer, max_tokens=SUMMARY_CHUNK_TOKENS)
+
+async def summarize_chunks(chunks):
+    """Summarize chunks through the shared batching worker (the model runs off the event loop)"""
     # Filter out empty chunks
     valid_chunks = [chunk for chunk in chunks if chunk.strip()]
     
-    if not valid_chunks:
-        return []
-    
-    # Create a dataset for batch processing (eliminates the sequential warning)
-    chunk_dataset = Dataset.from_dict({"text": valid_chunks})
-    
-    # Process in batches for efficiency
-    batch_size = 8  # Adjust based on VRAM - 8 is safe for 4GB
-    
-    def summarize_batch(batch):
-        """Summarize a batch of texts"""
-        summaries = []
-        for text in batch["text"]:
+    futures = summary_batcher.submit_many(valid_chunks)
+    summaries = []
+    try:
+        for chunk, future in zip(valid_chunks, futures):
             try:
-                result = summarizer(
-                    text,
-                    max_length=100,
-                    min_length=30,
-                    do_sample=False
-                )
-                summaries.append(result[0]['summary_text'])
+                summaries.append(await asyncio.wrap_future(future))
             except Exception as e:
                 # Fallback for texts that are too short or cause issues
                 print(f"[WARNING] Summarization failed for chunk, using fallback: {str(e)[:50]}")
-                summaries.append(text[:100])  # Use first 100 chars as fallback
-        
-        return {"summary": summaries}
-    
-    # Apply summarization to batches
-    summarized_dataset = chunk_dataset.map(
-        summarize_batch,
-        batched=True,
-        batch_size=batch_size,
-        remove_columns=["text"]
-    )
-    
-    # Extract summaries
-    summaries = summarized_dataset["summary"]
+                summaries.append(chunk[:100])  # Use first 100 chars as fallback
+    finally:
+        # Request cancelled: drop the chunks that haven't been batched yet
+        for future in futures:
+            future.cancel()
     
     return summaries
 
-def get_embeddings(texts, model, tokenizer, device="cpu"):
-    """Generate embeddings for texts using TinyLLama"""
-    embeddings = []
-    
-    for text in texts:
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-        
-        with torch.no_grad():
-            outputs = model(**inputs)
-            embedding = outputs.last_hidden_state.mean(dim=1).numpy()
-        
-        embeddings.append(embedding[0])
-    
-    return np.array(embeddings)
-
 # ============================================================================
 # COMPRESSION METRICS & STREAMING
 # ============================================================================
@@ -694,7 +475,7 @@ async def summarize_with_streaming(text: str, max_length: int = 200, min_length:
         )
         
         # Split into initial chunks
-        chunks = chunk_text(text, max_length=1000)
+        chunks = chunk_for_summary(text)
         yield await generate_stream_event(
             "chunking_complete",
             {
@@ -710,45 +491,43 @@ async def summarize_with_streaming(text: str, max_length: int = 200, min_length:
             chunk_summaries = []
             combined_length_before = len(' '.join(chunks))
             
-            # Stream each chunk summary as it's generated
-            for i, chunk in enumerate(chunks):
-                try:
-                    result = summarizer(
-                        chunk,
-                        max_length=100,
-                        min_length=30,
-                        do_sample=False
-                    )
-                    summary = result[0]['summary_text']
-                    chunk_summaries.append(summary)
-                    
-                    # Stream individual chunk summary
-                    yield await generate_stream_event(
-                        "chunk_summary",
-                        {
-                            "chunk_index": i,
-                            "total_chunks": len(chunks),
-                            "summary": summary,
-                            "chunk_length": len(chunk.split()),
-                            "summary_length": len(summary.split())
-                        },
-                        iteration=iteration
-                    )
+            # Queue every chunk at once so they are batched with each other and with
+            # chunks from concurrent requests, then stream each summary as its batch finishes
+            futures = summary_batcher.submit_many(chunks)
+            try:
+                for i, (chunk, future) in enumerate(zip(chunks, futures)):
+                    try:
+                        summary = await asyncio.wrap_future(future)
+                        chunk_summaries.append(summary)
+                        
+                        # Stream individual chunk summary
+                        yield await generate_stream_event(
+                            "chunk_summary",
+                            {
+                                "chunk_index": i,
+                                "total_chunks": len(chunks),
+                                "summary": summary,
+                                "chunk_length": len(chunk.split()),
+                                "summary_length": len(summary.split())
+                            },
+                            iteration=iteration
+                        )
                     
-                    # Small delay to allow client to process
-                    await asyncio.sleep(0.01)
-                
-                except Exception as e:
-                    chunk_summaries.append(chunk[:100])
-                    yield await generate_stream_event(
-                        "chunk_summary_error",
-                        {
-                            "chunk_index": i,
-                            "error": str(e)[:100],
-                            "fallback": "Used first 100 chars"
-                        },
-                        iteration=iteration
-                    )
+                    except Exception as e:
+                        chunk_summaries.append(chunk[:100])
+                        yield await generate_stream_event(
+                            "chunk_summary_error",
+                            {
+                                "chunk_index": i,
+                                "error": str(e)[:100],
+                                "fallback": "Used first 100 chars"
+                            },
+                            iteration=iteration
+                        )
+            finally:
+                # Client disconnected: drop the chunks that haven't been batched yet
+                for future in futures:
+                    future.cancel()
             
             # Calculate compression metrics
             combined_length_after = len(' '.join(chunk_summaries))
@@ -801,7 +580,7 @@ async def summarize_with_streaming(text: str, max_length: int = 200, min_length:
             
             # Prepare for next iteration
             full_text = ' '.join(chunk_summaries)
-            chunks = chunk_text(full_text, max_length=1000)
+            chunks = chunk_for_summary(full_text)
             
             yield await generate_stream_event(
                 "rechunking",
@@ -828,43 +607,18 @@ async def summarize_with_streaming(text: str, max_length: int = 200, min_length:
 # ============================================================================
 
 class TinyLLamaChatbot:
-    def __init__(self, knowledge_base, embed_model, embed_tokenizer, llm_pipeline, device="cpu"):
-        """Initialize chatbot with TinyLLama"""
-        self.knowledge_base = knowledge_base
-        self.embed_model = embed_model
-        self.embed_tokenizer = embed_tokenizer
+    def __init__(self, kb_manager, llm_pipeline):
+        """Initialize chatbot with TinyLLama; context comes from the per-policy knowledge bases"""
+        self.kb_manager = kb_manager
         self.llm = llm_pipeline
-        self.device = device
-        self.query_cache = {}
-        
-    def embed_query(self, query):
-        """Embed query with TinyLLama (CPU)"""
-        if query in self.query_cache:
-            return self.query_cache[query]
-        
-        inputs = self.embed_tokenizer(query, return_tensors="pt", truncation=True, max_length=512)
-        
-        with torch.no_grad():
-            outputs = self.embed_model(**inputs)
-            query_embedding = outputs.last_hidden_state.mean(dim=1).numpy()[0]
-        
-        self.query_cache[query] = query_embedding
-        return query_embedding
     
-    def retrieve_context(self, query, top_k=2):
-        """Retrieve top-k relevant chunks"""
-        query_embedding = self.embed_query(query)
-        similarities = cosine_similarity([query_embedding], self.knowledge_base['embeddings'])[0]
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
-        
-        context_chunks = [self.knowledge_base['chunks'][i] for i in top_indices]
-        scores = [similarities[i] for i in top_indices]
-        
-        return context_chunks, scores
+    def retrieve_context(self, query, top_k=2, policy=DEFAULT_KB):
+        """Retrieve top-k relevant chunks of one policy"""
+        return self.kb_manager.retrieve(policy, query, top_k=top_k)
     
-    def answer_question(self, question, top_k=2):
+    def answer_question(self, question, top_k=2, policy=DEFAULT_KB):
         """Generate answer using TinyLLama"""
-        context_chunks, scores = self.retrieve_context(question, top_k=top_k)
+        context_chunks, scores = self.retrieve_context(question, top_k=top_k, policy=policy)
         context_str = "\n".join([f"[Ref {i+1}] {chunk}" for i, chunk in enumerate(context_chunks)])
         
         # Create prompt for TinyLLama
@@ -913,32 +667,17 @@ summarizer = pipeline(
     device=0,
 )
 
-# Load TinyLLama for embeddings on CPU
-print("2. Loading TinyLLama 1.1B for embeddings (CPU)...")
-embed_tokenizer = AutoTokenizer.from_pretrained("TinyLlama/TinyLlama-1.1B-Chat-v1.0")
-embed_model = AutoModel.from_pretrained(
-    "TinyLlama/TinyLlama-1.1B-Chat-v1.0",
-    dtype=torch.float32
-)
-
-# Extract and chunk privacy policy
-print("3. Processing privacy policy...")
-full_text = extract_clean_content_from_file("privacy_policy_clean.txt")
-policy_chunks = chunk_text(full_text, max_length=400)
-print(f"   Created {len(policy_chunks)} chunks")
-
-# Generate embeddings
-print("4. Generating embeddings for all chunks (CPU)...")
-chunk_embeddings = get_embeddings(policy_chunks, embed_model, embed_tokenizer, device="cpu")
+# Knowledge bases are built per scraped policy and loaded on demand, so nothing
+# is embedded (and no embedding model is loaded) at startup
+print("2. Setting up policy knowledge bases...")
+kb_manager = KnowledgeBaseManager(chunker=lambda text: chunk_text(text, max_length=400))
 
-knowledge_base = {
-    'chunks': policy_chunks,
-    'embeddings': chunk_embeddings,
-    'num_chunks': len(policy_chunks)
-}
+def load_default_policy():
+    """Text of the bundled policy, used when a question doesn't name a policy"""
+    return extract_clean_content_from_file("privacy_policy_clean.txt")
 
 # Load TinyLLama for text generation with 4-bit quantization
-print("5. Loading 4-bit quantized TinyLLama for text generation (GPU)...")
+print("3. Loading 4-bit quantized TinyLLama for text generation (GPU)...")
 bnb_config = BitsAndBytesConfig(
     load_in_4bit=True,
     bnb_4bit_use_double_quant=True,
@@ -955,14 +694,14 @@ llm_pipeline = pipeline(
 llm_pipeline.tokenizer.pad_token = llm_pipeline.tokenizer.eos_token
 
 # Initialize chatbot
-print("6. Initializing chatbot...")
-chatbot = TinyLLamaChatbot(
-    knowledge_base=knowledge_base,
-    embed_model=embed_model,
-    embed_tokenizer=embed_tokenizer,
-    llm_pipeline=llm_pipeline,
-    device="cpu"
-)
+print("4. Initializing chatbot...")
+chatbot = TinyLLamaChatbot(kb_manager=kb_manager, llm_pipeline=llm_pipeline)
+
+# All summarization goes through one batching worker that owns the BART pipeline
+summary_batcher = SummaryBatcher(summarizer, max_batch_size=8, max_wait=0.05)
+
+# Scraped policies: memory LRU -> SQLite -> Firebase (see policy_cache.py)
+policy_cache = TieredPolicyCache(get_remote=get_firebase_db)
 
 print("\n✓ All models loaded successfully!")
 
@@ -988,6 +727,8 @@ class ChatRequest(BaseModel):
     """Request model for chatbot Q&A"""
     question: str
     top_k: int = 3
+    package_name: str = None  # Optional - ask about this app's scraped policy
+    url: str = None  # Optional - ask about the policy scraped from this URL
 
 class ChatResponse(BaseModel):
     """Response model for chatbot"""
@@ -1014,17 +755,31 @@ class HealthResponse(BaseModel):
     """Health check response"""
     status: str
     available_chatbots: List[str]
+    cache: dict = None  # policy cache hit/miss metrics
 
 # ============================================================================
 # API ENDPOINTS
 # ============================================================================
 
+def index_policy_in_background(package_name, url, policy_content, source_url=None):
+    """Build the chat knowledge base for a scraped policy without delaying the response"""
+    key = policy_key(package_name, url)
+    
+    def build():
+        try:
+            kb_manager.build(key, policy_content, source_url=source_url)
+        except Exception as e:
+            print(f"[KB] Failed to index {key}: {str(e)}")
+    
+    asyncio.get_running_loop().run_in_executor(None, build)
+
 @app.get("/", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "available_chatbots": ["TinyLLama 1.1B (CPU embeddings + 4-bit quantized generation)"]
+        "available_chatbots": ["TinyLLama 1.1B (CPU embeddings + 4-bit quantized generation)"],
+        "cache": policy_cache.stats()
     }
 
 @app.post("/scrape", response_model=ScrapeResponse)
@@ -1055,7 +810,8 @@ async def scrape_and_summarize(request: ScrapeRequest):
         # Check if this is a Play Store request
         if request.package_name:
             print(f"\n[SCRAPE] Play Store mode: package={request.package_name}")
-            result = scrape_play_store_privacy_policy(
+            result = await asyncio.to_thread(
+                scrape_play_store_privacy_policy,
                 request.package_name,
                 use_javascript=request.use_javascript,
                 wait_time=request.wait_time
@@ -1079,7 +835,8 @@ async def scrape_and_summarize(request: ScrapeRequest):
             
             # Scrape and extract clean content
             print(f"[SCRAPE] Scraping webpage...")
-            policy_content = scrape_and_extract_clean(
+            policy_content = await asyncio.to_thread(
+                scrape_and_extract_clean,
                 request.url,
                 use_javascript=request.use_javascript,
                 wait_time=request.wait_time
@@ -1103,12 +860,12 @@ async def scrape_and_summarize(request: ScrapeRequest):
         print(f"[SCRAPE] Content length: {len(words)} words")
         
         # Split into initial chunks
-        chunks = chunk_text(text, max_length=1000)
+        chunks = chunk_for_summary(text)
         print(f"[SCRAPE] Initial chunks: {len(chunks)}")
         
         # Summarize each chunk
         print(f"[SCRAPE] Summarizing chunks...")
-        chunk_summaries = summarize_chunks_sequentially(chunks, summarizer)
+        chunk_summaries = await summarize_chunks(chunks)
         
         print(f"[SCRAPE] Generated {len(chunk_summaries)} summaries")
         
@@ -1118,10 +875,10 @@ async def scrape_and_summarize(request: ScrapeRequest):
             print(f"[SCRAPE] Iteration {iteration}: Combined summaries {len(' '.join(chunk_summaries).split())} words, reducing...")
             
             full_text = ' '.join(chunk_summaries)
-            chunks = chunk_text(full_text, max_length=1000)
+            chunks = chunk_for_summary(full_text)
             print(f"[SCRAPE] Reprocessing {len(chunks)} chunks")
             
-            chunk_summaries = summarize_chunks_sequentially(chunks, summarizer)
+            chunk_summaries = await summarize_chunks(chunks)
             iteration += 1
         
         # Join final summaries
@@ -1130,6 +887,8 @@ async def scrape_and_summarize(request: ScrapeRequest):
         print(f"[SCRAPE] Final summary: {len(summary.split())} words")
         print(f"[SCRAPE] Scrape and summarization complete!")
         
+        index_policy_in_background(request.package_name, request.url, policy_content, source_url)
+        
         return {
             "policy_content": policy_content,
             "summary": summary,
@@ -1167,12 +926,12 @@ async def summarize_policy(request: SummarizeRequest):
         print(f"Summarization request: {len(words)} words")
         
         # Split into initial chunks
-        chunks = chunk_text(text, max_length=1000)
+        chunks = chunk_for_summary(text)
         print(f"Initial chunks: {len(chunks)}")
         
         # Summarize each chunk
         print("Summarizing chunks...")
-        chunk_summaries = summarize_chunks_sequentially(chunks, summarizer)
+        chunk_summaries = await summarize_chunks(chunks)
         
         print(f"Generated {len(chunk_summaries)} summaries")
         
@@ -1182,10 +941,10 @@ async def summarize_policy(request: SummarizeRequest):
             print(f"\nIteration {iteration}: Combined summaries {len(' '.join(chunk_summaries).split())} words, reducing...")
             
             full_text = ' '.join(chunk_summaries)
-            chunks = chunk_text(full_text, max_length=1000)
+            chunks = chunk_for_summary(full_text)
             print(f"Reprocessing {len(chunks)} chunks")
             
-            chunk_summaries = summarize_chunks_sequentially(chunks, summarizer)
+            chunk_summaries = await summarize_chunks(chunks)
             iteration += 1
         
         # Join final summaries without additional summarization
@@ -1212,6 +971,7 @@ async def chat_question(request: ChatRequest):
     Args:
         question: The question to ask
         top_k: Number of context chunks to retrieve (1-5)
+        package_name / url: Which scraped policy to ask about (default: the bundled policy)
     
     Returns:
         Answer with context chunks and relevance scores
@@ -1224,8 +984,18 @@ async def chat_question(request: ChatRequest):
         if request.top_k < 1 or request.top_k > 5:
             raise HTTPException(status_code=400, detail="top_k must be between 1 and 5")
         
-        # Get answer from chatbot
-        response = chatbot.answer_question(request.question, top_k=request.top_k)
+        # Pick the knowledge base of the requested policy (the bundled one by default)
+        policy = policy_key(request.package_name, request.url)
+        if policy == DEFAULT_KB:
+            kb = await asyncio.to_thread(kb_manager.get_or_build, DEFAULT_KB, load_default_policy)
+        else:
+            kb = await asyncio.to_thread(kb_manager.get, policy)
+        if kb is None:
+            raise HTTPException(status_code=404, detail="No knowledge base for this policy yet - scrape it first")
+        
+        # Get answer from chatbot (off the event loop: retrieval may load the encoder)
+        response = await asyncio.to_thread(
+            chatbot.answer_question, request.question, top_k=request.top_k, policy=policy)
         
         return {
             "answer": response['answer'],
@@ -1277,39 +1047,59 @@ async def summarize_policy_stream(request: SummarizeRequest):
 async def scrape_and_summarize_stream(request: ScrapeRequest):
     """
     Scrape a website and summarize with real-time streaming
-    Checks Firebase cache first to avoid redundant scraping
+    Checks the policy cache (memory, local SQLite, then Firebase) first to avoid redundant scraping.
+    Concurrent requests for the same package share one scrape: later ones wait and get a cache hit.
     
     Returns a stream of events:
-    - cache_hit: Found in Firebase (skips scraping)
+    - cache_hit: Found in the cache (skips scraping)
     - cache_miss: Not in cache (proceeds with scraping)
+    - cache_wait: Same package is already being scraped, waiting for it
     - scrape_start: Scraping begins
     - scrape_complete: HTML extracted
     - extraction_complete: Clean content extracted
     - policy_content: Full cleaned policy
     - (then same as /summarize-stream events)
-    - cache_save_complete: Successfully saved to Firebase
+    - cache_save_complete: Saved to the cache (Firebase is updated in the background)
     """
     async def scrape_summarize_stream():
+        flight = None
         try:
             source_url = None
             policy_content = None
             from_cache = False
             
-            # Check Firebase cache first if package_name is provided
+            # Check the cache first if package_name is provided
             if request.package_name:
-                print(f"[CACHE] Checking Firebase for: {request.package_name}")
-                cached_data = check_cache(request.package_name)
+                print(f"[CACHE] Checking cache for: {request.package_name}")
+                while True:
+                    cached_data = await policy_cache.get_async(request.package_name)
+                    if cached_data:
+                        break
+                    flight = policy_cache.flight(request.package_name)
+                    if flight.leader:
+                        break
+                    # Someone is scraping this package right now: wait and read their result
+                    print(f"[CACHE] Waiting for in-progress scrape of {request.package_name}")
+                    yield await generate_stream_event("cache_wait", {
+                        "package_name": request.package_name,
+                        "message": "Already being scraped, waiting for the result"
+                    })
+                    await flight.wait()
+                    flight = None
                 
                 if cached_data:
-                    print(f"[CACHE] Cache HIT for {request.package_name}")
+                    print(f"[CACHE] Cache HIT ({cached_data['tier']}) for {request.package_name}")
                     yield await generate_stream_event("cache_hit", {
                         "package_name": request.package_name,
-                        "message": "Found in Firebase cache"
+                        "tier": cached_data['tier'],
+                        "message": "Found in policy cache"
                     })
                     
                     policy_content = cached_data.get('policy')
                     source_url = cached_data.get('source_url')
                     from_cache = True
+                    if policy_content:
+                        index_policy_in_background(request.package_name, request.url, policy_content, source_url)
                     
                     # Stream the cached policy content
                     yield await generate_stream_event("policy_content", {
@@ -1338,7 +1128,7 @@ async def scrape_and_summarize_stream(request: ScrapeRequest):
                     print(f"[CACHE] Cache MISS for {request.package_name}")
                     yield await generate_stream_event("cache_miss", {
                         "package_name": request.package_name,
-                        "message": "Not in Firebase cache, proceeding with scraping"
+                        "message": "Not in cache, proceeding with scraping"
                     })
             
             # If we get here, not in cache - proceed with scraping
@@ -1348,7 +1138,8 @@ async def scrape_and_summarize_stream(request: ScrapeRequest):
                     "package_name": request.package_name
                 })
                 
-                result = scrape_play_store_privacy_policy(
+                result = await asyncio.to_thread(
+                    scrape_play_store_privacy_policy,
                     request.package_name,
                     use_javascript=request.use_javascript,
                     wait_time=request.wait_time
@@ -1373,7 +1164,8 @@ async def scrape_and_summarize_stream(request: ScrapeRequest):
                     "use_javascript": request.use_javascript
                 })
                 
-                policy_content = scrape_and_extract_clean(
+                policy_content = await asyncio.to_thread(
+                    scrape_and_extract_clean,
                     request.url,
                     use_javascript=request.use_javascript,
                     wait_time=request.wait_time
@@ -1390,6 +1182,8 @@ async def scrape_and_summarize_stream(request: ScrapeRequest):
                 "source_url": source_url
             })
             
+            index_policy_in_background(request.package_name, request.url, policy_content, source_url)
+            
             # Stream the full cleaned policy content to the client
             yield await generate_stream_event("policy_content", {
                 "content": policy_content,
@@ -1418,26 +1212,33 @@ async def scrape_and_summarize_stream(request: ScrapeRequest):
                 
                 yield event
             
-            # Save to Firebase if we just scraped and summarized (not from cache)
+            # Save to the cache if we just scraped and summarized (not from cache);
+            # Firebase is written in the background
             if not from_cache and request.package_name and final_summary and policy_content:
-                print(f"[FIREBASE] Saving to cache: {request.package_name}")
-                if save_to_cache(
+                print(f"[CACHE] Saving to cache: {request.package_name}")
+                if await asyncio.to_thread(
+                    policy_cache.put,
                     request.package_name,
                     policy_content,
                     final_summary,
                     source_url or ""
                 ):
-                    print(f"[FIREBASE] Successfully saved {request.package_name}")
+                    print(f"[CACHE] Successfully saved {request.package_name}")
                     yield await generate_stream_event("cache_save_complete", {
                         "package_name": request.package_name,
-                        "message": "Policy saved to Firebase cache for future requests"
+                        "message": "Policy saved to cache for future requests"
                     })
                 else:
-                    print(f"[FIREBASE] Failed to save {request.package_name}")
+                    print(f"[CACHE] Failed to save {request.package_name}")
         
         except Exception as e:
             print(f"[ERROR] {str(e)}")
             yield await generate_stream_event("error", {"error_message": str(e)})
+        
+        finally:
+            # Let requests waiting on this package go ahead (they find the result in the cache)
+            if flight is not None:
+                flight.finish()
     
     return StreamingResponse(scrape_summarize_stream(), media_type="text/event-stream")
 
@@ -1455,6 +1256,12 @@ async def chat_stream(request: ChatRequest):
 @app.on_event("startup")
 async def startup_event():
     """Log when server starts"""
+    summary_batcher.start()
+    policy_cache.start()
+    # Start a browser in the background so the first JavaScript scrape doesn't pay for it
+    fetcher = get_fetcher()
+    if getattr(fetcher, "pool", None) is not None:
+        asyncio.get_running_loop().run_in_executor(None, fetcher.pool.warm_up)
     print("\n✓ FastAPI server started on http://localhost:8000")
     print("✓ Both chatbots are ready!")
     print("\nAPI Documentation:")
@@ -1465,6 +1272,9 @@ async def startup_event():
 async def shutdown_event():
     """Clean up on shutdown"""
     print("\n✓ Shutting down server...")
+    summary_batcher.stop()
+    policy_cache.close()
+    get_fetcher().close()
     torch.cuda.empty_cache()
     gc.collect()
     print("✓ GPU memory cleared")
@@ -1474,8 +1284,6 @@ async def shutdown_event():
 # ============================================================================
 
 if __name__ == "__main__":
-    import os
-    
     # Support both local development and HuggingFace Spaces
     # HuggingFace Spaces expects port 7860
     port = int(os.getenv("PORT", 7860))
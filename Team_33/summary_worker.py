@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Batched summarisation worker for the BART summarizer
+
+The summarizer pipeline is not thread-safe and runs one text per call, so
+calling it from the FastAPI handlers blocks the event loop and makes
+concurrent /summarize-stream requests wait for each other. SummaryBatcher
+owns the pipeline on a single worker thread instead:
+
+- handlers submit chunks and await the results without blocking the loop
+- chunks from all concurrent requests are collected into one batch, waiting
+  at most `max_wait` seconds after the first one for more to arrive
+- each chunk's future resolves as soon as its batch is done, so streaming
+  handlers can emit that chunk's event straight away
+
+Usage:
+    batcher = SummaryBatcher(summarizer)
+    summary = await batcher.summarize(chunk)
+    for future in batcher.submit_many(chunks):
+        summary = await asyncio.wrap_future(future)
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Generation settings used for every chunk (same as the per-chunk calls before)
+CHUNK_SUMMARY_KWARGS = {
+    "max_length": 100,
+    "min_length": 30,
+    "do_sample": False,
+    "truncation": True,
+}
+
+
+class SummaryBatcher:
+    """Dynamic batching in front of a transformers summarization pipeline"""
+
+    def __init__(self, summarizer, max_batch_size=8, max_wait=0.05, **generate_kwargs):
+        """
+        Args:
+            summarizer: transformers summarization pipeline (or any callable with the same interface)
+            max_batch_size: Most chunks summarized in one model call - 8 is safe for 4GB VRAM
+            max_wait: Seconds to wait for more chunks after the first one arrives
+            generate_kwargs: Overrides for CHUNK_SUMMARY_KWARGS
+        """
+        self.summarizer = summarizer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.generate_kwargs = {**CHUNK_SUMMARY_KWARGS, **generate_kwargs}
+        self.requests = queue.Queue()
+        self.stats = {"batches": 0, "chunks": 0, "failed_batches": 0}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # -------------------- lifecycle --------------------
+    def start(self):
+        """Start the worker thread (no-op if it is already running)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="summary-batcher", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop the worker after the batch in progress"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self.requests.put(None)
+            thread.join(timeout=timeout)
+
+    # -------------------- submitting --------------------
+    def submit(self, text) -> Future:
+        """Queue one chunk; the future resolves to its summary text"""
+        self.start()
+        future = Future()
+        self.requests.put((text, future))
+        return future
+
+    def submit_many(self, texts) -> list:
+        """Queue several chunks in order; returns one future per chunk"""
+        return [self.submit(text) for text in texts]
+
+    async def summarize(self, text) -> str:
+        """Summary of one chunk, awaited without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def summarize_sync(self, texts) -> list:
+        """Blocking variant for scripts and worker threads"""
+        return [future.result() for future in self.submit_many(texts)]
+
+    # -------------------- worker --------------------
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or max_wait passes"""
+        first = self.requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self.requests.put(None)  # stop after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # Requests whose client went away were cancelled; don't spend the GPU on them
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if batch:
+                self._process(batch)
+
+    def _process(self, batch):
+        texts = [text for text, _ in batch]
+        try:
+            results = self.summarizer(texts, batch_size=len(texts), **self.generate_kwargs)
+            summaries = [result["summary_text"] for result in _flatten(results)]
+            if len(summaries) != len(texts):
+                raise ValueError(f"Expected {len(texts)} summaries, got {len(summaries)}")
+        except Exception as e:
+            # One bad chunk fails the whole batch: retry one by one so only that chunk errors
+            print(f"[WARNING] Batch of {len(texts)} chunks failed, retrying individually: {str(e)[:50]}")
+            self.stats["failed_batches"] += 1
+            for text, future in batch:
+                try:
+                    result = self.summarizer(text, **self.generate_kwargs)
+                    future.set_result(_flatten(result)[0]["summary_text"])
+                except Exception as chunk_error:
+                    future.set_exception(chunk_error)
+            return
+        finally:
+            self.stats["batches"] += 1
+            self.stats["chunks"] += len(texts)
+
+        for (_, future), summary in zip(batch, summaries):
+            future.set_result(summary)
+
+
+def _flatten(results):
+    """Pipelines return [{...}] for one text and [{...}, ...] or [[{...}], ...] for a list"""
+    if isinstance(results, dict):
+        return [results]
+    return [result[0] if isinstance(result, list) else result for result in results]
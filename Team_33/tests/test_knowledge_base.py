@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test per-policy knowledge bases with a fake bag-of-words encoder (no model needed)
+Run from the project root: python -m pytest tests/test_knowledge_base.py
+"""
+
+import tempfile
+
+import numpy as np
+
+from knowledge_base import KnowledgeBaseManager, policy_key
+
+VOCAB = ["location", "cookies", "advertising", "delete", "account", "children", "share", "third"]
+
+
+class FakeEncoder:
+    """Counts vocabulary words; records how many texts it was asked to encode"""
+    name = "fake"
+
+    def __init__(self):
+        self.encoded = 0
+        self.calls = 0
+
+    def encode(self, texts):
+        self.encoded += len(texts)
+        self.calls += 1
+        return np.array([[text.lower().count(word) + 0.01 for word in VOCAB] for text in texts])
+
+
+def sentence_chunker(text):
+    return [sentence.strip() for sentence in text.split(".") if sentence.strip()]
+
+
+POLICY_A = ("We collect your location to show nearby stores. "
+            "Cookies are used for advertising. "
+            "You can delete your account at any time.")
+POLICY_B = ("We never share data with third parties. "
+            "Children under 13 may not use the service.")
+
+
+def test_build_search_and_reload():
+    with tempfile.TemporaryDirectory() as store:
+        encoder = FakeEncoder()
+        manager = KnowledgeBaseManager(sentence_chunker, store_dir=store, encoder=encoder)
+        kb = manager.build("com.example.a", POLICY_A)
+        assert kb.num_chunks == 3
+        assert encoder.calls == 1  # all chunks in one batch
+
+        chunks, scores = manager.retrieve("com.example.a", "how do I delete my account", top_k=2)
+        assert chunks[0] == "You can delete your account at any time"
+        assert scores[0] >= scores[1]
+
+        # A fresh manager (server restart) loads the index from disk without encoding anything
+        restarted_encoder = FakeEncoder()
+        restarted = KnowledgeBaseManager(sentence_chunker, store_dir=store, encoder=restarted_encoder)
+        assert restarted.get("com.example.a").chunks == kb.chunks
+        assert restarted.get("com.example.missing") is None
+        assert restarted_encoder.encoded == 0
+
+        # Same text again is not re-embedded
+        restarted.build("com.example.a", POLICY_A)
+        assert restarted_encoder.encoded == 0
+    print("✓ build, search and reload")
+
+
+def test_policies_are_separate():
+    with tempfile.TemporaryDirectory() as store:
+        manager = KnowledgeBaseManager(sentence_chunker, store_dir=store, encoder=FakeEncoder())
+        manager.build("a", POLICY_A)
+        manager.build("b", POLICY_B)
+        chunks_b, _ = manager.retrieve("b", "do you share data with third parties", top_k=1)
+        assert chunks_b == ["We never share data with third parties"]
+        chunks_a, _ = manager.retrieve("a", "do you share data with third parties", top_k=5)
+        assert set(chunks_a) <= set(sentence_chunker(POLICY_A))
+    print("✓ each policy answers from its own chunks")
+
+
+def test_lru_bounds_memory():
+    with tempfile.TemporaryDirectory() as store:
+        manager = KnowledgeBaseManager(sentence_chunker, store_dir=store, encoder=FakeEncoder(),
+                                       max_loaded=2, query_cache_size=3)
+        for key in ("a", "b", "c"):
+            manager.build(key, POLICY_A if key != "b" else POLICY_B)
+        assert list(manager._loaded) == ["b", "c"]
+        assert manager.get("a") is not None  # evicted ones come back from disk
+        assert list(manager._loaded) == ["c", "a"]
+
+        for question in ("q1 location", "q2 cookies", "q3 account", "q4 children"):
+            manager.embed_query(question)
+        assert list(manager._query_cache) == ["q2 cookies", "q3 account", "q4 children"]
+    print("✓ loaded knowledge bases and query cache are bounded")
+
+
+def test_policy_keys():
+    assert policy_key("com.whatsapp") == "com.whatsapp"
+    url_key = policy_key(url="https://example.com/privacy?lang=en")
+    assert url_key.startswith("example-com-privacy-lang-en-")
+    assert "/" not in url_key
+    assert policy_key() == "default"
+    print("✓ policy keys are file-safe")
+
+
+if __name__ == "__main__":
+    print("Testing KnowledgeBaseManager")
+    print("=" * 60)
+    test_build_search_and_reload()
+    test_policies_are_separate()
+    test_lru_bounds_memory()
+    test_policy_keys()
+    print("=" * 60)
+    print("All knowledge base tests passed! ✓")
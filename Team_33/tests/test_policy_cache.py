@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test the tiered policy cache against a fake Firebase (no credentials needed)
+Run from the project root: python -m pytest tests/test_policy_cache.py
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+from policy_cache import FakeFirebaseDatabase, TieredPolicyCache
+
+POLICY = "We collect your email address and location to provide the service. " * 20
+SUMMARY = "Collects email and location."
+
+
+def make_cache(directory, remote, **kwargs):
+    kwargs.setdefault("retry_delay", 0.01)
+    cache = TieredPolicyCache(get_remote=lambda: remote, db_path=os.path.join(directory, "cache.sqlite3"),
+                              **kwargs)
+    cache.start()
+    return cache
+
+
+def test_tiers_and_metrics():
+    remote = FakeFirebaseDatabase({"com.example.app": {
+        "policy": POLICY, "summary": SUMMARY, "source_url": "https://example.com/privacy", "cached_at": 1}})
+    with tempfile.TemporaryDirectory() as directory:
+        cache = make_cache(directory, remote)
+        assert cache.get("com.example.app")["tier"] == "remote"
+        assert cache.get("com.example.app")["tier"] == "memory"
+        assert cache.get("com.unknown") is None
+        assert remote.calls["get"] == 2
+        cache.close()
+
+        # A restarted server still has it on disk
+        cache = make_cache(directory, remote)
+        cached = cache.get("com.example.app")
+        assert cached["tier"] == "disk" and cached["summary"] == SUMMARY
+        assert remote.calls["get"] == 2
+
+        stats = cache.stats()
+        assert stats["disk_hits"] == 1 and stats["hits"] == 1 and stats["hit_rate"] == 1.0
+        cache.close()
+    print("✓ memory, disk and Firebase tiers; Firebase hits are copied locally")
+
+
+def test_expired_local_copy_asks_firebase():
+    remote = FakeFirebaseDatabase()
+    with tempfile.TemporaryDirectory() as directory:
+        cache = make_cache(directory, remote, ttl=0.05)
+        cache.put("com.example.app", POLICY, SUMMARY, "https://example.com/privacy")
+        assert cache.flush(timeout=5)
+        time.sleep(0.1)
+        remote.policies["com.example.app"]["summary"] = "Updated by another server."
+        assert cache.get("com.example.app")["summary"] == "Updated by another server."
+        cache.close()
+    print("✓ local copies past the TTL are refreshed from Firebase")
+
+
+def test_write_behind():
+    remote = FakeFirebaseDatabase(latency=0.2)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = make_cache(directory, remote)
+        start = time.perf_counter()
+        cache.put("com.example.app", POLICY, SUMMARY, "https://example.com/privacy")
+        assert time.perf_counter() - start < 0.1  # doesn't wait for Firebase
+        assert cache.get("com.example.app")["tier"] == "memory"
+        assert cache.flush(timeout=5)
+        assert remote.policies["com.example.app"]["summary"] == SUMMARY
+        assert cache.disk.unsynced() == []
+        assert cache.stats()["remote_writes"] == 1
+        cache.close()
+    print("✓ saves return immediately and reach Firebase in the background")
+
+
+def test_failed_writes_are_retried_after_restart():
+    remote = FakeFirebaseDatabase(fail_saves=10)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = make_cache(directory, remote, write_retries=2)
+        cache.put("com.example.app", POLICY, SUMMARY, "https://example.com/privacy")
+        assert cache.flush(timeout=5)
+        assert "com.example.app" not in remote.policies
+        assert cache.disk.unsynced() == ["com.example.app"]
+        assert cache.stats()["remote_write_failures"] == 1
+        cache.close()
+
+        remote.fail_saves = 0
+        cache = make_cache(directory, remote)
+        assert cache.flush(timeout=5)
+        assert remote.policies["com.example.app"]["policy"] == POLICY
+        assert cache.disk.unsynced() == []
+        cache.close()
+    print("✓ saves Firebase rejected are pushed again after a restart")
+
+
+def test_without_firebase():
+    remote = FakeFirebaseDatabase(connected=False)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = make_cache(directory, remote)
+        assert cache.get("com.example.app") is None
+        cache.put("com.example.app", POLICY, SUMMARY, "")
+        assert cache.get("com.example.app")["summary"] == SUMMARY
+        assert cache.flush(timeout=5)
+        assert remote.calls == {"get": 0, "save": 0}
+        cache.close()
+    print("✓ works as a local cache when Firebase isn't configured")
+
+
+def test_single_flight():
+    remote = FakeFirebaseDatabase()
+    scrapes = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = make_cache(directory, remote)
+
+        async def request(package_name):
+            """What /scrape-stream does: cache, else lead or wait for the scrape"""
+            flight = None
+            try:
+                while True:
+                    cached = await cache.get_async(package_name)
+                    if cached:
+                        return cached["tier"]
+                    flight = cache.flight(package_name)
+                    if flight.leader:
+                        break
+                    await flight.wait()
+                    flight = None
+                scrapes.append(package_name)
+                await asyncio.sleep(0.1)  # scrape + summarise
+                cache.put(package_name, POLICY, SUMMARY, "")
+                return "scraped"
+            finally:
+                if flight is not None:
+                    flight.finish()
+
+        async def main():
+            return await asyncio.gather(*[request("com.example.app") for _ in range(5)],
+                                        request("com.other.app"))
+
+        results = asyncio.run(main())
+        assert sorted(scrapes) == ["com.example.app", "com.other.app"]
+        assert results.count("scraped") == 2 and results.count("memory") == 4
+        assert cache.stats()["coalesced_requests"] == 4
+        assert cache.stats()["in_flight"] == 0
+        cache.close()
+    print("✓ five concurrent requests for one package trigger one scrape")
+
+
+def test_single_flight_after_failed_leader():
+    async def main():
+        from policy_cache import SingleFlight
+        flights = SingleFlight()
+        leader = flights.join("com.example.app")
+        follower = flights.join("com.example.app")
+        assert leader.leader and not follower.leader
+        leader.finish()  # e.g. the scrape failed: nothing in the cache
+        await asyncio.wait_for(follower.wait(), timeout=1)
+        assert flights.join("com.example.app").leader  # the follower can take over
+
+    asyncio.run(main())
+    print("✓ followers are released when the leader fails")
+
+
+if __name__ == "__main__":
+    print("Testing policy cache")
+    print("=" * 60)
+    test_tiers_and_metrics()
+    test_expired_local_copy_asks_firebase()
+    test_write_behind()
+    test_failed_writes_are_retried_after_restart()
+    test_without_firebase()
+    test_single_flight()
+    test_single_flight_after_failed_leader()
+    print("=" * 60)
+    print("All policy cache tests passed! ✓")
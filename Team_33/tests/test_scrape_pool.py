@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Test the pooled page fetcher against a local HTTP server and a fake browser
+(no Chrome or internet needed), plus the FixtureFetcher test double
+Run from the project root: python -m pytest tests/test_scrape_pool.py
+"""
+
+import asyncio
+import functools
+import os
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from scrape_pool import BrowserPool, FixtureFetcher, HtmlCache, PageFetcher
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class FixtureServer:
+    """Serves tests/fixtures over HTTP on a free local port; counts requests"""
+
+    def __init__(self):
+        server = self
+
+        class Handler(SimpleHTTPRequestHandler):
+            def do_GET(self):
+                server.hits += 1
+                super().do_GET()
+
+            def log_message(self, *args):
+                pass
+
+        self.hits = 0
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=FIXTURES))
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def url(self, name):
+        return f"{self.base}/{name}"
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+class FakeDriver:
+    """Just enough of a selenium webdriver: 'renders' every page to the saved policy"""
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def __init__(self, render_time=0.0):
+        self.render_time = render_time
+        self.visited = []
+        with open(os.path.join(FIXTURES, "example_privacy.html"), encoding="utf-8") as f:
+            self.rendered = f.read()
+        self.page_source = ""
+
+    def get(self, url):
+        if url == "about:blank":
+            self.page_source = ""
+            return
+        with FakeDriver.lock:
+            FakeDriver.active += 1
+            FakeDriver.max_active = max(FakeDriver.max_active, FakeDriver.active)
+        time.sleep(self.render_time)
+        with FakeDriver.lock:
+            FakeDriver.active -= 1
+        self.visited.append(url)
+        self.page_source = self.rendered
+
+    def find_element(self, by, value):
+        return object()
+
+    def execute_script(self, script):
+        if "readyState" in script:
+            return "complete"
+        return len(self.page_source)
+
+    def delete_all_cookies(self):
+        pass
+
+    def quit(self):
+        pass
+
+
+def make_fetcher(cache_dir=None, render_time=0.0, per_domain=2, pool_size=2):
+    drivers = []
+
+    def factory():
+        driver = FakeDriver(render_time)
+        drivers.append(driver)
+        return driver
+
+    pool = BrowserPool(size=pool_size, driver_factory=factory)
+    cache = HtmlCache(cache_dir, ttl=3600) if cache_dir else None
+    return PageFetcher(pool=pool, cache=cache, per_domain=per_domain, settle_time=0.5), drivers
+
+
+def test_static_page_skips_browser():
+    server = FixtureServer()
+    try:
+        fetcher, drivers = make_fetcher()
+        html = fetcher.fetch(server.url("example_privacy.html"), use_javascript=True)
+        assert "Privacy Policy" in html
+        assert drivers == []  # plain HTTP had the content: no browser started
+        assert fetcher.stats["http"] == 1 and fetcher.stats["browser"] == 0
+    finally:
+        server.close()
+    print("✓ static page served by the HTTP fast path")
+
+
+def test_js_pages_reuse_one_browser():
+    server = FixtureServer()
+    try:
+        fetcher, drivers = make_fetcher()
+        for _ in range(3):
+            html = fetcher.fetch(server.url("js_app_shell.html"), use_javascript=True)
+            assert "Privacy Policy" in html  # rendered by the (fake) browser
+        assert len(drivers) == 1
+        assert len(drivers[0].visited) == 3
+        assert fetcher.pool.starts == 1
+    finally:
+        server.close()
+    print("✓ three JavaScript pages rendered by one warm browser")
+
+
+def test_accept_predicate_decides_fast_path():
+    server = FixtureServer()
+    try:
+        fetcher, drivers = make_fetcher()
+        html = fetcher.fetch(server.url("play_store_datasafety.html"), use_javascript=True,
+                             accept=lambda page: 'class="GO2pB"' in page)
+        assert "GO2pB" in html and drivers == []
+    finally:
+        server.close()
+    print("✓ accept() lets short pages skip the browser")
+
+
+def test_html_cache():
+    server = FixtureServer()
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            fetcher, _ = make_fetcher(cache_dir=cache_dir)
+            first = fetcher.fetch(server.url("example_privacy.html"))
+            hits = server.hits
+            second = fetcher.fetch(server.url("example_privacy.html"))
+            assert first == second
+            assert server.hits == hits
+            assert fetcher.stats["cache_hits"] == 1
+
+            expired = HtmlCache(cache_dir, ttl=0)
+            time.sleep(0.01)
+            assert expired.get(server.url("example_privacy.html"), False) is None
+    finally:
+        server.close()
+    print("✓ repeated pages come from the HTML cache until the TTL passes")
+
+
+def test_browser_failure_not_cached():
+    server = FixtureServer()
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            chrome_ok = []
+
+            def factory():
+                if not chrome_ok:
+                    raise RuntimeError("chrome not found")
+                return FakeDriver()
+
+            fetcher = PageFetcher(pool=BrowserPool(size=1, driver_factory=factory),
+                                  cache=HtmlCache(cache_dir, ttl=3600), settle_time=0.5)
+            url = server.url("js_app_shell.html")
+            html = fetcher.fetch(url, use_javascript=True)
+            assert html is not None  # the static shell is still returned
+            assert fetcher.cache.get(url, True) is None
+
+            chrome_ok.append(True)
+            html = fetcher.fetch(url, use_javascript=True)
+            assert "Privacy Policy" in html  # rendered once the browser works again
+            assert fetcher.cache.get(url, True) == html
+    finally:
+        server.close()
+    print("✓ static fallback of a failed browser fetch isn't cached")
+
+
+def test_per_domain_limit():
+    server = FixtureServer()
+    try:
+        FakeDriver.max_active = 0
+        fetcher, _ = make_fetcher(render_time=0.2, per_domain=1, pool_size=3)
+        threads = [threading.Thread(target=fetcher.fetch, args=(server.url("js_app_shell.html"),),
+                                    kwargs={"use_javascript": True}) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert FakeDriver.max_active == 1
+    finally:
+        server.close()
+    print("✓ one request at a time for a domain limited to 1")
+
+
+def test_fetch_async_keeps_loop_free():
+    server = FixtureServer()
+    try:
+        fetcher, _ = make_fetcher(render_time=0.3)
+
+        async def main():
+            ticks = 0
+            task = asyncio.ensure_future(
+                fetcher.fetch_async(server.url("js_app_shell.html"), use_javascript=True))
+            while not task.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            return ticks, task.result()
+
+        ticks, html = asyncio.run(main())
+        assert "Privacy Policy" in html
+        assert ticks > 10
+    finally:
+        server.close()
+    print(f"✓ event loop ticked {ticks} times while a page rendered")
+
+
+def test_fixture_fetcher():
+    fetcher = FixtureFetcher(FIXTURES)
+    play_store_url = "https://play.google.com/store/apps/datasafety?id=com.example.shop&hl=en_US"
+    html = fetcher.fetch(play_store_url, use_javascript=True)
+    assert 'href="https://shop.example.com/privacy"' in html
+    assert "Privacy Policy" in fetcher.fetch("https://shop.example.com/privacy")
+    assert fetcher.fetch("https://unknown.example.com/") is None
+    assert fetcher.requests[0] == (play_store_url, True)
+    print("✓ fixture fetcher serves saved pages")
+
+
+if __name__ == "__main__":
+    print("Testing scrape pool")
+    print("=" * 60)
+    test_static_page_skips_browser()
+    test_js_pages_reuse_one_browser()
+    test_accept_predicate_decides_fast_path()
+    test_html_cache()
+    test_browser_failure_not_cached()
+    test_per_domain_limit()
+    test_fetch_async_keeps_loop_free()
+    test_fixture_fetcher()
+    print("=" * 60)
+    print("All scrape pool tests passed! ✓")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test the batching summarization worker with a fake summarizer (no model needed)
+Run from the project root: python -m pytest tests/test_summary_batcher.py
+"""
+
+import asyncio
+import threading
+import time
+
+from summary_worker import SummaryBatcher
+
+
+class FakeSummarizer:
+    """Mimics the transformers summarization pipeline; records every call"""
+
+    def __init__(self, delay=0.05, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        with self.lock:
+            self.calls.append(batch)
+        time.sleep(self.delay)
+        if self.fail_on and any(self.fail_on in text for text in batch):
+            raise ValueError("bad chunk")
+        results = [{"summary_text": f"summary of {text}"} for text in batch]
+        return results if single else [[result] for result in results]
+
+
+def test_concurrent_requests_share_batches():
+    summarizer = FakeSummarizer(delay=0.1)
+    batcher = SummaryBatcher(summarizer, max_batch_size=8, max_wait=0.05)
+
+    async def one_request(name):
+        futures = batcher.submit_many([f"{name}-{i}" for i in range(3)])
+        return [await asyncio.wrap_future(future) for future in futures]
+
+    async def main():
+        return await asyncio.gather(*(one_request(f"req{n}") for n in range(4)))
+
+    start = time.time()
+    results = asyncio.run(main())
+    elapsed = time.time() - start
+    batcher.stop()
+
+    assert results[2] == [f"summary of req2-{i}" for i in range(3)]
+    # 12 chunks in batches of at most 8: two model calls instead of twelve
+    assert len(summarizer.calls) == 2
+    assert max(len(batch) for batch in summarizer.calls) == 8
+    print(f"✓ 4 requests x 3 chunks in {len(summarizer.calls)} batches, {elapsed:.2f}s")
+
+
+def test_event_loop_stays_responsive():
+    summarizer = FakeSummarizer(delay=0.3)
+    batcher = SummaryBatcher(summarizer, max_wait=0.0)
+
+    async def main():
+        ticks = 0
+        task = asyncio.ensure_future(batcher.summarize("long chunk"))
+        while not task.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        return ticks, task.result()
+
+    ticks, summary = asyncio.run(main())
+    batcher.stop()
+
+    assert summary == "summary of long chunk"
+    assert ticks > 10  # the loop kept running while the model worked
+    print(f"✓ event loop ticked {ticks} times during one model call")
+
+
+def test_failed_chunk_only_fails_itself():
+    summarizer = FakeSummarizer(delay=0.0, fail_on="bad")
+    batcher = SummaryBatcher(summarizer, max_wait=0.05)
+
+    futures = batcher.submit_many(["good-1", "bad-2", "good-3"])
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result(timeout=5))
+        except ValueError:
+            results.append(None)
+    batcher.stop()
+
+    assert results == ["summary of good-1", None, "summary of good-3"]
+    assert batcher.stats["failed_batches"] == 1
+    print("✓ failing chunk retried alone, the rest of its batch succeeded")
+
+
+def test_cancelled_chunks_are_skipped():
+    summarizer = FakeSummarizer(delay=0.2)
+    batcher = SummaryBatcher(summarizer, max_batch_size=1, max_wait=0.0)
+
+    futures = batcher.submit_many(["first", "second", "third"])
+    time.sleep(0.05)  # "first" is being summarized, the others are queued
+    for future in futures[1:]:
+        future.cancel()
+    assert futures[0].result(timeout=5) == "summary of first"
+    time.sleep(0.1)
+    batcher.stop()
+
+    assert summarizer.calls == [["first"]]
+    print("✓ cancelled chunks never reached the model")
+
+
+if __name__ == "__main__":
+    print("Testing SummaryBatcher")
+    print("=" * 60)
+    test_concurrent_requests_share_batches()
+    test_event_loop_stays_responsive()
+    test_failed_chunk_only_fails_itself()
+    test_cancelled_chunks_are_skipped()
+    print("=" * 60)
+    print("All batcher tests passed! ✓")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test policy chunking and content extraction (text_processing.py)
+Run from the project root: python -m pytest tests/test_text_processing.py
+"""
+
+import os
+import random
+
+import pytest
+
+import text_processing as tp
+from bench_text_processing import chunk_text_previous
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def sample_policy(sentences=400, seed=0):
+    rng = random.Random(seed)
+    words = ["we", "collect", "personal", "data", "including", "location", "device", "identifiers",
+             "to", "provide", "services", "and", "share", "it", "with", "partners", "advertising",
+             "analytics", "retention", "consent", "withdraw", "supercalifragilisticexpialidocious"]
+    paragraphs = []
+    for _ in range(sentences // 8):
+        paragraph = [" ".join(rng.choice(words) for _ in range(rng.randint(4, 30))).capitalize() + "."
+                     for _ in range(8)]
+        paragraphs.append(" ".join(paragraph))
+    return "\n\n".join(paragraphs)
+
+
+def test_chunk_text_matches_previous_output():
+    text = sample_policy()
+    for max_length in (50, 400, 1000):
+        assert tp.chunk_text(text, max_length) == chunk_text_previous(text, max_length)
+    assert tp.chunk_text("") == []
+    print("✓ single-pass chunk_text gives the same chunks as before")
+
+
+def test_chunk_text_respects_budget():
+    chunks = tp.chunk_text(sample_policy(), max_length=400)
+    assert all(len(chunk) <= 400 for chunk in chunks)
+    print(f"✓ {len(chunks)} chunks within 400 characters")
+
+
+def test_lxml_extraction_matches_beautifulsoup():
+    if tp.lxml is None:
+        pytest.skip("lxml not installed")
+    for name in ("example_privacy.html", "play_store_datasafety.html", "js_app_shell.html"):
+        html = read_fixture(name)
+        assert tp.extract_clean_content_lxml(html) == tp.extract_clean_content_bs4(html)
+    print("✓ lxml extraction gives the same text as BeautifulSoup on the fixtures")
+
+
+def test_extraction_prefers_content_over_link_lists():
+    if tp.lxml is None:
+        pytest.skip("lxml not installed")
+    links = "".join(f'<a href="/p{i}">Related privacy article number {i}</a> ' for i in range(40))
+    policy = "<p>" + sample_policy(sentences=16) + "</p>"
+    html = (f'<html><body><div class="sidebar-content">{links}</div>'
+            f'<div class="policy-content">{policy}</div></body></html>')
+    text = tp.extract_clean_content(html)
+    assert text.startswith(sample_policy(sentences=16)[:40])
+    assert "Related privacy article" not in text
+    print("✓ link-heavy blocks lose to the policy text")
+
+
+def test_extraction_handles_empty_input():
+    assert tp.extract_clean_content("") is None
+    assert tp.extract_clean_content(None) is None
+
+
+def make_tokenizer(corpus, model_max_length=128):
+    pytest.importorskip("tokenizers")
+    pytest.importorskip("transformers")
+    from tokenizers import ByteLevelBPETokenizer
+    from tokenizers.processors import RobertaProcessing
+    from transformers import PreTrainedTokenizerFast
+
+    bpe = ByteLevelBPETokenizer(trim_offsets=True)
+    bpe.train_from_iterator(corpus, vocab_size=400, special_tokens=["<s>", "<pad>", "</s>", "<unk>"])
+    bpe.post_processor = RobertaProcessing(("</s>", bpe.token_to_id("</s>")),
+                                           ("<s>", bpe.token_to_id("<s>")), trim_offsets=True)
+    return PreTrainedTokenizerFast(tokenizer_object=bpe, bos_token="<s>", eos_token="</s>",
+                                   pad_token="<pad>", unk_token="<unk>", model_max_length=model_max_length)
+
+
+def test_chunk_by_tokens_fits_window():
+    text = sample_policy()
+    tokenizer = make_tokenizer([text])
+    chunks = tp.chunk_by_tokens(text, tokenizer, max_tokens=64)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(tokenizer(chunk, add_special_tokens=False)["input_ids"]) <= 64
+        # With special tokens the chunk still fits the model window, so nothing gets truncated
+        assert len(tokenizer(chunk)["input_ids"]) <= tokenizer.model_max_length
+    # Cut at word boundaries only: no word lost or split
+    assert " ".join(chunks).split() == text.split()
+    print(f"✓ {len(chunks)} token chunks within 64 tokens, no words split")
+
+
+def test_chunk_by_tokens_caps_at_model_window():
+    text = sample_policy()
+    tokenizer = make_tokenizer([text], model_max_length=48)
+    chunks = tp.chunk_by_tokens(text, tokenizer, max_tokens=1000)
+    assert all(len(tokenizer(chunk)["input_ids"]) <= 48 for chunk in chunks)
+    print("✓ max_tokens is capped at the model window")
+
+
+def test_chunk_by_tokens_prefers_sentence_ends():
+    text = sample_policy()
+    tokenizer = make_tokenizer([text])
+    chunks = tp.chunk_by_tokens(text, tokenizer, max_tokens=96)
+    sentence_ends = sum(chunk.endswith(".") for chunk in chunks[:-1])
+    assert sentence_ends >= len(chunks[:-1]) * 0.8
+    print(f"✓ {sentence_ends}/{len(chunks) - 1} chunks end at a sentence")
+
+
+if __name__ == "__main__":
+    print("Testing text processing")
+    print("=" * 60)
+    test_chunk_text_matches_previous_output()
+    test_chunk_text_respects_budget()
+    test_lxml_extraction_matches_beautifulsoup()
+    test_extraction_prefers_content_over_link_lists()
+    test_extraction_handles_empty_input()
+    test_chunk_by_tokens_fits_window()
+    test_chunk_by_tokens_caps_at_model_window()
+    test_chunk_by_tokens_prefers_sentence_ends()
+    print("=" * 60)
+    print("All text processing tests passed! ✓")
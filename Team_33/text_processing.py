@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Text processing hot path: policy chunking and main-content extraction
+
+- chunk_text: character-budget chunks in one pass (running length instead of
+  re-joining the chunk after every word)
+- chunk_by_tokens: chunks measured in model tokens, cut at sentence or word
+  boundaries from one tokenizer pass (offset mapping), so every chunk fits
+  the summarizer's input window without truncation
+- extract_clean_content: main text of a page. With lxml installed, text
+  lengths of every element are computed in one bottom-up pass and the content
+  block is picked by link-density-weighted text length; otherwise the
+  BeautifulSoup implementation (extract_clean_content_bs4) is used.
+
+bench_text_processing.py compares these against the previous implementations.
+"""
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # the BeautifulSoup implementation still works without it
+    lxml = None
+
+# ============================================================================
+# CHUNKING
+# ============================================================================
+
+def chunk_text(text, max_length=1000):
+    """Split text into chunks of words whose joined length stays within max_length characters"""
+    chunks = []
+    current_chunk = []
+    current_length = -1  # length of ' '.join(current_chunk)
+
+    for word in text.split():
+        current_chunk.append(word)
+        current_length += len(word) + 1
+        if current_length > max_length:
+            chunks.append(' '.join(current_chunk[:-1]))
+            current_chunk = [word]
+            current_length = len(word)
+
+    if current_chunk:
+        chunks.append(' '.join(current_chunk))
+
+    return chunks
+
+
+def _whitespace_before(text, offsets, i):
+    """(whitespace right before token i, index where that whitespace starts)"""
+    start = end = offsets[i][0]
+    while start > 0 and text[start - 1].isspace():
+        start -= 1
+    return text[start:end], start
+
+
+def _starts_word(text, offsets, i):
+    whitespace, _ = _whitespace_before(text, offsets, i)
+    token_start = offsets[i][0]
+    return bool(whitespace) or (token_start < len(text) and text[token_start].isspace())
+
+
+def _starts_sentence(text, offsets, i):
+    whitespace, start = _whitespace_before(text, offsets, i)
+    if not whitespace:
+        return False
+    return "\n" in whitespace or (start > 0 and text[start - 1] in ".!?;:")
+
+
+def _break_point(text, offsets, start, end, boundary_window):
+    """Token index to end a chunk at: a sentence start, else a word start, near `end`"""
+    lowest = max(start + 1, end - int((end - start) * boundary_window))
+    for is_boundary in (_starts_sentence, _starts_word):
+        for i in range(end, lowest - 1, -1):
+            if is_boundary(text, offsets, i):
+                return i
+    return end  # one very long "word": hard cut
+
+
+def chunk_by_tokens(text, tokenizer, max_tokens=None, boundary_window=0.2):
+    """
+    Split text into chunks of at most max_tokens tokens of `tokenizer` (a fast
+    Hugging Face tokenizer), cut at sentence ends or word boundaries.
+
+    Args:
+        text: Text to split
+        tokenizer: Tokenizer of the model the chunks are for (needs offset mappings)
+        max_tokens: Token budget per chunk; default and cap: the model window minus special tokens
+        boundary_window: How far back (fraction of the chunk) to look for a sentence or word boundary
+
+    Returns:
+        list of chunk strings
+    """
+    window = tokenizer.model_max_length - tokenizer.num_special_tokens_to_add()
+    max_tokens = window if max_tokens is None else min(max_tokens, window)
+
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    offsets = encoding["offset_mapping"]
+    total = len(offsets)
+
+    def plan(start):
+        """Chunk spans (start token, end token) from `start` to the end of the text"""
+        spans = []
+        while start < total:
+            end = min(start + max_tokens, total)
+            if end < total:
+                end = _break_point(text, offsets, start, end, boundary_window)
+            spans.append((start, end))
+            start = end
+        return spans
+
+    def span_text(start, end):
+        return text[offsets[start][0]:offsets[end - 1][1]].strip()
+
+    def count(texts):
+        return [len(ids) for ids in tokenizer(texts, add_special_tokens=False, verbose=False)["input_ids"]]
+
+    # A substring can tokenize slightly differently at its edges than inside the
+    # whole text, so every chunk is re-counted (one batch call). The rare chunk
+    # over budget is trimmed and the rest of the text re-planned from there.
+    chunks = []
+    spans = plan(0)
+    while spans:
+        texts = [span_text(start, end) for start, end in spans]
+        for (start, end), chunk, length in zip(spans, texts, count(texts)):
+            if length > max_tokens:
+                while end - start > 1 and length > max_tokens:
+                    end -= max(1, length - max_tokens)
+                    while end - start > 1 and not _starts_word(text, offsets, end):
+                        end -= 1  # don't split a word between two chunks
+                    chunk = span_text(start, end)
+                    length = count([chunk])[0]
+                if chunk:
+                    chunks.append(chunk)
+                spans = plan(end)
+                break
+            if chunk:
+                chunks.append(chunk)
+        else:
+            spans = []
+    return chunks
+
+# ============================================================================
+# CONTENT EXTRACTION (lxml)
+# ============================================================================
+
+REMOVED_TAGS = ("script", "style", "noscript", "meta", "link", "iframe")
+CONTENT_CLASSES = ['page-content', 'post-content', 'entry-content', 'content-main',
+                   'main-content', 'region-content', 'document-content', 'privacy-policy']
+CONTENT_CLASS_KEYWORDS = ['content', 'body', 'main', 'article', 'post']
+SKIP_CLASS_KEYWORDS = ['header', 'footer', 'nav', 'sidebar', 'ads', 'modal']
+AD_CLASS_KEYWORDS = ['ads', 'advertisement', 'tracker', 'modal', 'popup']
+BOILERPLATE_TAGS = ('nav', 'header', 'footer', 'aside', 'form')
+
+
+def _text_lengths(root):
+    """
+    {element: (text length, link text length)} for every element, in one pass.
+    Elements come in document order, so walking them backwards visits every
+    child before its parent.
+    """
+    elements = list(root.iter(etree.Element))
+    lengths = {}
+    for element in reversed(elements):
+        text_length = len(element.text.strip()) if element.text else 0
+        link_length = 0
+        for child in element:
+            if child in lengths:
+                child_text, child_links = lengths[child]
+                text_length += child_text
+                link_length += child_links
+            if child.tail:
+                text_length += len(child.tail.strip())
+        if element.tag == 'a':
+            link_length = text_length
+        lengths[element] = (text_length, link_length)
+    return lengths
+
+
+def _classes(element):
+    return element.get('class', '')
+
+
+def _content_score(lengths, element):
+    """Text length, discounted by how much of it is link text (menus, footers, link farms)"""
+    text_length, link_length = lengths[element]
+    return text_length - link_length
+
+
+def _find_content_area(root, lengths):
+    """Same priority order as the BeautifulSoup version, using the precomputed lengths"""
+    for tag in ('article', 'main'):
+        found = next(root.iter(tag), None)
+        if found is not None:
+            return found
+
+    for class_name in CONTENT_CLASSES:
+        for div in root.iter('div'):
+            if class_name in _classes(div).split():
+                return div
+
+    found = next(root.iter('section'), None)
+    if found is not None:
+        return found
+
+    content_divs = [div for div in root.iter('div')
+                    if any(keyword in _classes(div) for keyword in CONTENT_CLASS_KEYWORDS)]
+    if content_divs:
+        return max(content_divs, key=lambda e: _content_score(lengths, e))
+
+    significant = [e for e in root.iter('section', 'article', 'div')
+                   if e.get('class') is not None and lengths[e][0] > 300]
+    if significant:
+        return max(significant, key=lambda e: _content_score(lengths, e))
+
+    large_divs = [div for div in root.iter('div')
+                  if lengths[div][0] > 500
+                  and not any(skip in _classes(div).lower() for skip in SKIP_CLASS_KEYWORDS)]
+    if large_divs:
+        return max(large_divs, key=lambda e: _content_score(lengths, e))
+
+    body = next(root.iter('body'), None)
+    return body if body is not None else root
+
+
+def extract_clean_content_lxml(html_content):
+    """Main text of an HTML page using lxml (see module docstring)"""
+    if not html_content:
+        return None
+
+    try:
+        if isinstance(html_content, str):
+            html_content = html_content.encode('utf-8')
+        root = lxml.html.document_fromstring(html_content, parser=lxml.html.HTMLParser(encoding='utf-8'))
+
+        for element in list(root.iter(etree.Comment, *REMOVED_TAGS)):
+            element.drop_tree()
+
+        content_area = _find_content_area(root, _text_lengths(root))
+
+        # Remove navigation, header, footer, and sidebar elements that snuck through,
+        # and common ad/tracker containers
+        for element in list(content_area.iter(*BOILERPLATE_TAGS)):
+            if element is not content_area:
+                element.drop_tree()
+        for element in list(content_area.iter('div', 'section')):
+            classes = _classes(element).lower()
+            if element is not content_area and any(skip in classes for skip in AD_CLASS_KEYWORDS):
+                element.drop_tree()
+
+        # Same text layout as get_text(separator='\n', strip=True) + dropping empty lines
+        lines = []
+        for text in content_area.itertext():
+            for line in text.split('\n'):
+                line = line.strip()
+                if line:
+                    lines.append(line)
+        return '\n'.join(lines)
+
+    except Exception as e:
+        print(f"Error extracting clean content from HTML: {e}")
+        return None
+
+
+def extract_clean_content(html_content, article_tag=True, remove_extra_spans=True):
+    """
+    Extracts clean, readable content from HTML (lxml when available, else BeautifulSoup).
+    article_tag=False or a missing lxml use the BeautifulSoup implementation.
+    """
+    if lxml is not None and article_tag:
+        cleaned_text = extract_clean_content_lxml(html_content)
+        if cleaned_text is not None:
+            print(f"[DEBUG] Extracted {len(cleaned_text)} characters from page")
+        return cleaned_text
+    return extract_clean_content_bs4(html_content, article_tag, remove_extra_spans)
+
+# ============================================================================
+# CONTENT EXTRACTION (BeautifulSoup reference implementation)
+# ============================================================================
+
+def extract_clean_content_bs4(html_content, article_tag=True, remove_extra_spans=True):
+    """
+    Extracts clean, readable content from HTML by removing redundant tags and formatting.
+    Useful for pages with excessive nested HTML like privacy policies.
+    
+    Parameters:
+    -----------
+    html_content : str
+        The HTML content to parse
+    article_tag : bool, optional
+        If True, tries to extract content from article or main content container first (default: True)
+    remove_extra_spans : bool, optional
+        If True, removes redundant nested span tags that don't add value (default: True)
+    
+    Returns:
+    --------
+    str : Clean, formatted text content
+    None : If extraction fails
+    
+    Example:
+    --------
+    >>> html = "<html><body><article><span><span><p>Privacy Policy</p></span></span></article></body></html>"
+    >>> content = extract_clean_content(html)
+    >>> print(content)
+    """
+    if not html_content:
+        return None
+    
+    try:
+        soup = BeautifulSoup(html_content, 'html.parser')
+        
+        # Remove script, style, noscript, and meta elements
+        for element in soup(["script", "style", "noscript", "meta", "link", "iframe"]):
+            element.decompose()
+        
+        # Try to find main content area with better specificity
+        content_area = None
+        if article_tag:
+            # Priority order for content detection:
+            # 1. article tag
+            # 2. main tag
+            # 3. div with specific content classes
+            # 4. Find the largest section/article
+            # 5. Find the largest div with significant text
+            
+            content_area = soup.find('article')
+            
+            if not content_area:
+                content_area = soup.find('main')
+            
+            if not content_area:
+                # Look for more specific content containers
+                for class_name in ['page-content', 'post-content', 'entry-content', 'content-main', 
+                                  'main-content', 'region-content', 'document-content', 'privacy-policy']:
+                    content_area = soup.find('div', class_=class_name)
+                    if content_area:
+                        break
+            
+            if not content_area:
+                # Try section tags
+                content_area = soup.find('section')
+            
+            if not content_area:
+                # Fall back to generic content div but ensure it's large enough
+                content_divs = soup.find_all('div', class_=lambda x: x and any(keyword in (x if isinstance(x, str) else ' '.join(x)) 
+                                           for keyword in ['content', 'body', 'main', 'article', 'post']))
+                if content_divs:
+                    # Find the largest content div (most likely the actual content)
+                    content_area = max(content_divs, key=lambda d: len(d.get_text()))
+            
+            if not content_area:
+                # Find the largest section by text content
+                all_sections = soup.find_all(['section', 'article', 'div'], class_=lambda x: True)
+                if all_sections:
+                    # Filter out tiny elements (likely navigation, ads, etc.) - only consider with significant content
+                    significant_elements = [e for e in all_sections if len(e.get_text(strip=True)) > 300]
+                    if significant_elements:
+                        content_area = max(significant_elements, key=lambda e: len(e.get_text()))
+            
+            if not content_area:
+                # Last resort: get all divs and find the largest one with substantial content
+                all_divs = soup.find_all('div')
+                if all_divs:
+                    # Find divs with substantial text content (avoid headers, footers, navs)
+                    large_divs = [d for d in all_divs if len(d.get_text(strip=True)) > 500 
+                                 and not any(skip in str(d.get('class', [])).lower() 
+                                           for skip in ['header', 'footer', 'nav', 'sidebar', 'ads', 'modal'])]
+                    if large_divs:
+                        content_area = max(large_divs, key=lambda d: len(d.get_text()))
+        
+        if not content_area:
+            # Use body as fallback
+            content_area = soup.find('body')
+        
+        if not content_area:
+            # Ultimate fallback: use entire document
+            content_area = soup
+        
+        # Remove navigation, header, footer, and sidebar elements that snuck through
+        for element in content_area.find_all(['nav', 'header', 'footer', 'aside', 'form'], recursive=True):
+            element.decompose()
+        
+        # Remove common ad/tracker containers
+        for element in content_area.find_all(['div', 'section'], class_=lambda x: x and any(skip in (x if isinstance(x, str) else ' '.join(x)).lower() 
+                                             for skip in ['ads', 'advertisement', 'tracker', 'modal', 'popup'])):
+            element.decompose()
+        
+        if remove_extra_spans:
+            # Remove redundant nested spans - keep only spans with meaningful attributes or content
+            for span in content_area.find_all('span'):
+                # If span has no class/id and only contains text or other spans, unwrap it
+                if not span.get('class') and not span.get('id') and not span.get('style'):
+                    span.unwrap()
+        
+        # Extract text with proper spacing
+        text = content_area.get_text(separator='\n', strip=True)
+        
+        # Clean up excessive whitespace and empty lines
+        lines = [line.strip() for line in text.split('\n') if line.strip()]
+        cleaned_text = '\n'.join(lines)
+        
+        print(f"[DEBUG] Extracted {len(cleaned_text)} characters from page")
+        
+        return cleaned_text
+    
+    except Exception as e:
+        print(f"Error extracting clean content from HTML: {e}")
+        return None
@@ -1,5 +1,5 @@
 import os
-import time
+import uuid
 from flask import Flask, render_template, request, jsonify, send_from_directory
 from flask_socketio import SocketIO, emit
 import numpy as np
@@ -8,6 +8,9 @@ from collections import deque, Counter
 # --- CONFIGURATION ---
 N_FRAMES = 30
 MIN_CONFIDENCE = 0.65
+PREDICTION_INTERVAL = 0.3  # min seconds between full-sequence predictions per client
+FRAME_STRIDE = 10  # new frames between predictions when clients stream single frames
+PREDICTION_TIMEOUT = 5.0
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # --- FILE PATHS ---
@@ -23,16 +26,21 @@ socketio = SocketIO(app, async_mode='threading', cors_allowed_origins="*")
 
 # --- GLOBAL VARIABLES ---
 recognizer = None
+recognition = None
 generator = None
-user_sessions = {}
 
 # --- INITIALIZE MODELS ---
 def initialize_models():
-    global recognizer, generator
+    global recognizer, recognition, generator
     try:
         print("Initializing ISL Recognizer...")
         from isl_recognizer import ISLRecognizer
+        from recognition_service import RecognitionService
         recognizer = ISLRecognizer(MODEL_PATH, CLASS_NAMES_PATH)
+        # Per-client smoothing/history, predictions of all clients batched into one interpreter call
+        recognition = RecognitionService(recognizer, min_confidence=MIN_CONFIDENCE,
+                                         min_interval=PREDICTION_INTERVAL, stride=FRAME_STRIDE)
+        recognition.start()
         print("ISL Recognizer initialized")
         
         # Initialize animation generator if available
@@ -55,6 +63,20 @@ initialize_models()
 def isl_to_english_sentence(history_of_signs):
     return " ".join(history_of_signs) if history_of_signs else ""
 
+def emit_recognition_result(future):
+    """Wait for a queued prediction and send it to the client (None: throttled or replaced by a newer one)"""
+    if future is None:
+        return
+    result = future.result(timeout=PREDICTION_TIMEOUT)
+    if result is None:
+        return
+    emit('prediction_result', {
+        'label': result['label'],
+        'confidence': result['confidence'],
+        'sentence': isl_to_english_sentence(result['history']),
+        'history': result['history']
+    })
+
 # --- ROUTES ---
 @app.route("/")
 def index():
@@ -83,7 +105,7 @@ def chrome_devtools():
 
 @app.route("/api/predict_sequence", methods=["POST"])
 def http_predict_sequence():
-    if not recognizer:
+    if not recognition:
         return jsonify({"error": "Model not initialized"}), 500
     
     try:
@@ -101,8 +123,20 @@ def http_predict_sequence():
         if sequence.shape != (N_FRAMES, 144):
             return jsonify({"error": f"Invalid sequence shape: {sequence.shape}"}), 400
 
-        # Use smoothed prediction like OpenCV code
-        smoothed_label, confidence = recognizer.predict_sequence_smoothed(sequence)
+        # Smoothed per session_id; without one the request gets a throwaway session (no
+        # smoothing), since clients behind one address would share state. Batched either way
+        if data.get("session_id"):
+            session_id = "http:" + str(data["session_id"])
+        else:
+            session_id = "http-once:" + uuid.uuid4().hex
+        try:
+            result = recognition.submit_sequence(session_id, sequence, throttle=False).result(timeout=PREDICTION_TIMEOUT)
+        finally:
+            if not data.get("session_id"):
+                recognition.close_session(session_id)
+        if result is None:
+            return jsonify({"error": "Replaced by a newer sequence of the same session_id"}), 409
+        smoothed_label, confidence = result['label'], result['confidence']
         
         # Apply confidence threshold
         if confidence > MIN_CONFIDENCE:
@@ -150,7 +184,8 @@ def status():
     return jsonify({
         "status": "running",
         "recognizer_loaded": recognizer is not None,
-        "generator_loaded": generator is not None
+        "generator_loaded": generator is not None,
+        "recognition": recognition.get_stats() if recognition else None
     })
 
 @app.route("/api/test")
@@ -161,57 +196,54 @@ def test_endpoint():
 @socketio.on('connect')
 def handle_connect():
     client_id = request.sid
-    user_sessions[client_id] = {
-        'history': [], 
-        'last_prediction_time': 0
-    }
+    if recognition:
+        recognition.open_session(client_id)
     emit('connection_response', {'status': 'connected'})
     print(f"Client connected: {client_id}")
 
 @socketio.on('disconnect')
 def handle_disconnect():
     client_id = request.sid
-    user_sessions.pop(client_id, None)
+    if recognition:
+        recognition.close_session(client_id)
     print(f"Client disconnected: {client_id}")
 
 @socketio.on('predict_sequence')
 def handle_prediction(data):
     client_id = request.sid
-    if client_id not in user_sessions or not recognizer:
+    if not recognition:
         emit('prediction_error', {'error': 'Session or model not available'})
         return
     
     try:
-        # Throttle predictions
-        current_time = time.time()
-        if current_time - user_sessions[client_id]['last_prediction_time'] < 0.3:
-            return
-        user_sessions[client_id]['last_prediction_time'] = current_time
-        
         sequence = np.array(data.get('sequence', []), dtype=np.float32)
-        history = user_sessions[client_id]['history']
 
         if sequence.shape != (N_FRAMES, 144):
             emit('prediction_error', {'error': f'Invalid sequence shape: {sequence.shape}'})
             return
         
-        # Use smoothed prediction like OpenCV code
-        smoothed_label, confidence = recognizer.predict_sequence_smoothed(sequence)
-        
-        # Apply confidence threshold
-        if confidence > MIN_CONFIDENCE:
-            if not history or history[-1] != smoothed_label:
-                history.append(smoothed_label)
-                if len(history) > 20:
-                    history.pop(0)
+        # Throttled per client; smoothing and history are kept per client by the service
+        emit_recognition_result(recognition.submit_sequence(client_id, sequence))
+    except Exception as e:
+        emit('prediction_error', {'error': str(e)})
+
+@socketio.on('landmarks')
+def handle_landmarks(data):
+    """Stream of landmark frames (one or more rows of 144); predicts every FRAME_STRIDE frames"""
+    client_id = request.sid
+    if not recognition:
+        emit('prediction_error', {'error': 'Session or model not available'})
+        return
+    
+    try:
+        frames = np.array(data.get('frames', []), dtype=np.float32)
+        if frames.ndim == 1:
+            frames = frames[np.newaxis]
+        if frames.ndim != 2 or frames.shape[1] != 144:
+            emit('prediction_error', {'error': f'Invalid frames shape: {frames.shape}'})
+            return
         
-        sentence = isl_to_english_sentence(history)
-        emit('prediction_result', {
-            'label': smoothed_label,
-            'confidence': float(confidence),
-            'sentence': sentence,
-            'history': history.copy()
-        })
+        emit_recognition_result(recognition.submit_frames(client_id, frames))
     except Exception as e:
         emit('prediction_error', {'error': str(e)})
 
@@ -248,9 +280,8 @@ def handle_generate_animation(data):
 @socketio.on('clear_history')
 def handle_clear_history():
     client_id = request.sid
-    if client_id in user_sessions:
-        user_sessions[client_id]['history'] = []
-        recognizer.clear_buffer()
+    if recognition:
+        recognition.clear_session(client_id)
         
     emit('prediction_result', {
         'label': '',
@@ -1,7 +1,23 @@
 import tensorflow as tf
 import numpy as np
+import threading
 from collections import deque, Counter
 
+N_FRAMES = 30
+N_FEATURES = 144
+
+
+def normalize_sequences(sequences):
+    """
+    Per-sequence normalization, shape (batch, 30, 144)
+    This MUST match exactly what you did in training
+    """
+    sequences = np.asarray(sequences, dtype=np.float32)
+    mean = sequences.mean(axis=(1, 2), keepdims=True)
+    std = sequences.std(axis=(1, 2), keepdims=True) + 1e-8
+    return (sequences - mean) / std
+
+
 class ISLRecognizer:
     def __init__(self, model_path, class_names_path):
         """ISL Alphabet Recognizer - Simplified to match OpenCV version"""
@@ -16,34 +32,63 @@ class ISLRecognizer:
         self.interpreter.allocate_tensors()
         self.input_details = self.interpreter.get_input_details()
         self.output_details = self.interpreter.get_output_details()
+        self.batch_size = int(self.input_details[0]['shape'][0])
+        # The model has a dynamic batch dimension if the signature says -1
+        self.resizable = int(self.input_details[0].get('shape_signature', [1])[0]) == -1
+        self.lock = threading.Lock()  # one interpreter, callers from many threads
         
         # Label buffer for smoothing (same as OpenCV code)
         self.label_buffer = deque(maxlen=5)
         
+    def _resize(self, batch_size):
+        """Resize the input tensor to batch_size (only when it changes)"""
+        if batch_size != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_details[0]['index'], [batch_size, N_FRAMES, N_FEATURES])
+            self.interpreter.allocate_tensors()
+            self.batch_size = batch_size
+
+    def _invoke(self, input_data):
+        self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_details[0]['index'])
+
+    def predict_batch(self, sequences):
+        """
+        Class probabilities for a stack of (30, 144) sequences in one interpreter call
+
+        The batch is padded up to a power of two, so the input tensor is only
+        resized (and tensors reallocated) for a handful of batch sizes.
+        Models without a dynamic batch dimension run the sequences one by one.
+
+        Returns:
+            array of shape (len(sequences), num_classes)
+        """
+        input_data = normalize_sequences(sequences)
+        count = len(input_data)
+
+        with self.lock:
+            if not self.resizable:
+                self._resize(1)
+                return np.concatenate([self._invoke(input_data[i:i + 1]) for i in range(count)])
+
+            padded = 1 << (count - 1).bit_length()
+            if padded != count:
+                input_data = np.concatenate([input_data, np.zeros((padded - count, N_FRAMES, N_FEATURES), np.float32)])
+            self._resize(padded)
+            return self._invoke(input_data)[:count].copy()
+
+    def decode(self, probabilities):
+        """(label, confidence) of one row of predict_batch output"""
+        pred_idx = int(np.argmax(probabilities))
+        return str(self.label_classes[pred_idx]), float(probabilities[pred_idx])
+
     def predict_sequence(self, sequence):
         try:
-            if sequence.shape != (30, 144):
+            sequence = np.asarray(sequence)
+            if sequence.shape != (N_FRAMES, N_FEATURES):
                 return "error", 0.0
             
-            # --- ADDED NORMALIZATION HERE ---
-            # This MUST match exactly what you did in training
-            sequence = np.array(sequence)
-            mean = np.mean(sequence)
-            std = np.std(sequence) + 1e-8
-            sequence = (sequence - mean) / std
-            # --------------------------------
-            
-            input_data = np.expand_dims(sequence, axis=0).astype(np.float32)
-            
-            self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
-            self.interpreter.invoke()
-            output_data = self.interpreter.get_tensor(self.output_details[0]['index'])
-            
-            pred_idx = np.argmax(output_data[0])
-            confidence = float(output_data[0][pred_idx])
-            label = str(self.label_classes[pred_idx])
-            
-            return label, confidence
+            return self.decode(self.predict_batch(sequence[np.newaxis])[0])
             
         except Exception as e:
             print(f"Prediction error: {e}")
@@ -52,6 +97,8 @@ class ISLRecognizer:
     def predict_sequence_smoothed(self, sequence):
         """
         Predict with label smoothing - same as OpenCV code
+        Single-user only: the buffer is shared by every caller
+        (recognition_service.RecognitionService keeps one per session)
         """
         label, confidence = self.predict_sequence(sequence)
         
@@ -68,4 +115,4 @@ class ISLRecognizer:
     
     def clear_buffer(self):
         """Clear the label buffer"""
-        self.label_buffer.clear()
\ No newline at end of file
+        self.label_buffer.clear()
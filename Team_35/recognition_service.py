@@ -0,0 +1,254 @@
+import threading
+import time
+from collections import deque, Counter
+from concurrent.futures import Future
+
+import numpy as np
+
+N_FRAMES = 30
+N_FEATURES = 144
+
+
+class SessionState:
+    """Recognition state of one client: frame ring buffer, label smoothing and sign history"""
+
+    def __init__(self, session_id, smoothing_size=5, history_size=20):
+        self.session_id = session_id
+        self.frames = np.zeros((N_FRAMES, N_FEATURES), dtype=np.float32)
+        self.write_index = 0
+        self.filled = 0
+        self.frames_since_window = 0
+        self.label_buffer = deque(maxlen=smoothing_size)
+        self.history = []
+        self.history_size = history_size
+        self.last_submit_time = 0.0
+        self.last_seen = time.time()
+        self.lock = threading.Lock()
+
+    def add_frames(self, frames, stride):
+        """
+        Write frames of shape (n, 144) into the ring buffer.
+
+        Returns:
+            the last 30 frames in order once the buffer is full and `stride`
+            new frames arrived since the previous window, else None
+        """
+        with self.lock:
+            for frame in frames[-N_FRAMES:]:
+                self.frames[self.write_index] = frame
+                self.write_index = (self.write_index + 1) % N_FRAMES
+            self.filled = min(N_FRAMES, self.filled + len(frames))
+            self.frames_since_window += len(frames)
+            if self.filled < N_FRAMES or self.frames_since_window < stride:
+                return None
+            self.frames_since_window = 0
+            return np.concatenate((self.frames[self.write_index:], self.frames[:self.write_index]))
+
+    def smooth(self, label, confidence, min_confidence):
+        """Same buffer logic as ISLRecognizer.predict_sequence_smoothed, for this session only"""
+        if confidence > min_confidence:
+            self.label_buffer.append(label)
+        if self.label_buffer:
+            label = Counter(self.label_buffer).most_common(1)[0][0]
+
+        if confidence > min_confidence and (not self.history or self.history[-1] != label):
+            self.history.append(label)
+            if len(self.history) > self.history_size:
+                self.history.pop(0)
+        return label
+
+    def clear(self):
+        with self.lock:
+            self.label_buffer.clear()
+            self.history = []
+            self.filled = 0
+            self.frames_since_window = 0
+
+
+class RecognitionService:
+    """
+    Sign recognition for many clients sharing one ISLRecognizer
+
+    Every client (socket session) gets its own SessionState, so smoothing and
+    history never mix users. Sequences that are ready to predict go into a
+    pending table (one per session: a newer sequence replaces one that hasn't
+    run yet). A worker thread takes everything pending (up to max_batch_size)
+    and runs it as one batched interpreter call; sequences arriving while a
+    batch runs form the next one, so batches grow with load. max_wait > 0
+    additionally holds a partial batch back for more to arrive.
+
+    Results come back as concurrent.futures.Future objects resolving to
+    {'label', 'raw_label', 'confidence', 'history', 'latency'}, or to None
+    when the sequence was replaced by a newer one from the same session.
+    """
+
+    def __init__(self, recognizer, max_batch_size=32, max_wait=0.0, min_confidence=0.65,
+                 min_interval=0.3, stride=10, idle_timeout=600):
+        """
+        Args:
+            recognizer: ISLRecognizer (or anything with predict_batch and decode)
+            max_batch_size: Sequences per interpreter call
+            max_wait: Seconds to wait for more sequences before running a partial batch
+            min_confidence: Predictions above this go into smoothing and history
+            min_interval: Minimum seconds between throttled submits of one session
+            stride: New frames between predictions for frame streams (submit_frames)
+            idle_timeout: Sessions not seen for this many seconds are dropped
+        """
+        self.recognizer = recognizer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.min_confidence = min_confidence
+        self.min_interval = min_interval
+        self.stride = stride
+        self.idle_timeout = idle_timeout
+
+        self.sessions = {}
+        self.pending = {}  # session_id -> (sequence, future, submit time), in arrival order
+        self.condition = threading.Condition()
+        self.worker = None
+        self.running = False
+        self.stats = {'batches': 0, 'sequences': 0, 'superseded': 0, 'throttled': 0, 'max_batch': 0}
+
+    # --- LIFECYCLE ---
+    def start(self):
+        if self.worker is None:
+            self.running = True
+            self.worker = threading.Thread(target=self._run, name="isl-recognition", daemon=True)
+            self.worker.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
+
+    # --- SESSIONS ---
+    def open_session(self, session_id):
+        with self.condition:
+            now = time.time()
+            for stale in [sid for sid, s in self.sessions.items() if now - s.last_seen > self.idle_timeout]:
+                del self.sessions[stale]
+            return self.sessions.setdefault(session_id, SessionState(session_id))
+
+    def close_session(self, session_id):
+        with self.condition:
+            self.sessions.pop(session_id, None)
+
+    def clear_session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.clear()
+
+    def session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.open_session(session_id)
+        session.last_seen = time.time()
+        return session
+
+    # --- SUBMITTING ---
+    def submit_sequence(self, session_id, sequence, throttle=True):
+        """
+        Queue a (30, 144) sequence of a session.
+
+        Returns:
+            Future with the result, or None if the session submitted less than
+            min_interval ago (throttle=True)
+        """
+        session = self.session(session_id)
+        now = time.time()
+        if throttle and now - session.last_submit_time < self.min_interval:
+            self.stats['throttled'] += 1
+            return None
+        session.last_submit_time = now
+        return self._enqueue(session_id, np.asarray(sequence, dtype=np.float32))
+
+    def submit_frames(self, session_id, frames):
+        """
+        Add landmark frames (n, 144) to the session's ring buffer.
+
+        Returns:
+            Future with the result when a new window is ready (every `stride`
+            frames), else None
+        """
+        frames = np.asarray(frames, dtype=np.float32).reshape(-1, N_FEATURES)
+        window = self.session(session_id).add_frames(frames, self.stride)
+        if window is None:
+            return None
+        return self._enqueue(session_id, window)
+
+    def _enqueue(self, session_id, sequence):
+        future = Future()
+        with self.condition:
+            replaced = self.pending.pop(session_id, None)
+            self.pending[session_id] = (sequence, future, time.perf_counter())
+            self.condition.notify()
+        if replaced is not None:
+            self.stats['superseded'] += 1
+            replaced[1].set_result(None)
+        return future
+
+    # --- WORKER ---
+    def _next_batch(self):
+        """Wait for pending sequences and take up to max_batch_size of them (oldest first)"""
+        with self.condition:
+            while self.running and not self.pending:
+                self.condition.wait()
+            deadline = time.perf_counter() + self.max_wait
+            while self.running and len(self.pending) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            batch = []
+            for session_id in list(self.pending)[:self.max_batch_size]:
+                batch.append((session_id,) + self.pending.pop(session_id))
+            return batch
+
+    def _run(self):
+        while self.running:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                probabilities = self.recognizer.predict_batch(np.stack([item[1] for item in batch]))
+            except Exception as e:
+                print(f"Batch prediction error: {e}")
+                for item in batch:
+                    item[2].set_exception(e)
+                continue
+
+            self.stats['batches'] += 1
+            self.stats['sequences'] += len(batch)
+            self.stats['max_batch'] = max(self.stats['max_batch'], len(batch))
+            for (session_id, _, future, submitted), row in zip(batch, probabilities):
+                label, confidence = self.recognizer.decode(row)
+                session = self.sessions.get(session_id)
+                if session is None:  # disconnected while waiting
+                    future.set_result(None)
+                    continue
+                with session.lock:
+                    smoothed = session.smooth(label, confidence, self.min_confidence)
+                    history = list(session.history)
+                future.set_result({
+                    'label': smoothed,
+                    'raw_label': label,
+                    'confidence': confidence,
+                    'history': history,
+                    'latency': time.perf_counter() - submitted
+                })
+
+        # Stopped: nobody will run what's left
+        with self.condition:
+            leftover, self.pending = list(self.pending.values()), {}
+        for _, future, _ in leftover:
+            future.set_result(None)
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats['sessions'] = len(self.sessions)
+        stats['pending'] = len(self.pending)
+        stats['avg_batch'] = round(stats['sequences'] / stats['batches'], 2) if stats['batches'] else 0.0
+        return stats
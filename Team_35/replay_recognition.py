@@ -0,0 +1,183 @@
+"""
+Replay recorded landmark streams through RecognitionService
+
+Starts one thread per session that feeds its stream frame by frame at the
+camera rate, the same way socket clients do, and reports throughput, batch
+sizes and per-session latency (frame window ready -> result).
+
+Recordings: a directory of .npy files of shape (frames, 144), or .npz files
+holding several such arrays; every stream is one session (streams are
+reused round-robin when --sessions is larger). Without recordings, random
+walk landmark streams are generated.
+
+Usage:
+    python replay_recognition.py [recordings_dir] --sessions 32 --seconds 10
+    python replay_recognition.py --sessions 32 --compare        # also run with batching off
+    python replay_recognition.py --simulate --sessions 64       # no TensorFlow needed
+"""
+
+import argparse
+import glob
+import os
+import threading
+import time
+
+import numpy as np
+
+from recognition_service import N_FRAMES, N_FEATURES, RecognitionService
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(ROOT_DIR, "models", "realtime.tflite")
+CLASS_NAMES_PATH = os.path.join(ROOT_DIR, "models", "label_encoder.npy")
+
+
+class SimulatedRecognizer:
+    """Stand-in model: fixed cost per call plus a cost per sequence, random probabilities"""
+
+    def __init__(self, call_cost=0.002, sequence_cost=0.0002, num_classes=38):
+        self.call_cost = call_cost
+        self.sequence_cost = sequence_cost
+        self.label_classes = np.array([chr(ord('A') + i % 26) + str(i // 26) for i in range(num_classes)])
+        self.rng = np.random.default_rng(0)
+
+    def predict_batch(self, sequences):
+        time.sleep(self.call_cost + self.sequence_cost * len(sequences))
+        logits = self.rng.normal(size=(len(sequences), len(self.label_classes))) * 3
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def decode(self, probabilities):
+        pred_idx = int(np.argmax(probabilities))
+        return str(self.label_classes[pred_idx]), float(probabilities[pred_idx])
+
+
+def load_streams(recordings_dir):
+    streams = []
+    for path in sorted(glob.glob(os.path.join(recordings_dir, "*.np[yz]"))):
+        data = np.load(path, allow_pickle=False)
+        arrays = [data[key] for key in data.files] if path.endswith(".npz") else [data]
+        for array in arrays:
+            array = np.asarray(array, dtype=np.float32).reshape(-1, N_FEATURES)
+            if len(array):
+                streams.append(array)
+    return streams
+
+
+def synthetic_streams(count, frames, seed=0):
+    """Random walk landmarks in [0, 1], like normalised MediaPipe coordinates"""
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(0.2, 0.8, size=(count, 1, N_FEATURES))
+    steps = rng.normal(scale=0.005, size=(count, frames, N_FEATURES))
+    return list(np.clip(start + np.cumsum(steps, axis=1), 0.0, 1.0).astype(np.float32))
+
+
+def replay(recognizer, streams, sessions, seconds, fps, max_batch_size, max_wait, stride):
+    service = RecognitionService(recognizer, max_batch_size=max_batch_size, max_wait=max_wait,
+                                 min_interval=0.0, stride=stride)
+    service.start()
+    latencies = {i: [] for i in range(sessions)}
+    results = [0] * sessions
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def record(session, future):
+        result = future.result()
+        if result is not None:
+            with lock:
+                latencies[session].append(result['latency'])
+                results[session] += 1
+
+    def client(session):
+        session_id = f"replay-{session}"
+        service.open_session(session_id)
+        stream = streams[session % len(streams)]
+        next_frame = time.perf_counter() + (session / sessions) / fps  # clients aren't in lockstep
+        i = 0
+        while next_frame < stop_at:
+            delay = next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            future = service.submit_frames(session_id, stream[i % len(stream)])
+            if future is not None:
+                future.add_done_callback(lambda f, s=session: record(s, f))
+            i += 1
+            next_frame += 1.0 / fps
+        service.close_session(session_id)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(s,)) for s in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    service.stop()
+
+    all_latencies = np.array([value for values in latencies.values() for value in values]) * 1000
+    session_p95 = [np.percentile(values, 95) * 1000 for values in latencies.values() if values]
+    stats = service.get_stats()
+    expected = sessions * max(0, (int(seconds * fps) - N_FRAMES) // stride + 1)
+    return {
+        'predictions': int(sum(results)),
+        'expected': expected,
+        'throughput': sum(results) / elapsed,
+        'avg_batch': stats['avg_batch'],
+        'max_batch': stats['max_batch'],
+        'superseded': stats['superseded'],
+        'p50': float(np.percentile(all_latencies, 50)) if len(all_latencies) else 0.0,
+        'p95': float(np.percentile(all_latencies, 95)) if len(all_latencies) else 0.0,
+        'worst_session_p95': max(session_p95) if session_p95 else 0.0,
+    }
+
+
+def print_report(title, report):
+    print(f"\n{title}")
+    print(f"  predictions:         {report['predictions']} of ~{report['expected']} windows "
+          f"({report['superseded']} replaced by newer windows)")
+    print(f"  throughput:          {report['throughput']:.1f} predictions/s")
+    print(f"  batch size:          avg {report['avg_batch']}, max {report['max_batch']}")
+    print(f"  latency:             p50 {report['p50']:.2f} ms, p95 {report['p95']:.2f} ms")
+    print(f"  worst session p95:   {report['worst_session_p95']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay landmark streams through the recognition service")
+    parser.add_argument("recordings", nargs="?", help="directory of .npy/.npz landmark recordings")
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--stride", type=int, default=10, help="frames between predictions")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait", type=float, default=0.0,
+                        help="seconds to hold a partial batch for more sequences")
+    parser.add_argument("--compare", action="store_true", help="also run with max batch size 1")
+    parser.add_argument("--simulate", action="store_true", help="simulated model instead of the TFLite one")
+    args = parser.parse_args()
+
+    if args.simulate:
+        recognizer = SimulatedRecognizer()
+    else:
+        from isl_recognizer import ISLRecognizer
+        recognizer = ISLRecognizer(MODEL_PATH, CLASS_NAMES_PATH)
+
+    streams = load_streams(args.recordings) if args.recordings else []
+    if not streams:
+        streams = synthetic_streams(min(args.sessions, 64), int(args.fps * 10))
+        print(f"Using {len(streams)} synthetic landmark streams")
+    else:
+        print(f"Loaded {len(streams)} recorded landmark streams")
+
+    print(f"Replaying {args.sessions} sessions for {args.seconds:.0f}s at {args.fps:.0f} fps, "
+          f"prediction every {args.stride} frames")
+
+    runs = [("Batched", args.max_batch)]
+    if args.compare:
+        runs.append(("One sequence per call", 1))
+    for title, max_batch_size in runs:
+        report = replay(recognizer, streams, args.sessions, args.seconds, args.fps,
+                        max_batch_size, args.max_wait, args.stride)
+        print_report(f"{title} (max batch {max_batch_size})", report)
+
+
+if __name__ == "__main__":
+    main()